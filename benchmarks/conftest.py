@@ -0,0 +1,76 @@
+"""
+Fixed inputs for the benchmark suite.
+
+Every benchmark runs on the same positions and the same game, so timings
+of two checkouts (or two runs stored with --benchmark-save) are comparable.
+Runs are stored next to this file, whatever the working directory, and
+--benchmark-compare fails the session on a regression beyond
+REGRESSION_THRESHOLD.
+"""
+
+import os
+
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+from src.game.constants import BOARD_WIDTH, PIECE_NAMES
+from src.game.notation import Notation, START_FEN
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REGRESSION_THRESHOLD = "min:20%"  # --benchmark-compare fails beyond this unless told otherwise
+
+POSITIONS = {
+    "start": START_FEN,
+    "open": "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "kiwipete": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "endgame": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "promotion": "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+}
+
+# Morphy - Duke Karl / Count Isouard, Paris 1858: captures, checks, long castling and mate
+GAME_SAN = (
+    "e4 e5 Nf3 d6 d4 Bg4 dxe5 Bxf3 Qxf3 dxe5 Bc4 Nf6 Qb3 Qe7 Nc3 c6 Bg5 b5 Nxb5 cxb5 "
+    "Bxb5+ Nbd7 O-O-O Rd8 Rxd7 Rxd7 Rd1 Qe6 Bxd7+ Nxd7 Qb8+ Nxb8 Rd8#"
+).split()
+
+GAME_PGN = """[Event "Paris"]
+[White "Paul Morphy"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 4. dxe5 Bxf3 5. Qxf3 dxe5 6. Bc4 Nf6 7. Qb3 Qe7
+8. Nc3 c6 9. Bg5 b5 10. Nxb5 cxb5 11. Bxb5+ Nbd7 12. O-O-O Rd8 13. Rxd7 Rxd7
+14. Rd1 Qe6 15. Bxd7+ Nxd7 16. Qb8+ Nxb8 17. Rd8# 1-0
+"""
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # keep stored runs (baselines) in benchmarks/.benchmarks instead of the working directory
+    if config.getoption("benchmark_storage", None) == "file://./.benchmarks":
+        config.option.benchmark_storage = "file://" + os.path.join(BENCHMARK_DIR, ".benchmarks")
+    if config.getoption("benchmark_compare", None) and not config.getoption("benchmark_compare_fail", None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
+
+
+def game_state_for(name):
+    """A fresh GameState for one of POSITIONS."""
+    return Notation.from_fen(POSITIONS[name])
+
+
+def to_game_move(move):
+    """(start_sq, end_sq, promotion_code) -> GameState.apply_move arguments."""
+    start_sq, end_sq, promotion = move
+    return divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH), PIECE_NAMES[promotion] if promotion else None
+
+
+@pytest.fixture(scope="session")
+def game_moves():
+    """GAME_SAN as apply_move arguments, resolved once."""
+    game_state = Notation.from_fen(START_FEN)
+    moves = []
+    for san in GAME_SAN:
+        move = to_game_move(Notation.san_to_move(game_state.board, san))
+        assert game_state.apply_move(*move), san
+        moves.append(move)
+    return moves
@@ -0,0 +1,185 @@
+"""
+Headless rendering benchmark: no window, no display needed.
+
+    python -m benchmarks.render_bench --frames 2000 --json render.json
+
+SDL's dummy video driver stands in for the display and every frame is drawn
+by app.draw_frame onto an off-screen Surface. A scripted game is clicked
+through GameState.handle_event like a player would: select a piece, look at
+its highlighted targets for a while, move it; restart at the end. Reported:
+frame-time percentiles, blits / fills / draw calls per frame and the time
+of each render stage (via src.utils.metrics).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame as pg
+
+from src.app import WINDOW_SIZE, draw_frame
+from src.game.board import Board
+from src.game.constants import BOARD_WIDTH, TILE_SIZE
+from src.game.game_state import GameState
+from src.game.notation import Notation, START_FEN
+from src.UI.hud import HUD
+from src.UI.renderer import Renderer
+from src.utils import assets, metrics
+
+# Morphy - Duke Karl / Count Isouard, Paris 1858
+SCRIPT_SAN = (
+    "e4 e5 Nf3 d6 d4 Bg4 dxe5 Bxf3 Qxf3 dxe5 Bc4 Nf6 Qb3 Qe7 Nc3 c6 Bg5 b5 Nxb5 cxb5 "
+    "Bxb5+ Nbd7 O-O-O Rd8 Rxd7 Rxd7 Rd1 Qe6 Bxd7+ Nxd7 Qb8+ Nxb8 Rd8#"
+).split()
+
+RENDER_TARGETS = (
+    ("src.UI.renderer", "Renderer.draw_board", "render.draw_board"),
+    ("src.UI.renderer", "Renderer.draw_highlights", "render.draw_highlights"),
+    ("src.UI.renderer", "Renderer.draw_move_indicators", "render.draw_move_indicators"),
+    ("src.UI.hud", "HUD.draw", "render.hud"),
+)
+
+
+class CountingSurface(pg.Surface):
+    """Off-screen render target that counts what is drawn on it."""
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.blit_count = 0
+        self.fill_count = 0
+
+    def blit(self, *args, **kwargs):
+        self.blit_count += 1
+        return super().blit(*args, **kwargs)
+
+    def fill(self, *args, **kwargs):
+        self.fill_count += 1
+        return super().fill(*args, **kwargs)
+
+
+class _DrawCounter:
+    """Counts pygame.draw primitives while installed."""
+
+    NAMES = ("rect", "circle", "line", "lines", "polygon", "ellipse", "arc")
+
+    def __init__(self):
+        self.count = 0
+        self._saved = {}
+
+    def __enter__(self):
+        for name in self.NAMES:
+            original = self._saved[name] = getattr(pg.draw, name)
+            setattr(pg.draw, name, self._counting(original))
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._saved.items():
+            setattr(pg.draw, name, original)
+
+    def _counting(self, original):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+        return counted
+
+
+def script_events(hold_frames):
+    """
+    Yield, frame by frame, the list of input events for that frame: click the
+    piece, hold the selection, click the target, hold the position; 'r' at the end.
+    """
+    game_state = Notation.from_fen(START_FEN)
+    clicks = []
+    for san in SCRIPT_SAN:
+        start_sq, end_sq, _ = Notation.san_to_move(game_state.board, san)
+        clicks.append(start_sq)
+        clicks.append(end_sq)
+        game_state.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH))
+    while True:
+        for square in clicks:
+            row, col = divmod(square, BOARD_WIDTH)
+            position = (col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
+            yield [pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=position)]
+            for _ in range(hold_frames):
+                yield []
+        yield [pg.event.Event(pg.KEYDOWN, key=pg.K_r)]
+
+
+def _percentiles(values, points=(50, 90, 99)):
+    ordered = sorted(values)
+    return {f"p{p}": ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in points}
+
+
+def run(frames=1000, hold_frames=5):
+    """Replay the script for the given number of frames; returns the report dict."""
+    pg.init()
+    pg.display.set_mode((1, 1))  # the dummy display only serves convert_alpha in asset loading
+    assets.init_assets(TILE_SIZE)
+    screen = CountingSurface(WINDOW_SIZE)
+
+    board = Board()
+    game_state = GameState(board)
+    renderer = Renderer(board)
+    hud = HUD(board)
+
+    frame_ms, blits, fills, draws = [], [], [], []
+    events = script_events(hold_frames)
+    metrics.reset()
+    metrics.enable(RENDER_TARGETS)
+    try:
+        with _DrawCounter() as draw_counter:
+            for _ in range(frames):
+                for event in next(events):
+                    game_state.handle_event(event)
+                screen.blit_count = screen.fill_count = draw_counter.count = 0
+                started = time.perf_counter_ns()
+                draw_frame(screen, board, renderer, hud)
+                frame_ms.append((time.perf_counter_ns() - started) / 1e6)
+                metrics.frame()
+                blits.append(screen.blit_count)
+                fills.append(screen.fill_count)
+                draws.append(draw_counter.count)
+    finally:
+        metrics.disable()
+
+    return {
+        "frames": frames,
+        "frame_ms": dict(_percentiles(frame_ms), mean=sum(frame_ms) / frames, max=max(frame_ms)),
+        "blits_per_frame": dict(_percentiles(blits), mean=sum(blits) / frames, max=max(blits)),
+        "fills_per_frame": sum(fills) / frames,
+        "draws_per_frame": sum(draws) / frames,
+        "stages": metrics.snapshot()["timers"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--hold", type=int, default=5, help="frames between scripted clicks")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.frames, args.hold)
+    frame_ms = report["frame_ms"]
+    blits = report["blits_per_frame"]
+    print(f"[render_bench] {report['frames']} frames: "
+          f"p50 {frame_ms['p50']:.3f} ms  p90 {frame_ms['p90']:.3f} ms  p99 {frame_ms['p99']:.3f} ms  "
+          f"max {frame_ms['max']:.3f} ms")
+    print(f"[render_bench] per frame: {blits['mean']:.1f} blits (max {blits['max']}), "
+          f"{report['fills_per_frame']:.1f} fills, {report['draws_per_frame']:.1f} draw calls")
+    for name, stage in report["stages"].items():
+        print(f"[render_bench]   {name:28} {stage['count']:7d} calls  mean {stage['mean_us']:8.1f} us  "
+              f"p99 {stage['p99_us']:8.1f} us")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Batched NumPy evaluation against the per-position evaluator, on the same
+positions (all positions of a scripted game and the fixed position set).
+"""
+
+import pytest
+
+from src.engine.batch_eval import evaluate_batch, pack_fens, pack_positions
+from src.engine.evaluation import evaluate, material_score
+from src.game.constants import WHITE
+from src.game.notation import Notation, START_FEN
+
+from conftest import POSITIONS
+
+BATCH_REPEAT = 500  # the position set is repeated to get a batch worth vectorising
+
+
+@pytest.fixture(scope="module")
+def boards(game_moves):
+    game_state = Notation.from_fen(START_FEN)
+    fens = list(POSITIONS.values())
+    for move in game_moves:
+        game_state.apply_move(*move)
+        fens.append(Notation.to_fen(game_state))
+    return [Notation.from_fen(fen).board for fen in fens] * BATCH_REPEAT
+
+
+def _fens(boards):
+    game_state = Notation.from_fen(START_FEN)
+    for board in boards:
+        game_state.board = board
+        yield Notation.to_fen(game_state)
+
+
+@pytest.mark.benchmark(group="evaluation")
+def test_evaluate_per_position(benchmark, boards):
+    benchmark(lambda: [evaluate(board) for board in boards])
+
+
+@pytest.mark.benchmark(group="evaluation")
+@pytest.mark.parametrize("with_mobility", (False, True), ids=("pst", "pst+mobility"))
+def test_evaluate_batch(benchmark, boards, with_mobility):
+    codes, turns = pack_positions(boards)
+    scores = benchmark(evaluate_batch, codes, turns, with_mobility)
+    if not with_mobility:
+        # the batch evaluator has no pawn-structure term: compare with the material + piece-square part
+        assert scores.tolist() == [material_score(board) * (1 if board.turn == WHITE else -1) for board in boards]
+
+
+@pytest.mark.benchmark(group="evaluation")
+def test_pack_and_evaluate_batch(benchmark, boards):
+    # what a caller holding Boards pays instead of test_evaluate_per_position
+    scores = benchmark(lambda: evaluate_batch(*pack_positions(boards)))
+    assert len(scores) == len(boards)
+
+
+@pytest.mark.benchmark(group="packing")
+def test_pack_positions(benchmark, boards):
+    benchmark(pack_positions, boards)
+
+
+@pytest.mark.benchmark(group="packing")
+def test_pack_fens(benchmark, boards):
+    fens = [Notation.to_fen(Notation.from_fen(fen)) for fen in _fens(boards)]
+    codes, turns = benchmark(pack_fens, fens)
+    assert (codes == pack_positions(boards)[0]).all()
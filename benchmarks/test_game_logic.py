@@ -0,0 +1,240 @@
+"""
+Benchmarks of the game-logic hot paths (pytest-benchmark).
+
+    python -m pytest benchmarks
+"""
+
+import itertools
+import random
+
+import pytest
+
+from src.engine.nnue import Network, NNUEEvaluator
+from src.game.attacks import AttackMap
+from src.game.constants import BOARD_HEIGHT, BOARD_WIDTH, BLACK, WHITE
+from src.game.notation import Notation, START_FEN
+from src.game.rules import Rules
+from src.game.zobrist import SIDE_KEYS, compute_hash, compute_pawn_hash
+
+from conftest import GAME_PGN, GAME_SAN, POSITIONS, game_state_for, to_game_move
+
+PIECE_TYPES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+QUEEN_LINES = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def _legal_moves(game_state):
+    return [to_game_move(move) for move in Rules.get_legal_moves(game_state.board)]
+
+
+def _walk(game_state, seed, plies=24):
+    """
+    Play random legal moves with make_move and take them all back, yielding
+    after each step: the checks of incrementally kept state run on every
+    position of the line, on the way out and on the way back.
+    """
+    board = game_state.board
+    rng = random.Random(seed)
+    undos = []
+    yield
+    for _ in range(plies):
+        moves = Rules.get_legal_moves(board)
+        if not moves:
+            break
+        undos.append(board.make_move(*rng.choice(moves)))
+        yield
+    while undos:
+        board.unmake_move(undos.pop())
+        yield
+
+
+# -------------------------
+# Move generation and validation
+# -------------------------
+@pytest.mark.parametrize("piece_type", PIECE_TYPES)
+def test_get_valid_moves(benchmark, piece_type):
+    work = []
+    for name in POSITIONS:
+        board = game_state_for(name).board
+        work.extend((piece, board) for piece in board.squares if piece is not None and piece.type == piece_type)
+
+    def run():
+        for piece, board in work:
+            piece.get_valid_moves(board)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_is_valid_move(benchmark, position):
+    board = game_state_for(position).board
+    # every target square for every piece of the side to move: legal and illegal tries
+    work = [(piece, piece.position, divmod(target, BOARD_WIDTH))
+            for piece in board.squares if piece is not None and piece.kind.color_code == board.turn
+            for target in range(BOARD_WIDTH * BOARD_HEIGHT) if target != piece.square]
+
+    def run():
+        for piece, start_pos, end_pos in work:
+            Rules.is_valid_move(board, piece, start_pos, end_pos)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_is_path_clear(benchmark, position):
+    board = game_state_for(position).board
+    work = []
+    for piece in board.squares:
+        if piece is None:
+            continue
+        row, col = piece.position
+        for dr, dc in QUEEN_LINES:
+            r, c = row + dr, col + dc
+            while 0 <= r < BOARD_HEIGHT and 0 <= c < BOARD_WIDTH:
+                work.append(((row, col), (r, c)))
+                r, c = r + dr, c + dc
+
+    def run():
+        for start_pos, end_pos in work:
+            Rules.is_path_clear(board, start_pos, end_pos)
+    benchmark(run)
+
+
+# -------------------------
+# Making and taking back moves
+# -------------------------
+@pytest.mark.parametrize("position", POSITIONS)
+def test_move_piece(benchmark, position):
+    moves = _legal_moves(game_state_for(position))
+    cycle = itertools.cycle(moves)
+
+    def setup():
+        # move_piece mutates the board: each round gets a fresh one, built outside the timing
+        return (game_state_for(position).board,) + next(cycle), {}
+
+    benchmark.pedantic(lambda board, start_pos, end_pos, promotion: board.move_piece(start_pos, end_pos, promotion),
+                       setup=setup, rounds=len(moves) * 20)
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_apply_undo(benchmark, position):
+    game_state = game_state_for(position)
+    moves = _legal_moves(game_state)
+
+    def run():
+        for move in moves:
+            game_state.apply_move(*move)
+            game_state.undo_last_move()
+    benchmark(run)
+    assert Notation.to_fen(game_state) == POSITIONS[position]
+
+
+# -------------------------
+# Attack maps
+# -------------------------
+@pytest.mark.parametrize("position", POSITIONS)
+@pytest.mark.parametrize("attack_map", (False, True), ids=("scan", "attack_map"))
+def test_get_legal_moves(benchmark, position, attack_map):
+    # with a map every legality check pays for its update but answers the check test by lookup
+    board = game_state_for(position).board
+    if attack_map:
+        AttackMap(board)
+    moves = benchmark(Rules.get_legal_moves, board)
+    board.attack_map = None
+    assert moves == Rules.get_legal_moves(board)
+
+
+# -------------------------
+# Incremental state (fast correctness checks, no timing)
+# -------------------------
+@pytest.mark.parametrize("position", POSITIONS)
+def test_attack_map_matches_scan(position):
+    game_state = game_state_for(position)
+    board = game_state.board
+    attack_map = AttackMap(board)
+    squares = range(BOARD_WIDTH * BOARD_HEIGHT)
+    for _ in _walk(game_state, position):
+        rebuilt = AttackMap(Notation.from_fen(Notation.to_fen(game_state)).board)
+        assert attack_map.attackers == rebuilt.attackers
+        assert attack_map.counts == rebuilt.counts
+        board.attack_map = None  # scan the board instead of asking the map
+        scanned = [[Rules.is_square_attacked(board, square, color) for square in squares] for color in (WHITE, BLACK)]
+        board.attack_map = attack_map
+        assert scanned == [[attack_map.is_attacked(square, color) for square in squares] for color in (WHITE, BLACK)]
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_nnue_accumulators_match_full_pass(position):
+    game_state = game_state_for(position)
+    board = game_state.board
+    network = Network.random(hidden=32, l2=8)
+    evaluator = NNUEEvaluator(network)
+    for _ in _walk(game_state, position):
+        assert evaluator(board) == network.evaluate_full(board)
+        assert (evaluator._accumulators() == network.accumulate(board)).all()
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_hashes_match_recompute(position):
+    game_state = game_state_for(position)
+    board = game_state.board
+    for _ in _walk(game_state, position):
+        assert board.hash == compute_hash(board) ^ SIDE_KEYS[board.turn]
+        assert board.pawn_hash == compute_pawn_hash(board)
+
+
+# -------------------------
+# Notation
+# -------------------------
+def test_parse_move(benchmark):
+    sans = [san.rstrip("+#") for san in GAME_SAN]
+
+    def run():
+        for san in sans:
+            Notation.parse_move(san)
+    benchmark(run)
+
+
+def test_move_to_notation(benchmark, game_moves):
+    game_state = Notation.from_fen(START_FEN)
+    work = []
+    for start_pos, end_pos, promotion in game_moves:
+        board = game_state.board
+        piece = board.squares[start_pos[0] * BOARD_WIDTH + start_pos[1]]
+        capture = board.squares[end_pos[0] * BOARD_WIDTH + end_pos[1]] is not None
+        special = None
+        if piece.type == "king" and abs(end_pos[1] - start_pos[1]) == 2:
+            special = "O-O" if end_pos[1] > start_pos[1] else "O-O-O"
+        elif promotion:
+            special = "=" + promotion[0].upper()
+        work.append((piece, start_pos, end_pos, capture, special))
+        game_state.apply_move(start_pos, end_pos, promotion)
+
+    def run():
+        for args in work:
+            Notation.move_to_notation(*args)
+    benchmark(run)
+
+
+# -------------------------
+# Whole games
+# -------------------------
+def test_replay_game(benchmark, game_moves):
+    def run():
+        game_state = Notation.from_fen(START_FEN)
+        for move in game_moves:
+            game_state.apply_move(*move)
+        return game_state
+    game_state = benchmark(run)
+    assert game_state.get_outcome() is not None
+
+
+def test_replay_pgn(benchmark):
+    lines = GAME_PGN.splitlines()
+
+    def run():
+        game_state = None
+        for game in Notation.read_pgn(lines):
+            game_state = Notation.from_fen(START_FEN)
+            for san in game["moves"]:
+                game_state.apply_move(*to_game_move(Notation.san_to_move(game_state.board, san)))
+        return game_state
+    game_state = benchmark(run)
+    assert len(game_state.move_history) == len(GAME_SAN)
@@ -0,0 +1,48 @@
+"""
+Off-screen frame rendering (pytest-benchmark); benchmarks/render_bench.py
+replays a whole scripted game and reports percentiles instead.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg
+import pytest
+
+from src.app import WINDOW_SIZE, draw_frame
+from src.game.attacks import AttackMap
+from src.game.constants import TILE_SIZE
+from src.UI.hud import HUD
+from src.UI.renderer import Renderer
+from src.utils import assets
+
+from conftest import POSITIONS, game_state_for
+
+
+@pytest.fixture(scope="module")
+def screen():
+    pg.init()
+    pg.display.set_mode((1, 1))  # asset loading converts images for the display format
+    assets.init_assets(TILE_SIZE)
+    return pg.Surface(WINDOW_SIZE)
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+@pytest.mark.parametrize("selected", (False, True), ids=("plain", "selected"))
+def test_draw_frame(benchmark, screen, position, selected):
+    board = game_state_for(position).board
+    if selected:
+        # the piece of the side to move with the most targets, so highlights are drawn
+        pieces = [piece for piece in board.squares if piece is not None and piece.kind.color_code == board.turn]
+        board.selected_piece = max(pieces, key=lambda piece: len(piece.get_valid_moves(board)))
+    benchmark(draw_frame, screen, board, Renderer(board), HUD(board))
+
+
+@pytest.mark.parametrize("position", POSITIONS)
+def test_draw_frame_threats(benchmark, screen, position):
+    board = game_state_for(position).board
+    attack_map = AttackMap(board)
+    hud = HUD(board)
+    hud.attack_map = attack_map
+    benchmark(draw_frame, screen, board, Renderer(board), hud, None, attack_map)
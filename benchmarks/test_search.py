@@ -0,0 +1,33 @@
+"""
+Fixed-depth search on the position set: single-PV against multi-PV, so the
+cost of reporting more lines is measured, not guessed. Node counts are
+recorded in extra_info (they do not depend on the machine).
+"""
+
+import pytest
+
+from src.engine.search import Search, SearchLimits
+from src.game.notation import Notation
+
+from conftest import POSITIONS
+
+SEARCH_DEPTH = 4
+SEARCH_POSITIONS = ("open", "kiwipete", "endgame")
+
+
+def _search_all(multipv):
+    nodes = 0
+    for name in SEARCH_POSITIONS:
+        search = Search(16)
+        search.think(Notation.from_fen(POSITIONS[name]).board, SearchLimits(depth=SEARCH_DEPTH, multipv=multipv))
+        nodes += search.nodes
+    return nodes
+
+
+@pytest.mark.benchmark(group="search")
+@pytest.mark.parametrize("multipv", (1, 2, 4), ids=("multipv1", "multipv2", "multipv4"))
+def test_search_multipv(benchmark, multipv):
+    nodes = benchmark.pedantic(_search_all, args=(multipv,), rounds=3, iterations=1)
+    benchmark.extra_info["nodes"] = nodes
+    if multipv > 1:
+        assert nodes > _search_all(1)
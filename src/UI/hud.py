@@ -1,6 +1,7 @@
 import pygame as pg
 from typing import Optional, Iterable, Tuple
-from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, WHITE_TILE_COLOR, BLACK_TILE_COLOR
+from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, WHITE_TILE_COLOR, BLACK_TILE_COLOR, WHITE, BLACK
+from src.game.notation import Notation
 from src.utils.assets import get_piece_image
 
 class HUD:
@@ -41,6 +42,13 @@ class HUD:
         ]
         self.legend_images = {f"{c}_{p}": get_piece_image(c, p) for c, p in self.legend_order}
 
+        # latest progress of a background search (see engine.BackgroundEngine.info / .lines)
+        self.engine_info = None
+        self.engine_lines = []  # multi-PV: one info per rank, best first
+
+        # attacks.AttackMap of the board while the threat overlay is on (None hides the threat line)
+        self.attack_map = None
+
     def _prepare_highlight_surfaces(self):
         """ Create semi-transparent surfaces for highlighting squares"""
         # selection highlight
@@ -67,6 +75,12 @@ class HUD:
         # draw selection and possible moves overlays
         self._draw_optional_info(screen)
 
+        # engine progress line
+        self._draw_engine_info(screen)
+
+        # hanging pieces / check, read from the attack map
+        self._draw_threats(screen)
+
     def _draw_turn(self, screen: pg.Surface):
         """ Draw the current player or turn"""
         try:
@@ -129,8 +143,8 @@ class HUD:
         # move history (if available)
         last_move = getattr(self.board, "last_move", None)
         if last_move:
-            # pretty print last_move if it's a tuple (piece, start, end)
-            text = f"Last: {getattr(last_move[0], 'type', '?')} {last_move[1]}→{last_move[2]}"
+            # Board.move_piece records a dict (piece, start, end, captured, ...)
+            text = f"Last: {getattr(last_move['piece'], 'type', '?')} {last_move['start']}→{last_move['end']}"
             surf = self.font.render(text, True, pg.Color("white"))
             screen.blit(surf, (x, y))
             return
@@ -145,6 +159,38 @@ class HUD:
         
        
     
+    def _draw_engine_info(self, screen: pg.Surface):
+        """Depth, score and principal variation of the running engine search, if any (one row per PV)."""
+        lines = self.engine_lines or ([self.engine_info] if self.engine_info else [])
+        y = screen.get_height() - 40 - self.margin
+        for info in lines:
+            if info["mate"] is not None:
+                score = f"#{info['mate']}"
+            else:
+                score = f"{info['score'] / 100:+.2f}"
+            pv = " ".join(Notation.move_to_uci(move) for move in info["pv"][:6])
+            rank = f"{info['multipv']}. " if len(lines) > 1 else ""
+            text = f"Engine {rank}d{info['depth']} {score} {pv}"
+            surf = self.font.render(text, True, pg.Color("white"))
+            screen.blit(surf, (self.margin, y))
+            y -= 20  # further lines stack upwards, the best one stays at the bottom
+
+    def _draw_threats(self, screen: pg.Surface):
+        """Hanging pieces of both sides and check, from the attack map (lookups only)."""
+        attack_map = self.attack_map
+        if attack_map is None:
+            return
+        parts = []
+        for color, name in ((WHITE, "White"), (BLACK, "Black")):
+            hanging = [Notation.pos_to_notation(divmod(square, BOARD_WIDTH)) for square in attack_map.hanging(color)]
+            status = " ".join(hanging) if hanging else "-"
+            if attack_map.in_check(color):
+                status += " (check)"
+            parts.append(f"{name}: {status}")
+        text = "Hanging  " + "   ".join(parts)
+        surf = self.font.render(text, True, pg.Color("white"))
+        screen.blit(surf, (self.margin, self.margin + 20))
+
     def show_message(self, screen: pg.Surface, text: str, pos: Tuple[int, int] = (10, 40), ttl: float = 2.0):
             """ Display a temporary message on the HUD at given position for ttl seconds"""
             surf = self.font.render(text, True, pg.Color("yellow"))
@@ -1,6 +1,6 @@
 import os
 import pygame as pg
-from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT
+from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK
 from src.game.pieces import Piece
 from src.game.board import Board
 from typing import List, Tuple
@@ -30,9 +30,13 @@ class Renderer:
         self.board = board
         # light / dark tile colors (you can also import from constants)
         self.colors = [(235, 209, 166), (165, 117, 81)]
+        # attack overlay: white-controlled squares blue, black-controlled red, stronger with the margin
+        self.control_colors = [(40, 90, 230), (220, 40, 40)]
+        self.hanging_color = (255, 40, 40)
+        self._overlay_tiles = {}  # (color, margin) -> tinted SRCALPHA tile
 
-    def draw_board(self, screen: pg.Surface, board) -> None:
-        """Draw the chess board squares."""
+    def draw_board(self, screen: pg.Surface, board, attack_map=None) -> None:
+        """Draw the chess board squares (with attack_map, the threat overlay too)."""
         
         # --- Draw board squares ---
         for row in range(BOARD_HEIGHT):
@@ -44,25 +48,29 @@ class Renderer:
                     pg.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
                 )
 
+        # --- Square control, under the pieces ---
+        if attack_map is not None:
+            self._draw_control(screen, attack_map)
+
         # --- Draw pieces ---
-        for row in range(BOARD_HEIGHT):
-            for col in range(BOARD_WIDTH):
-                piece = board.tiles[row][col]
-                if not piece:
-                    continue
+        for index, piece in enumerate(board.squares):
+            if piece is None:
+                continue
 
-                # Try to get preloaded piece image
-                surf = getattr(piece, "image", None)
-                if not surf or not isinstance(surf, pg.Surface):
-                    # fallback: use your asset loader
-                    try:
-                        surf = get_piece_image(piece.color, piece.type)
-                        piece.image = surf  # cache it for next frames
-                    except Exception:
-                        continue
+            # piece images are shared per (color, type) descriptor and loaded on first use
+            try:
+                surf = piece.image
+            except Exception:
+                continue
+            if not isinstance(surf, pg.Surface):
+                continue
 
-                screen.blit(surf, (col * TILE_SIZE, row * TILE_SIZE))
+            row, col = divmod(index, BOARD_WIDTH)
+            screen.blit(surf, (col * TILE_SIZE, row * TILE_SIZE))
 
+        # --- Hanging pieces, over them ---
+        if attack_map is not None:
+            self._draw_hanging(screen, attack_map)
 
     def highlight_square(self, screen: pg.Surface, row: int, col: int, color: Tuple[int, int, int]) -> None:
         """Draw a semi-transparent highlight over a single square"""
@@ -84,18 +92,41 @@ class Renderer:
             center_y = row * TILE_SIZE + TILE_SIZE // 2
             pg.draw.circle(screen, indicator_color, (center_x, center_y), radius)
 
+    def _draw_control(self, screen: pg.Surface, attack_map) -> None:
+        """
+        Heatmap of an attacks.AttackMap: each square tinted for the side attacking it
+        more often, deeper for a larger margin. Only reads the map's counts.
+        """
+        white_counts, black_counts = attack_map.counts
+        for index in range(BOARD_WIDTH * BOARD_HEIGHT):
+            margin = white_counts[index] - black_counts[index]
+            if margin == 0:
+                continue
+            key = (WHITE, min(margin, 3)) if margin > 0 else (BLACK, min(-margin, 3))
+            tile = self._overlay_tiles.get(key)
+            if tile is None:
+                tile = pg.Surface((TILE_SIZE, TILE_SIZE), pg.SRCALPHA)
+                tile.fill((*self.control_colors[key[0]], 40 + 30 * key[1]))
+                self._overlay_tiles[key] = tile
+            row, col = divmod(index, BOARD_WIDTH)
+            screen.blit(tile, (col * TILE_SIZE, row * TILE_SIZE))
+
+    def _draw_hanging(self, screen: pg.Surface, attack_map) -> None:
+        """Outline the pieces of both sides the opponent can win (AttackMap.hanging)."""
+        width = max(2, TILE_SIZE // 20)
+        for color in (WHITE, BLACK):
+            for index in attack_map.hanging(color):
+                row, col = divmod(index, BOARD_WIDTH)
+                pg.draw.rect(screen, self.hanging_color,
+                             pg.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE), width)
+
     def draw_selected_piece(self, screen: pg.Surface, piece: Piece, mouse_pos: Tuple[int, int]) -> None:
         """If implementing drag, draw the dragged piece at mouse position."""
         if not piece:
             return
         surf = getattr(piece, "image", None)
         if surf is None:
-            try:
-                surf = pg.image.load(piece.image_path)
-                surf = pg.transform.scale(surf, (TILE_SIZE, TILE_SIZE))
-                piece.image = surf
-            except Exception:
-                return
+            return
         screen.blit(surf, (mouse_pos[0] - TILE_SIZE // 2, mouse_pos[1] - TILE_SIZE // 2))
 
     def draw_game_over(self, screen: pg.Surface, winner: str) -> None:
@@ -1,47 +1,159 @@
+import os
 import pygame as pg
+from src.game.attacks import AttackMap
 from src.game.board import Board
 from src.game.game_state import GameState
+from src.game.notation import Notation
 from src.UI.hud import HUD
 from src.UI.renderer import Renderer
-from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT
-from src.utils.assets import init_assets
+from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, BLACK, PIECE_NAMES
+from src.engine.background import BackgroundEngine
+from src.engine.search import SearchLimits
+from src.utils import assets, metrics
 
 WINDOW_SIZE = (TILE_SIZE * BOARD_WIDTH, TILE_SIZE * BOARD_HEIGHT)
+ENGINE_MOVETIME = 2000  # ms per engine move
+ANALYSIS_MULTIPV = 3  # lines shown while analysing
+ENGINE_PONDER = True  # think on the expected reply during the player's turn
+METRICS_DUMP_FRAMES = 300  # with CHESS_METRICS set, rewrite the JSON snapshot this often
+SELECTION_COLOR = (246, 246, 105)
+
+
+def draw_frame(screen, board, renderer, hud, overlay=None, attack_map=None):
+    """Draw one frame (also driven off-screen by benchmarks/render_bench.py); attack_map adds the threat overlay."""
+    screen.fill((30, 30, 30))
+    renderer.draw_board(screen, board, attack_map)
+    selected = board.selected_piece
+    if selected is not None:
+        renderer.draw_highlights(screen, [selected.position], SELECTION_COLOR)
+        renderer.draw_move_indicators(screen, selected.get_valid_moves(board))
+    hud.draw(screen)
+    if overlay is not None:
+        overlay.draw(screen)
+
+
+def after_move(game_state, move):
+    """A copy of game_state with move (start_sq, end_sq, promotion) played, or None if it is illegal."""
+    copy = Notation.from_fen(Notation.to_fen(game_state))
+    start_sq, end_sq, promotion = move
+    if not copy.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                           PIECE_NAMES[promotion] if promotion else None):
+        return None
+    return copy
+
+
+def position_history(game_state):
+    """Hashes of the game's earlier positions, so the engine sees repetitions."""
+    return [entry["position_hash"] for entry in game_state.move_history]
 
 
 def run_game():
     pg.init()
+    # CHESS_METRICS=<file.json>: instrument the hot paths and dump snapshots there, 'm' shows them
+    metrics_path = os.environ.get("CHESS_METRICS")
+    if metrics_path:
+        metrics.enable()
     screen = pg.display.set_mode(WINDOW_SIZE)
     pg.display.set_caption("ChessGame-py")
+    assets.init_assets(TILE_SIZE)
     clock = pg.time.Clock()
 
     board = Board()
     game_state = GameState(board)  
+    # threat overlay ('t'): attached only while shown, as keeping it current slows every Rules call
+    attack_map = AttackMap()
+    show_threats = False
 
     # UI
     renderer = Renderer(board)
     hud = HUD(board)
+    overlay = metrics.MetricsOverlay() if metrics_path else None
+
+    # engine: 'e' toggles it playing black, 'a' toggles analysis of the position on the board
+    engine = BackgroundEngine()
+    engine_color = None
+    analysing = False
+    position_key = None  # position the engine was last started on
+    ponder_move = None  # reply the engine expects to its last move
+    ponder_hash = None  # position the engine is pondering on
     running = True
     try:
         while running:
             for event in pg.event.get():
                 if event.type == pg.QUIT:
                     running = False
+                elif event.type == pg.KEYDOWN and event.key == pg.K_e:
+                    engine_color = None if engine_color is not None else BLACK
+                    position_key = None
+                elif event.type == pg.KEYDOWN and event.key == pg.K_a:
+                    analysing = not analysing
+                    position_key = None
+                elif event.type == pg.KEYDOWN and event.key == pg.K_m and overlay is not None:
+                    overlay.toggle()
+                elif event.type == pg.KEYDOWN and event.key == pg.K_t:
+                    show_threats = not show_threats
+                    if show_threats:
+                        attack_map.attach(board)
+                    else:
+                        attack_map.detach()
+                    hud.attack_map = attack_map if show_threats else None
+                elif event.type == pg.MOUSEBUTTONDOWN and board.turn == engine_color:
+                    continue  # the engine is to move
                 else:
                     game_state.handle_event(event)
                     hud.handle_event(event)
-           
-            screen.fill((30, 30, 30))  
-            renderer.draw_board(screen, board)  
-            hud.draw(screen)                    
 
+            # a move, undo or restart changes the position: drop the old search and start over,
+            # unless it is the reply the engine has been pondering on
+            key = (board.hash, len(game_state.move_history))
+            if key != position_key:
+                position_key = key
+                if engine.pondering and board.hash == ponder_hash and board.turn == engine_color:
+                    engine.ponderhit()  # the expected reply: the ponder search becomes the move search
+                else:
+                    engine.cancel()
+                    if game_state.get_outcome() is None:
+                        if board.turn == engine_color:
+                            engine.start(Notation.to_fen(game_state), SearchLimits(movetime=ENGINE_MOVETIME),
+                                         position_history(game_state))
+                        elif analysing:
+                            engine.start(Notation.to_fen(game_state),
+                                         SearchLimits(infinite=True, multipv=ANALYSIS_MULTIPV),
+                                         position_history(game_state))
+                        elif ENGINE_PONDER and engine_color is not None and ponder_move is not None:
+                            expected = after_move(game_state, ponder_move)
+                            if expected is not None and expected.get_outcome() is None:
+                                ponder_hash = expected.board.hash
+                                # the current position comes before the expected one
+                                engine.start(Notation.to_fen(expected),
+                                             SearchLimits(movetime=ENGINE_MOVETIME, ponder=True),
+                                             position_history(game_state) + [board.hash])
+                ponder_move = None
+
+            for event in engine.poll():
+                if event[0] == "bestmove" and event[1] is not None and board.turn == engine_color:
+                    start_sq, end_sq, promotion = event[1]
+                    game_state.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                                          PIECE_NAMES[promotion] if promotion else None)
+                    ponder_move = event[2]
+            hud.engine_info = engine.info
+            hud.engine_lines = engine.lines
+
+            draw_frame(screen, board, renderer, hud, overlay, attack_map if show_threats else None)
             pg.display.flip()
             clock.tick(60)
+            if metrics_path:
+                metrics.frame()
+                if metrics.frames % METRICS_DUMP_FRAMES == 0:
+                    metrics.dump(metrics_path)
 
     finally:
+        engine.close()
+        if metrics_path:
+            metrics.dump(metrics_path)
+            metrics.disable()
         pg.quit()
 
 
 if __name__ == "__main__":
     run_game()
-
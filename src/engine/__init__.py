@@ -0,0 +1,28 @@
+"""
+Engine package - position evaluation and game tree search.
+Actually: Search, SearchLimits, BackgroundEngine, MateSolver, evaluate
+
+The names are imported on first use, so running one of the modules
+(python -m src.engine.mate_solver) does not import it a second time.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'Search': '.search',
+    'SearchLimits': '.search',
+    'BackgroundEngine': '.background',
+    'MateSolver': '.mate_solver',
+    'evaluate': '.evaluation',
+}
+
+__all__ = ['Search', 'SearchLimits', 'BackgroundEngine', 'MateSolver', 'evaluate']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
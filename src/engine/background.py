@@ -0,0 +1,173 @@
+"""
+Background engine: runs Search in a worker process so the UI never blocks.
+
+The UI hands a position (FEN) and SearchLimits to ``start`` and calls ``poll``
+once per frame to collect progress (depth, score, PV) and the final move;
+with SearchLimits.multipv > 1 ``lines`` keeps the latest info of every rank.
+Every search gets an id; the id of the search the UI still wants lives in
+shared memory, so ``cancel`` (or a newer ``start``) stops a running search
+within a few hundred nodes and late results of old searches are dropped.
+
+Pondering: ``start`` with SearchLimits(ponder=True) on the position after the
+expected reply keeps the worker busy during the opponent's turn. If the
+opponent plays that move, ``ponderhit`` turns the search into a normal timed
+one (the id of the hit search goes through shared memory as well, and the
+search notices it where it polls its stop flag); otherwise ``cancel`` it and
+start afresh. The worker's Search, and so its transposition table, lives as
+long as the engine, so either way the next search starts from what the
+previous ones stored.
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from src.engine.search import Search, SearchLimits
+
+Move = Tuple[int, int, int]
+
+
+class _SearchToken:
+    """
+    Stop flag of one search (duck-types threading.Event for Search.stop_event);
+    also delivers a ponderhit to the search, which polls it every few hundred nodes.
+    """
+
+    __slots__ = ("_active", "_search_id", "_hit", "_search")
+
+    def __init__(self, active, search_id: int, hit=None, search: Optional[Search] = None):
+        self._active = active
+        self._search_id = search_id
+        self._hit = hit  # shared id of the ponder search that was hit
+        self._search = search
+
+    def is_set(self) -> bool:
+        if self._search is not None and self._hit.value == self._search_id:
+            search, self._search = self._search, None
+            search.ponderhit()
+        return self._active.value != self._search_id
+
+    def set(self) -> None:
+        if self._active.value == self._search_id:
+            self._active.value = 0
+
+    def clear(self) -> None:
+        pass  # a token is only ever valid for its own search
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        time.sleep(timeout or 0)
+        return self.is_set()
+
+
+def _worker_main(requests, results, active, hit, hash_mb: int) -> None:
+    """Worker process: run searches as they are requested until None arrives."""
+    # deferred: the spawned child has to import the game modules itself
+    from src.game.notation import Notation
+
+    search = Search(hash_mb)
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        kind = request[0]
+        if kind == "clear":
+            search.clear()
+            continue
+        _, search_id, fen, limits, history = request
+        if active.value != search_id:
+            continue  # cancelled before it started
+        limits = SearchLimits(**limits)
+        search.stop_event = _SearchToken(active, search_id, hit, search if limits.ponder else None)
+        board = Notation.from_fen(fen).board
+        best, ponder = search.think(board, limits, history,
+                                    lambda info: results.put(("info", search_id, info)))
+        results.put(("bestmove", search_id, best, ponder))
+
+
+class BackgroundEngine:
+    """Search in a separate process, driven from the pygame loop."""
+
+    def __init__(self, hash_mb: int = 16):
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        # spawn: never fork a process that holds an SDL window
+        context = multiprocessing.get_context("spawn")
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._active = context.RawValue("q", 0)  # id of the wanted search, 0 = none
+        self._hit = context.RawValue("q", 0)  # id of the last ponder search that was hit
+        self._process = context.Process(target=_worker_main, daemon=True,
+                                        args=(self._requests, self._results, self._active, self._hit, hash_mb))
+        self._process.start()
+        self._next_id = 0
+        self.thinking = False
+        self.pondering = False  # the current search is a ponder search not hit yet
+        self.info = None  # latest progress of the current search (its best line)
+        self.lines: List[dict] = []  # latest info per multi-PV rank, best first
+
+    def start(self, fen: str, limits: SearchLimits, history: Iterable[int] = ()) -> int:
+        """Search a position (cancelling any running search); returns the search id."""
+        self._next_id += 1
+        self._active.value = self._next_id
+        fields = {name: getattr(limits, name) for name in SearchLimits.__slots__}
+        self._requests.put(("go", self._next_id, fen, fields, list(history)))
+        self.thinking = True
+        self.pondering = limits.ponder
+        self.info = None
+        self.lines = []
+        return self._next_id
+
+    def ponderhit(self) -> None:
+        """The expected move was played: the ponder search goes on as a normal search under its limits."""
+        if self.thinking and self.pondering:
+            self._hit.value = self._active.value
+            self.pondering = False
+
+    def cancel(self) -> None:
+        """Stop the current search; its results are discarded."""
+        self._active.value = 0
+        self.thinking = False
+        self.pondering = False
+        self.info = None
+        self.lines = []
+
+    def clear(self) -> None:
+        """Forget the transposition table (new game)."""
+        self._requests.put(("clear",))
+
+    def poll(self) -> List[tuple]:
+        """
+        Non-blocking: events of the current search since the last poll, as
+        ("info", info) and ("bestmove", best_move, ponder_move).
+        """
+        events = []
+        while True:
+            try:
+                message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if message[1] != self._active.value or not self.thinking:
+                continue  # a cancelled or superseded search
+            if message[0] == "info":
+                info = message[2]
+                rank = info["multipv"]
+                if rank == 1:
+                    self.info = info
+                # lower ranks keep the previous depth's line until this depth reaches them
+                if rank <= len(self.lines):
+                    self.lines[rank - 1] = info
+                else:
+                    self.lines.append(info)
+                events.append(("info", info))
+            else:
+                self.thinking = False
+                events.append(("bestmove", message[2], message[3]))
+        return events
+
+    def close(self) -> None:
+        self.cancel()
+        self._requests.put(None)
+        self._process.join(timeout=1.0)
+        if self._process.is_alive():
+            self._process.terminate()
@@ -0,0 +1,185 @@
+"""
+Batched evaluation with NumPy: score many positions in one go.
+
+Positions are packed into an (N, 64) uint8 array of piece codes (the Board
+layout, index 0 = a8, code = (color << 3) | type, 0 = empty) plus an (N,)
+array with the side to move. Packing joins byte strings in C (FEN
+placements, the Board.codes mirror, game.Position rows) and never loops over
+squares in Python, so packing plus evaluate_batch stays well ahead of
+calling evaluation.evaluate per position. evaluate_batch then scores all
+rows at once:
+
+  - material + piece-square tables: the same tables as evaluation.evaluate,
+    so with with_mobility=False the scores equal evaluation.material_score
+    (evaluate adds the pawn-structure term on top);
+  - mobility proxy: pseudo-legal target squares of knights, bishops, rooks
+    and queens, from one uint64 bitboard per piece set and position with
+    shift-and-fill ray attacks over the whole batch.
+
+Scores are centipawns for the side to move, as an int32 array.
+"""
+
+from itertools import chain
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from src.engine.evaluation import PIECE_SQUARE
+from src.game.board import Board
+from src.game.constants import BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, KNIGHT, BISHOP, ROOK, QUEEN
+from src.game.pieces import PieceKind
+
+SQUARES = BOARD_WIDTH * BOARD_HEIGHT
+
+# centipawns per reachable square, by piece type
+MOBILITY_WEIGHTS = {KNIGHT: 4, BISHOP: 5, ROOK: 2, QUEEN: 1}
+
+# (12,) piece codes in plane order: white pawn..king, black pawn..king
+PLANE_CODES = np.array([(color << 3) | piece_type for color in (WHITE, BLACK) for piece_type in range(1, 7)],
+                       dtype=np.uint8)
+
+# PST[code, square]: material + table bonus, signed for white (+) / black (-); 0 for empty
+PST = np.zeros((16, SQUARES), dtype=np.int32)
+for _code, _values in enumerate(PIECE_SQUARE):
+    if _values is not None:
+        PST[_code] = _values
+
+_FEN_BYTES = bytearray(256)  # FEN placement character -> piece code ('1' = empty)
+for _code in PLANE_CODES:
+    _FEN_BYTES[ord(PieceKind.from_code(int(_code)).symbol)] = int(_code)
+_FEN_BYTES = bytes(_FEN_BYTES)
+
+
+# bitboards: bit i = square i (a8 = bit 0); a step right is +1, a step down (towards rank 1) is +8
+def _file_mask(*cols):
+    bits = 0
+    for square in range(SQUARES):
+        if square % BOARD_WIDTH not in cols:
+            bits |= 1 << square
+    return np.uint64(bits)
+
+
+_FULL = np.uint64(2 ** 64 - 1)
+_NOT_A, _NOT_AB = _file_mask(0), _file_mask(0, 1)
+_NOT_H, _NOT_GH = _file_mask(7), _file_mask(6, 7)
+# (square delta, mask of landing squares that did not wrap around a board edge)
+_ORTHOGONAL = ((1, _NOT_A), (-1, _NOT_H), (8, _FULL), (-8, _FULL))
+_DIAGONAL = ((9, _NOT_A), (7, _NOT_H), (-7, _NOT_A), (-9, _NOT_H))
+_KNIGHT_JUMPS = tuple(
+    (dr * BOARD_WIDTH + dc, {1: _NOT_A, 2: _NOT_AB, -1: _NOT_H, -2: _NOT_GH}[dc])
+    for dr, dc in ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+)
+_POPCOUNT_BYTES = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _shift(bits, delta):
+    if delta > 0:
+        return bits << np.uint64(delta)
+    return bits >> np.uint64(-delta)
+
+
+def _slide(sources, empty, delta, mask):
+    """Squares attacked along one direction (Kogge-Stone occluded fill, first blocker included)."""
+    empty = empty & mask
+    sources = sources | (empty & _shift(sources, delta))
+    empty = empty & _shift(empty, delta)
+    sources = sources | (empty & _shift(sources, 2 * delta))
+    empty = empty & _shift(empty, 2 * delta)
+    sources = sources | (empty & _shift(sources, 4 * delta))
+    return _shift(sources, delta) & mask
+
+
+def _popcount(bits):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).astype(np.int32)
+    return _POPCOUNT_BYTES[bits.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int32)
+
+
+def to_bitboards(mask: np.ndarray) -> np.ndarray:
+    """(N, 64) bool -> (N,) uint64 with bit i set for square i."""
+    return np.packbits(mask, axis=1, bitorder="little").view("<u8").reshape(-1).astype(np.uint64)
+
+
+# -------------------------
+# Packing
+# -------------------------
+def pack_fens(fens: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """FEN strings -> ((N, 64) uint8 piece codes, (N,) uint8 side to move)."""
+    placements = []
+    turns = []
+    for fen in fens:
+        placement, side = fen.split(None, 2)[:2]
+        placements.append(placement)
+        turns.append(side == "b")
+    text = "".join(placements).replace("/", "")
+    for digit in "2345678":
+        text = text.replace(digit, "1" * int(digit))
+    data = text.encode("ascii").translate(_FEN_BYTES)
+    if len(data) != SQUARES * len(placements):
+        raise ValueError("Invalid FEN placement in batch")
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, SQUARES), np.array(turns, dtype=np.uint8)
+
+
+def pack_positions(positions: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    game.Position or Board objects -> ((N, 64) uint8 piece codes, (N,) uint8 side to move).
+    Boards contribute their codes mirror as is, Positions their rows as bytes.
+    """
+    chunks = []
+    turns = []
+    for item in positions:
+        chunks.append(item.codes if isinstance(item, Board) else bytes(chain.from_iterable(item.rows)))
+        turns.append(item.turn)
+    codes = np.frombuffer(b"".join(chunks), dtype=np.uint8).reshape(-1, SQUARES)
+    return codes, np.array(turns, dtype=np.uint8)
+
+
+def to_planes(codes: np.ndarray) -> np.ndarray:
+    """(N, 64) piece codes -> (N, 12, 64) uint8 one-hot planes in PLANE_CODES order."""
+    return (codes[:, None, :] == PLANE_CODES[None, :, None]).astype(np.uint8)
+
+
+# -------------------------
+# Evaluation
+# -------------------------
+def material_pst(codes: np.ndarray) -> np.ndarray:
+    """(N,) material + piece-square score from white's point of view."""
+    return PST[codes, np.arange(SQUARES)].sum(axis=1, dtype=np.int32)
+
+
+def mobility(codes: np.ndarray) -> np.ndarray:
+    """
+    (N,) weighted pseudo-legal mobility of knights and sliders, white minus black.
+    Rays of different pieces of one kind never overlap within one direction (the
+    rear piece is blocked by the front one), so per-direction popcounts of the
+    combined attacks add up to the per-piece counts.
+    """
+    white = to_bitboards((codes != 0) & (codes >> 3 == WHITE))
+    black = to_bitboards(codes >> 3 == BLACK)
+    empty = ~(white | black)
+    score = np.zeros(codes.shape[0], dtype=np.int32)
+    for side, own, sign in ((WHITE, white, 1), (BLACK, black, -1)):
+        for mover, weight in MOBILITY_WEIGHTS.items():
+            pieces = to_bitboards(codes == ((side << 3) | mover))
+            if not pieces.any():
+                continue
+            if mover == KNIGHT:
+                directions, jump = _KNIGHT_JUMPS, True
+            else:
+                directions = ((_ORTHOGONAL if mover in (ROOK, QUEEN) else ())
+                              + (_DIAGONAL if mover in (BISHOP, QUEEN) else ()))
+                jump = False
+            count = np.zeros_like(score)
+            for delta, mask in directions:
+                targets = _shift(pieces, delta) & mask if jump else _slide(pieces, empty, delta, mask)
+                count += _popcount(targets & ~own)
+            score += sign * weight * count
+    return score
+
+
+def evaluate_batch(codes: np.ndarray, turns: np.ndarray, with_mobility: bool = True) -> np.ndarray:
+    """(N,) int32 scores in centipawns for the side to move of each position."""
+    score = material_pst(codes)
+    if with_mobility:
+        score += mobility(codes)
+    return np.where(turns.astype(bool), -score, score).astype(np.int32)
@@ -0,0 +1,139 @@
+"""
+Static evaluation: material plus piece-square tables plus pawn structure,
+in centipawns.
+
+Tables are laid out like Board.squares (index 0 = a8) from white's point of
+view; black pieces read them mirrored (square ^ 56). The pawn-structure term
+comes from pawn_hash.PawnTable, so it is only computed for pawn layouts the
+table has not seen yet.
+
+ThreatEvaluator adds square control and hanging pieces read from an
+attacks.AttackMap; while it is attached, check detection in Rules answers
+from the same map.
+"""
+
+from src.engine.pawn_hash import PawnTable
+from src.game.attacks import AttackMap
+from src.game.constants import WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+PIECE_VALUES = (0, 100, 320, 330, 500, 900, 0)  # indexed by piece type code
+
+_PAWN_TABLE = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+)
+_KNIGHT_TABLE = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+_BISHOP_TABLE = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+_ROOK_TABLE = (
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0,
+)
+_QUEEN_TABLE = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+)
+_KING_TABLE = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+)
+
+_TABLES = {
+    PAWN: _PAWN_TABLE, KNIGHT: _KNIGHT_TABLE, BISHOP: _BISHOP_TABLE,
+    ROOK: _ROOK_TABLE, QUEEN: _QUEEN_TABLE, KING: _KING_TABLE,
+}
+
+# PIECE_SQUARE[code][square]: material + table bonus, signed for white (+) / black (-)
+PIECE_SQUARE = [None] * 16
+for _type, _table in _TABLES.items():
+    PIECE_SQUARE[(WHITE << 3) | _type] = tuple(PIECE_VALUES[_type] + bonus for bonus in _table)
+    PIECE_SQUARE[((WHITE ^ 1) << 3) | _type] = tuple(
+        -(PIECE_VALUES[_type] + _table[square ^ 56]) for square in range(64)
+    )
+PIECE_SQUARE = tuple(PIECE_SQUARE)
+
+PAWN_TABLE = PawnTable()  # shared by every evaluate() call of the process
+
+
+def material_score(board) -> int:
+    """Material + piece-square score from white's point of view."""
+    score = 0
+    for square, piece in enumerate(board.squares):
+        if piece is not None:
+            score += PIECE_SQUARE[piece.kind.code][square]
+    return score
+
+
+def evaluate(board) -> int:
+    """Score of the position in centipawns for the side to move."""
+    score = material_score(board) + PAWN_TABLE.probe(board)[1]
+    return score if board.turn == WHITE else -score
+
+
+CONTROL_WEIGHT = 2  # per square attacked more often than the opponent does
+HANGING_PENALTY = 30  # per piece the opponent can win (see AttackMap.hanging)
+
+
+class ThreatEvaluator:
+    """
+    evaluate() plus square control and hanging pieces from an AttackMap; call it
+    like evaluate (e.g. Search(evaluator=ThreatEvaluator())). It uses the map
+    already following the board, or attaches its own to the board it is first
+    called with (and moves it over when called with another board).
+    """
+
+    __slots__ = ("attack_map",)
+
+    def __init__(self):
+        self.attack_map = AttackMap()
+
+    def __call__(self, board) -> int:
+        attack_map = board.attack_map
+        if attack_map is None:
+            attack_map = self.attack_map
+            attack_map.attach(board)
+        score = (material_score(board) + PAWN_TABLE.probe(board)[1]
+                 + CONTROL_WEIGHT * (attack_map.control(WHITE) - attack_map.control(BLACK))
+                 + HANGING_PENALTY * (len(attack_map.hanging(BLACK)) - len(attack_map.hanging(WHITE))))
+        return score if board.turn == WHITE else -score
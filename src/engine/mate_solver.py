@@ -0,0 +1,347 @@
+"""
+Proof-number search for forced mates.
+
+The side to move at the root is the attacker. Attacker nodes (OR) are
+proven when any move mates by force, defender nodes (AND) when every reply
+still loses. Each node keeps a proof number (how many leaves at least must
+still be proven to prove it) and a disproof number; the search always
+expands the most-proving leaf, walking down from the root on one Board with
+make_move/unmake_move, and only climbs back up as far as the numbers change.
+
+Children of an attacker move are evaluated right away: mate proves them,
+moves that give check start cheaper to prove than quiet ones. Stalemate,
+repetition along the line and running out of the mate-in-N ply budget
+disprove a node.
+
+The tree lives in memory with a node budget. Solved subtrees are trimmed at
+once (a disproven node keeps no children, a proven attacker node only its
+mating move), and when the tree still outgrows max_nodes the least
+promising unsolved subtrees are collapsed back into leaves (their numbers
+kept as estimates) until it is down to half the budget.
+
+    python -m src.engine.mate_solver "<fen>" --mate 3
+    python -m src.engine.mate_solver puzzles.epd      # uses each record's "dm" (direct mate) operand
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from src.game.rules import Rules
+
+Move = Tuple[int, int, int]  # (start_sq, end_sq, promotion_code)
+
+INFINITE = 1 << 30
+
+STATUS_MATE = "mate"
+STATUS_NO_MATE = "no_mate"  # disproven within the ply budget (or at all without one)
+STATUS_UNKNOWN = "unknown"  # the expansion limit ran out first
+
+_CHECK_PN = 1  # initial proof number of a defender node in check
+_QUIET_PN = 3  # ... and of one not in check
+
+
+class _Node:
+    __slots__ = ("parent", "move", "children", "pn", "dn", "ply")
+
+    def __init__(self, parent, move, ply, pn=1, dn=1):
+        self.parent: Optional[_Node] = parent
+        self.move: Optional[Move] = move
+        self.children: Optional[List[_Node]] = None  # None: leaf (not expanded, collapsed or solved)
+        self.pn = pn
+        self.dn = dn
+        self.ply = ply  # even: attacker to move (OR node), odd: defender to move (AND node)
+
+
+class MateResult:
+    """Outcome of MateSolver.solve."""
+
+    __slots__ = ("status", "moves", "san", "expanded", "peak_nodes", "seconds")
+
+    def __init__(self, status, moves, san, expanded, peak_nodes, seconds):
+        self.status: str = status
+        self.moves: List[Move] = moves  # mating line, defender replies included
+        self.san: List[str] = san
+        self.expanded = expanded
+        self.peak_nodes = peak_nodes
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"MateResult({self.status}, {' '.join(self.san)})"
+
+    @property
+    def mate_in(self) -> Optional[int]:
+        return (len(self.moves) + 1) // 2 if self.status == STATUS_MATE else None
+
+
+class MateSolver:
+    """Proof-number search over a copy of a position; reusable for many positions."""
+
+    def __init__(self, max_nodes: int = 500_000):
+        self.max_nodes = max_nodes  # node budget of the tree in memory
+        self.collections = 0  # garbage collections of the last solve
+        self._board = None
+        self._path_hashes = {}
+        self._live = 0
+        self._max_plies = INFINITE
+
+    # -------------------------
+    # Driver
+    # -------------------------
+    def solve(self, game_state, mate_in: Optional[int] = None, max_expansions: int = 1_000_000) -> MateResult:
+        """
+        Look for a forced mate by the side to move of game_state (which is not
+        modified). mate_in limits the search to mates in that many moves.
+        The mating line found is a forced one, not necessarily the shortest.
+        """
+        from src.game.notation import Notation  # deferred: notation imports the game modules
+
+        started = time.perf_counter()
+        board = self._board = Notation.from_fen(Notation.to_fen(game_state)).board
+        self._max_plies = 2 * mate_in - 1 if mate_in else INFINITE
+        self._path_hashes = {board.hash: 1}
+        self.collections = 0
+        root = _Node(None, None, 0)
+        self._live = peak = 1
+
+        node = root
+        undos = []
+        expanded = 0
+        while root.pn and root.dn and expanded < max_expansions:
+            # down to the most-proving leaf
+            while node.children is not None:
+                node = self._most_proving(node)
+                undos.append(board.make_move(*node.move))
+                self._enter(board.hash)
+            self._expand(node)
+            expanded += 1
+            # back up while the numbers change
+            while True:
+                changed = self._update(node)
+                if node is root or (not changed and node.children is not None):
+                    break
+                self._leave(board.hash)
+                board.unmake_move(undos.pop())
+                node = node.parent
+            peak = max(peak, self._live)
+            if self._live > self.max_nodes:
+                while undos:  # the current node may be collapsed: restart from the root
+                    self._leave(board.hash)
+                    board.unmake_move(undos.pop())
+                node = root
+                self._collect(root)
+
+        while undos:
+            board.unmake_move(undos.pop())
+        if not root.pn:
+            status = STATUS_MATE
+            moves = self._mating_line(root)
+        else:
+            status = STATUS_NO_MATE if not root.dn else STATUS_UNKNOWN
+            moves = []
+        san = []
+        for move in moves:
+            san.append(Notation.move_to_san(board, move))
+            board.make_move(*move)
+        self._board = None
+        return MateResult(status, moves, san, expanded, peak, time.perf_counter() - started)
+
+    # -------------------------
+    # Tree
+    # -------------------------
+    @staticmethod
+    def _most_proving(node: _Node) -> _Node:
+        if node.ply & 1:  # AND: the child that is easiest to refute
+            return min(node.children, key=lambda child: child.dn)
+        return min(node.children, key=lambda child: child.pn)
+
+    def _enter(self, position_hash: int) -> None:
+        self._path_hashes[position_hash] = self._path_hashes.get(position_hash, 0) + 1
+
+    def _leave(self, position_hash: int) -> None:
+        count = self._path_hashes[position_hash] - 1
+        if count:
+            self._path_hashes[position_hash] = count
+        else:
+            del self._path_hashes[position_hash]
+
+    def _expand(self, node: _Node) -> None:
+        """Create the children of a leaf (the board shows node's position)."""
+        board = self._board
+        moves = Rules.get_legal_moves(board)
+        child_ply = node.ply + 1
+        children = []
+        if not moves:
+            # mate of the defender is found when its parent is expanded: this is stalemate or the attacker mated
+            node.pn, node.dn = INFINITE, 0
+            node.children = None
+            return
+        if node.ply & 1:
+            # defender replies: judged when expanded themselves
+            out_of_plies = child_ply + 1 > self._max_plies
+            for move in moves:
+                child = _Node(node, move, child_ply)
+                if out_of_plies:
+                    child.pn, child.dn = INFINITE, 0
+                else:
+                    undo = board.make_move(*move)
+                    if board.hash in self._path_hashes:
+                        child.pn, child.dn = INFINITE, 0  # repetition: no progress towards mate
+                    board.unmake_move(undo)
+                children.append(child)
+        else:
+            defender = board.turn ^ 1
+            for move in moves:
+                child = _Node(node, move, child_ply)
+                undo = board.make_move(*move)
+                in_check = Rules.is_in_check(board, defender)
+                if not Rules.has_legal_move(board, defender):
+                    if in_check:
+                        child.pn, child.dn = 0, INFINITE
+                    else:
+                        child.pn, child.dn = INFINITE, 0
+                elif child_ply >= self._max_plies or board.hash in self._path_hashes:
+                    child.pn, child.dn = INFINITE, 0
+                else:
+                    child.pn = _CHECK_PN if in_check else _QUIET_PN
+                board.unmake_move(undo)
+                children.append(child)
+        node.children = children
+        self._live += len(children)
+
+    def _update(self, node: _Node) -> bool:
+        """Recompute node's numbers from its children; True if they changed."""
+        children = node.children
+        if children is None:
+            return True  # a leaf solved on expansion
+        if node.ply & 1:
+            pn = min(INFINITE, sum(child.pn for child in children))
+            dn = min(child.dn for child in children)
+        else:
+            pn = min(child.pn for child in children)
+            dn = min(INFINITE, sum(child.dn for child in children))
+        changed = pn != node.pn or dn != node.dn
+        node.pn, node.dn = pn, dn
+        if not dn:
+            self._trim(node, None)
+        elif not pn and not node.ply & 1:
+            self._trim(node, next(child for child in children if not child.pn))
+        return changed
+
+    def _trim(self, node: _Node, keep: Optional[_Node]) -> None:
+        """Drop node's children except keep (None: all of them)."""
+        for child in node.children:
+            if child is not keep:
+                self._live -= self._size(child)
+        node.children = [keep] if keep is not None else None
+
+    @staticmethod
+    def _size(node: _Node) -> int:
+        size = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            size += 1
+            if node.children:
+                stack.extend(node.children)
+        return size
+
+    def _collect(self, root: _Node) -> None:
+        """
+        Collapse the least promising unsolved subtrees until half the node budget
+        is free (or nothing off the most-proving path is left to collapse).
+        """
+        self.collections += 1
+        # the most-proving path is where the next expansions go: never collapse it
+        protected = set()
+        node = root
+        while node.children is not None:
+            protected.add(id(node))
+            node = self._most_proving(node)
+        candidates = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.children is None:
+                continue
+            stack.extend(node.children)
+            if id(node) not in protected and node.pn and node.dn:
+                parent_or = not node.parent.ply & 1
+                # what the parent minimises over: a high value means the search will not come here soon
+                candidates.append((node.pn if parent_or else node.dn, -node.ply, node))
+        candidates.sort(key=lambda candidate: (candidate[0], candidate[1]), reverse=True)
+        target = self.max_nodes // 2
+        for _, _, node in candidates:
+            if self._live <= target:
+                break
+            if node.children is None or not self._attached(node, root):
+                continue  # already collapsed with an ancestor
+            self._live -= self._size(node) - 1
+            node.children = None
+
+    @staticmethod
+    def _attached(node: _Node, root: _Node) -> bool:
+        while node is not root:
+            parent = node.parent
+            if parent.children is None:
+                return False
+            node = parent
+        return True
+
+    def _mating_line(self, root: _Node) -> List[Move]:
+        """Proven tree -> main line: the mate found for the attacker, the longest resistance for the defender."""
+        lengths = {}
+
+        def length(node):
+            if node.children is None:
+                return 0
+            if id(node) not in lengths:
+                values = [length(child) for child in node.children if not child.pn]
+                lengths[id(node)] = 1 + (max(values) if node.ply & 1 else min(values))
+            return lengths[id(node)]
+
+        line = []
+        node = root
+        while node.children is not None:
+            proven = [child for child in node.children if not child.pn]
+            pick = max if node.ply & 1 else min
+            node = pick(proven, key=length)
+            line.append(node.move)
+        return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find forced mates with proof-number search")
+    parser.add_argument("source", help="a FEN, or an EPD file (one puzzle per line, dm = mate in N)")
+    parser.add_argument("--mate", type=int, default=None, help="only look for mates in this many moves")
+    parser.add_argument("--max-nodes", type=int, default=500_000, help="node budget of the tree in memory")
+    parser.add_argument("--max-expansions", type=int, default=1_000_000, help="give up after this many expansions")
+    args = parser.parse_args()
+
+    from src.game.notation import Notation
+
+    if args.source.endswith(".epd"):
+        from src.tools.epd import load_epd  # deferred: tools build on the engine
+        puzzles = [(record["id"] or str(index), record["fen"], int(record["ops"]["dm"][0]) if "dm" in record["ops"] else args.mate)
+                   for index, record in enumerate(load_epd(args.source), 1)]
+    else:
+        puzzles = [("fen", args.source, args.mate)]
+
+    solver = MateSolver(args.max_nodes)
+    solved = 0
+    started = time.perf_counter()
+    for name, fen, mate_in in puzzles:
+        result = solver.solve(Notation.from_fen(fen), mate_in, args.max_expansions)
+        if result.status == STATUS_MATE:
+            solved += 1
+        line = " ".join(result.san) if result.san else "-"
+        print(f"[mate_solver] {name}: {result.status} {line} "
+              f"({result.expanded} expansions, peak {result.peak_nodes} nodes, {result.seconds * 1000:.0f}ms)")
+    elapsed = time.perf_counter() - started
+    print(f"[mate_solver] {solved}/{len(puzzles)} mates in {elapsed:.2f}s ({len(puzzles) / elapsed:.1f} puzzles/s)")
+    return 0 if solved == len(puzzles) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+NNUE-style evaluation: a small quantised network whose first layer is kept
+up to date incrementally while the search makes and unmakes moves.
+
+Inputs are 768 piece-square features per perspective: feature
+``plane * 64 + square`` with plane = (piece color relative to the
+perspective) * 6 + piece type - 1; the black perspective mirrors the board
+(square ^ 56) so both sides see "their" pieces at the bottom. The first
+layer sums one weight row per piece into an accumulator per perspective:
+
+    acc[p]  = b1 + sum(W1[feature(p, piece, square)])           (hidden,)
+    x       = clamp(acc[side to move] ++ acc[other side], 0, 127)
+    h       = clamp((x @ W2 + b2) >> shift, 0, 127)             (l2,)
+    score   = (h @ W3 + b3) * scale >> 10                       centipawns
+
+A move changes two to four features, so NNUEEvaluator (attached to the
+Board as an observer, see Board.attach) records them per move and adds /
+subtracts those rows of W1 instead of summing all pieces again; taking a
+move back just drops its entry. Rows are only added when a position is
+actually evaluated, so the many make/unmake pairs of legality checks cost
+no NumPy work at all.
+
+Weights file (little endian):
+
+    offset  type              field
+    0       4 bytes           magic b"NNU1"
+    4       uint32            version (1)
+    8       uint32            hidden size H
+    12      uint32            second layer size L
+    16      uint32            shift applied after the second layer
+    20      int32             output scale (centipawns = output * scale >> 10)
+    24      int16[768 * H]    W1, row per input feature
+            int16[H]          b1
+            int8[2H * L]      W2, row per input (side to move first)
+            int32[L]          b2
+            int8[L]           W3
+            int32             b3
+
+    python -m src.engine.nnue init net.nnue --hidden 128
+    python -m src.engine.nnue bench --weights net.nnue
+"""
+
+import argparse
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from src.game.constants import WHITE, BLACK
+
+FEATURES = 768
+CLAMP = 127
+_HEADER = struct.Struct("<4sIIIIi")
+_MAGIC = b"NNU1"
+_VERSION = 1
+
+# FEATURE_INDEX[perspective][code][square]
+FEATURE_INDEX = tuple(
+    tuple(
+        tuple(((((code >> 3) ^ perspective) * 6 + (code & 7) - 1) * 64 + (square ^ (56 * perspective)))
+              for square in range(64)) if code & 7 else None
+        for code in range(16)
+    )
+    for perspective in (WHITE, BLACK)
+)
+
+
+class Network:
+    """Quantised weights plus the dense part of the forward pass."""
+
+    def __init__(self, w1, b1, w2, b2, w3, b3, shift=6, scale=1024):
+        self.hidden = w1.shape[1]
+        self.l2 = w2.shape[1]
+        # int32 copies: the file keeps the compact types, the arithmetic must not overflow
+        self.w1 = np.asarray(w1, dtype=np.int32)
+        self.b1 = np.asarray(b1, dtype=np.int32)
+        self.w2 = np.asarray(w2, dtype=np.int32)
+        self.b2 = np.asarray(b2, dtype=np.int32)
+        # NumPy has no fast integer matmul; floats hold the layer sums exactly while
+        # they stay below 2**24 (float32) or 2**53 (float64)
+        exact32 = 2 * self.hidden * CLAMP * 128 < 1 << 24
+        self._w2_float = self.w2.astype(np.float32 if exact32 else np.float64)
+        self.w3 = np.asarray(w3, dtype=np.int32)
+        self.b3 = int(b3)
+        self.shift = shift
+        self.scale = scale
+
+    # -------------------------
+    # Files
+    # -------------------------
+    @staticmethod
+    def load(path: str) -> "Network":
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, hidden, l2, shift, scale = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path}: not an NNUE weights file (version {_VERSION})")
+        offset = _HEADER.size
+        arrays = []
+        for dtype, count in (("<i2", FEATURES * hidden), ("<i2", hidden), ("i1", 2 * hidden * l2),
+                             ("<i4", l2), ("i1", l2), ("<i4", 1)):
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            arrays.append(array)
+        if offset != len(data):
+            raise ValueError(f"{path}: size does not match the header")
+        w1, b1, w2, b2, w3, b3 = arrays
+        return Network(w1.reshape(FEATURES, hidden), b1, w2.reshape(2 * hidden, l2), b2, w3, b3[0], shift, scale)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.hidden, self.l2, self.shift, self.scale))
+            for array, dtype in ((self.w1, "<i2"), (self.b1, "<i2"), (self.w2, "i1"),
+                                 (self.b2, "<i4"), (self.w3, "i1"), (np.array([self.b3]), "<i4")):
+                f.write(array.astype(dtype).tobytes())
+
+    @staticmethod
+    def random(hidden: int = 128, l2: int = 32, seed: int = 0) -> "Network":
+        """Untrained weights in the quantisation ranges (for tests, benchmarks and training starts)."""
+        rng = np.random.default_rng(seed)
+        return Network(
+            rng.integers(-32, 33, (FEATURES, hidden)), rng.integers(0, 64, hidden),
+            rng.integers(-64, 65, (2 * hidden, l2)), rng.integers(-512, 513, l2),
+            rng.integers(-64, 65, l2), 0, scale=64,
+        )
+
+    # -------------------------
+    # Forward pass
+    # -------------------------
+    def accumulate(self, board) -> np.ndarray:
+        """(2, hidden) first-layer accumulators from scratch (white, black perspective)."""
+        indices = ([], [])
+        for square, piece in enumerate(board.squares):
+            if piece is not None:
+                code = piece.kind.code
+                indices[WHITE].append(FEATURE_INDEX[WHITE][code][square])
+                indices[BLACK].append(FEATURE_INDEX[BLACK][code][square])
+        return self.b1 + np.stack([self.w1[indices[WHITE]].sum(axis=0), self.w1[indices[BLACK]].sum(axis=0)])
+
+    def output(self, accumulators: np.ndarray, turn: int) -> int:
+        """Score in centipawns for the side to move, from the two accumulators."""
+        x = accumulators[(turn, turn ^ 1), ].reshape(-1).clip(0, CLAMP).astype(self._w2_float.dtype)
+        h = ((x @ self._w2_float).astype(np.int32) + self.b2 >> self.shift).clip(0, CLAMP)
+        return (int(h.dot(self.w3)) + self.b3) * self.scale >> 10
+
+    def evaluate_full(self, board) -> int:
+        """Full forward pass without any incremental state."""
+        return self.output(self.accumulate(board), board.turn)
+
+
+class NNUEEvaluator:
+    """
+    Board observer holding the accumulator stack; call it like evaluation.evaluate.
+    It attaches itself to the board it is first called with (and moves over when
+    called with another board).
+    """
+
+    def __init__(self, network: Network):
+        self.network = network
+        self.board = None
+        self.refreshes = 0  # full recomputations, for diagnostics
+        self.updates = 0  # incremental updates
+        # per applied move: [added (code, square) pairs, removed pairs, accumulators or None]
+        self._stack = []
+
+    def __call__(self, board) -> int:
+        if board is not self.board:
+            if self.board is not None:
+                self.board.detach(self)
+            self.board = board
+            board.attach(self)
+        return self.network.output(self._accumulators(), board.turn)
+
+    # -------------------------
+    # Board observer
+    # -------------------------
+    def reset(self, board) -> None:
+        self._stack = [[(), (), None]]  # recomputed from the board on the next call
+
+    def moved(self, undo) -> None:
+        (start_sq, end_sq, piece, kind, _, captured, capture_sq, rook, rook_from, rook_to) = undo[:10]
+        added = [(piece.kind.code, end_sq)]
+        removed = [(kind.code, start_sq)]
+        if captured is not None:
+            removed.append((captured.kind.code, capture_sq))
+        if rook is not None:
+            added.append((rook.kind.code, rook_to))
+            removed.append((rook.kind.code, rook_from))
+        self._stack.append([added, removed, None])
+
+    def reverted(self, undo) -> None:
+        if len(self._stack) > 1:
+            self._stack.pop()
+        else:  # a move made before we attached
+            self._stack[0][2] = None
+
+    # -------------------------
+    # Lazy updates
+    # -------------------------
+    def _accumulators(self) -> np.ndarray:
+        stack = self._stack
+        index = len(stack) - 1
+        while index and stack[index][2] is None:
+            index -= 1
+        if stack[index][2] is None:
+            # nothing known below: refresh from the board as it is now
+            self.refreshes += 1
+            stack[-1][2] = self.network.accumulate(self.board)
+            return stack[-1][2]
+        w1 = self.network.w1
+        accumulators = stack[index][2]
+        white, black = FEATURE_INDEX
+        for entry in stack[index + 1:]:
+            accumulators = accumulators.copy()
+            from_white, from_black = accumulators  # row views
+            for code, square in entry[0]:
+                from_white += w1[white[code][square]]
+                from_black += w1[black[code][square]]
+            for code, square in entry[1]:
+                from_white -= w1[white[code][square]]
+                from_black -= w1[black[code][square]]
+            entry[2] = accumulators
+            self.updates += 1
+        return accumulators
+
+
+# -------------------------
+# Command line
+# -------------------------
+def _bench(network: Network, games: int, plies: int, seed: int) -> None:
+    """Evaluate every node of random make/unmake walks incrementally and with full passes."""
+    from src.game.board import Board
+    from src.game.rules import Rules
+
+    rng = random.Random(seed)
+    walks = []
+    for _ in range(games):
+        board = Board()
+        moves = []
+        for _ in range(plies):
+            legal = Rules.get_legal_moves(board)
+            if not legal:
+                break
+            move = rng.choice(legal)
+            moves.append(move)
+            board.make_move(*move)
+        walks.append(moves)
+
+    def run(evaluate):
+        board = Board()
+        scores = []
+        started = time.perf_counter()
+        for moves in walks:
+            undos = []
+            for move in moves:  # down the line, evaluating each node, then back up
+                undos.append(board.make_move(*move))
+                scores.append(evaluate(board))
+            for undo in reversed(undos):
+                board.unmake_move(undo)
+                scores.append(evaluate(board))
+        return scores, time.perf_counter() - started
+
+    evaluator = NNUEEvaluator(network)
+    incremental, incremental_time = run(evaluator)
+    full, full_time = run(network.evaluate_full)
+    nodes = len(full)
+    if incremental != full:
+        print("[nnue] MISMATCH between incremental and full evaluation")
+    print(f"[nnue] hidden {network.hidden}, l2 {network.l2}: {nodes} nodes")
+    print(f"[nnue] incremental: {incremental_time / nodes * 1e6:.1f} us/node "
+          f"({evaluator.updates} updates, {evaluator.refreshes} refreshes)")
+    print(f"[nnue] full pass:   {full_time / nodes * 1e6:.1f} us/node "
+          f"({full_time / incremental_time:.1f}x slower)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NNUE weights and benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    init = sub.add_parser("init", help="write untrained (random) weights")
+    init.add_argument("path")
+    init.add_argument("--hidden", type=int, default=128)
+    init.add_argument("--l2", type=int, default=32)
+    init.add_argument("--seed", type=int, default=0)
+
+    bench = sub.add_parser("bench", help="incremental vs full evaluation cost per node")
+    bench.add_argument("--weights", help="weights file (default: random weights)")
+    bench.add_argument("--hidden", type=int, default=128, help="hidden size of the random weights")
+    bench.add_argument("--games", type=int, default=20)
+    bench.add_argument("--plies", type=int, default=60)
+    bench.add_argument("--seed", type=int, default=1)
+
+    args = parser.parse_args()
+    if args.command == "init":
+        Network.random(args.hidden, args.l2, args.seed).save(args.path)
+        print(f"[nnue] wrote {args.path}")
+    else:
+        network = Network.load(args.weights) if args.weights else Network.random(args.hidden)
+        _bench(network, args.games, args.plies, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
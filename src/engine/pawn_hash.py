@@ -0,0 +1,193 @@
+"""
+Pawn-structure evaluation with a pawn hash table.
+
+Doubled, isolated, backward and passed pawns depend on the pawns alone,
+which change on few moves of a search. Board.pawn_hash (a Zobrist key over
+the pawns, updated incrementally by make/unmake) indexes a fixed-size table
+of analysed structures, so most evaluations skip the pawn analysis and read
+the score and the passed-pawn masks from the table.
+
+Masks are bitboards like batch_eval's: bit i = square i (a8 = bit 0).
+
+    python -m src.engine.pawn_hash --depth 4      # hit rate and cost in a search
+"""
+
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from src.game.constants import BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, PAWN
+
+SQUARES = BOARD_WIDTH * BOARD_HEIGHT
+
+DOUBLED_PENALTY = 12  # per pawn beyond the first on a file
+ISOLATED_PENALTY = 12
+BACKWARD_PENALTY = 8
+# PASSED_BONUS[ranks advanced from the pawn's own back rank]
+PASSED_BONUS = (0, 5, 10, 20, 35, 60, 100, 0)
+
+# (key, score for white, white passed-pawn mask, black passed-pawn mask)
+PawnEntry = Tuple[int, int, int, int]
+
+
+def _mask(squares) -> int:
+    bits = 0
+    for square in squares:
+        bits |= 1 << square
+    return bits
+
+
+def _span(square: int, color: int, same_file: bool, adjacent: bool, ahead: bool) -> int:
+    """Squares on the chosen files ahead of square (ahead) or on its rank and behind it, seen from color."""
+    row, col = divmod(square, BOARD_WIDTH)
+    cols = ([col] if same_file else []) + ([c for c in (col - 1, col + 1) if 0 <= c < BOARD_WIDTH] if adjacent else [])
+    if ahead:
+        rows = range(0, row) if color == WHITE else range(row + 1, BOARD_HEIGHT)
+    else:
+        rows = range(row, BOARD_HEIGHT) if color == WHITE else range(0, row + 1)
+    return _mask(r * BOARD_WIDTH + c for r in rows for c in cols)
+
+
+FILE_MASKS = tuple(_mask(range(col, SQUARES, BOARD_WIDTH)) for col in range(BOARD_WIDTH))
+ADJACENT_FILES = tuple(
+    (FILE_MASKS[col - 1] if col > 0 else 0) | (FILE_MASKS[col + 1] if col < BOARD_WIDTH - 1 else 0)
+    for col in range(BOARD_WIDTH)
+)
+# [color][square]: enemy pawns in this span stop a pawn from being passed
+PASSED_SPAN = tuple(tuple(_span(sq, color, True, True, True) for sq in range(SQUARES)) for color in (WHITE, BLACK))
+# [color][square]: own pawns in this span can still come up to support the pawn
+SUPPORT_SPAN = tuple(tuple(_span(sq, color, False, True, False) for sq in range(SQUARES)) for color in (WHITE, BLACK))
+# [color][square]: squares a pawn of that color on square attacks
+PAWN_ATTACKS = tuple(
+    tuple(_mask(
+        (sq // BOARD_WIDTH + (-1 if color == WHITE else 1)) * BOARD_WIDTH + c
+        for c in (sq % BOARD_WIDTH - 1, sq % BOARD_WIDTH + 1)
+        if 0 <= c < BOARD_WIDTH and 0 <= sq // BOARD_WIDTH + (-1 if color == WHITE else 1) < BOARD_HEIGHT
+    ) for sq in range(SQUARES))
+    for color in (WHITE, BLACK)
+)
+
+
+def analyze(board) -> Tuple[int, int, int]:
+    """(score for white, white passed mask, black passed mask) of the board's pawns, from scratch."""
+    pawns = [[], []]
+    bits = [0, 0]
+    for square, piece in enumerate(board.squares):
+        if piece is not None and piece.kind.type_code == PAWN:
+            color = piece.kind.color_code
+            pawns[color].append(square)
+            bits[color] |= 1 << square
+
+    score = 0
+    passed = [0, 0]
+    for color in (WHITE, BLACK):
+        own, enemy = bits[color], bits[color ^ 1]
+        forward = -BOARD_WIDTH if color == WHITE else BOARD_WIDTH
+        side = 0
+        files_seen = 0
+        for square in pawns[color]:
+            col = square % BOARD_WIDTH
+            if files_seen >> col & 1:
+                side -= DOUBLED_PENALTY
+            files_seen |= 1 << col
+            if not own & ADJACENT_FILES[col]:
+                side -= ISOLATED_PENALTY
+            elif not own & SUPPORT_SPAN[color][square]:
+                stop = square + forward
+                if 0 <= stop < SQUARES and enemy & PAWN_ATTACKS[color][stop]:
+                    side -= BACKWARD_PENALTY
+            if not enemy & PASSED_SPAN[color][square]:
+                passed[color] |= 1 << square
+                row = square // BOARD_WIDTH
+                side += PASSED_BONUS[BOARD_HEIGHT - 1 - row if color == WHITE else row]
+        score += side if color == WHITE else -side
+    return score, passed[WHITE], passed[BLACK]
+
+
+class PawnTable:
+    """Fixed-size, always-replace cache of analyze() results keyed by Board.pawn_hash."""
+
+    __slots__ = ("_entries", "_mask", "probes", "hits")
+
+    def __init__(self, entries: int = 1 << 14):
+        size = 1 << max(0, int(entries).bit_length() - 1)  # rounded down to a power of two
+        self._entries: List[Optional[PawnEntry]] = [None] * size
+        self._mask = size - 1
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def probe(self, board) -> PawnEntry:
+        """The board's pawn entry, analysed and stored on a miss."""
+        key = board.pawn_hash
+        index = key & self._mask
+        entry = self._entries[index]
+        self.probes += 1
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = (key,) + analyze(board)
+        self._entries[index] = entry
+        return entry
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self) -> None:
+        self._entries = [None] * len(self._entries)
+        self.probes = self.hits = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pawn hash table hit rate and savings in a search")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fen", action="append", help="position(s) to search (default: a few middlegames)")
+    args = parser.parse_args()
+
+    from src.engine import evaluation
+    from src.engine.search import Search, SearchLimits
+    from src.game.notation import Notation
+
+    fens = args.fen or [
+        "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    ]
+    table = evaluation.PAWN_TABLE
+    table.clear()
+    started = time.perf_counter()
+    nodes = 0
+    boards = []
+    for fen in fens:
+        board = Notation.from_fen(fen).board
+        search = Search(16)
+        search.think(board, SearchLimits(depth=args.depth))
+        nodes += search.nodes
+        boards.append(board)
+    elapsed = time.perf_counter() - started
+    probes, hit_rate = table.probes, table.hit_rate
+
+    repeat = 2000
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            analyze(board)
+    analyze_us = (time.perf_counter() - started) / (repeat * len(boards)) * 1e6
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            table.probe(board)
+    probe_us = (time.perf_counter() - started) / (repeat * len(boards)) * 1e6
+
+    print(f"[pawn_hash] {nodes} nodes in {elapsed:.2f}s: {probes} probes, {hit_rate:.1%} hits "
+          f"({len(table)} entries)")
+    print(f"[pawn_hash] analysis {analyze_us:.1f} us, table hit {probe_us:.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
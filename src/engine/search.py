@@ -0,0 +1,460 @@
+"""
+Alpha-beta search with iterative deepening.
+
+Negamax with principal variation search, a fixed-size transposition table
+keyed by the board's Zobrist hash, quiescence search on captures, check
+extensions and killer/history move ordering. The search works directly on the
+given Board with make_move/unmake_move, so the caller must not touch that
+board until think() returns.
+
+Stopping: think() polls ``stop_event`` and its deadline every 1024 nodes and
+returns the best move of the last completed iteration.
+
+Between moves: the transposition table, killers and history scores are kept
+from one think() to the next (history scores are halved at every start, so
+old cutoffs fade), and the root search starts from the table's move. After
+a ponder search or the previous move's search, the subtree of the move
+actually played is mostly in the table already, so the early iterations of
+the next search are cut short by table hits.
+
+Multi-PV: with SearchLimits.multipv = K every iteration searches the root K
+times, each time without the root moves already found, so the lines come out
+best first with exact scores. The transposition table is shared between the
+K searches (the later ones mostly run through positions the first one
+stored), and each line is reported through the info callback as soon as it
+is found.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.game.constants import WHITE
+from src.game.rules import Rules
+from src.engine.evaluation import evaluate, PIECE_VALUES
+
+Move = Tuple[int, int, int]
+
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000  # scores beyond this are mates
+INFINITY = 1 << 30
+MAX_DEPTH = 64
+
+_EXACT, _LOWER, _UPPER = 0, 1, 2
+_ENTRY_BYTES = 120  # rough size of one table slot (tuple + ints) for Hash sizing
+_CHECK_EVERY = 1023  # node mask between stop/deadline checks
+
+
+class _Stopped(Exception):
+    """Raised inside the tree when the search must stop."""
+
+
+class SearchLimits:
+    """
+    What to search for, as given by a UCI ``go`` command. Times are in
+    milliseconds; no limit at all means an infinite search.
+    """
+
+    __slots__ = ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo",
+                 "nodes", "infinite", "ponder", "multipv")
+
+    def __init__(self, depth: Optional[int] = None, movetime: Optional[int] = None,
+                 wtime: Optional[int] = None, btime: Optional[int] = None, winc: int = 0, binc: int = 0,
+                 movestogo: Optional[int] = None, nodes: Optional[int] = None,
+                 infinite: bool = False, ponder: bool = False, multipv: int = 1):
+        self.depth = depth
+        self.movetime = movetime
+        self.wtime = wtime
+        self.btime = btime
+        self.winc = winc
+        self.binc = binc
+        self.movestogo = movestogo
+        self.nodes = nodes
+        self.infinite = infinite
+        self.ponder = ponder
+        self.multipv = multipv  # number of best root moves to search and report
+
+    def time_budget(self, color: int) -> Optional[float]:
+        """Seconds to spend on this move for color, or None if the time is not limited."""
+        if self.movetime is not None:
+            return max(0.001, self.movetime / 1000.0 - 0.01)
+        left = self.wtime if color == WHITE else self.btime
+        if left is None:
+            return None
+        increment = self.winc if color == WHITE else self.binc
+        budget = left / (self.movestogo or 30) + increment * 0.8
+        # never plan to use more than half of the remaining time
+        return max(0.005, min(budget, left * 0.5) / 1000.0 - 0.02)
+
+
+class Search:
+    """Iterative-deepening alpha-beta searcher with a transposition table."""
+
+    def __init__(self, hash_mb: int = 16, evaluator: Optional[Callable[[object], int]] = None):
+        self.stop_event = threading.Event()
+        # static evaluation (centipawns for the side to move), e.g. nnue.NNUEEvaluator
+        self.evaluate = evaluator or evaluate
+        self.nodes = 0
+        self._tt: List[Optional[tuple]] = []
+        self._tt_mask = 0
+        self.set_hash_size(hash_mb)
+        self._killers: List[List[Optional[Move]]] = [[None, None] for _ in range(MAX_DEPTH + 16)]
+        self._history: Dict[Tuple[int, int], int] = {}
+        self._seen: Dict[int, int] = {}
+        self._deadline: Optional[float] = None
+        self._soft_deadline: Optional[float] = None
+        self._budget: Optional[float] = None
+        self._soft_budget: Optional[float] = None
+        self._max_nodes: Optional[int] = None
+        self._pondering = False
+
+    # -------------------------
+    # Configuration
+    # -------------------------
+    def set_hash_size(self, hash_mb: int) -> None:
+        """Resize (and clear) the transposition table to about hash_mb megabytes."""
+        entries = max(1024, int(hash_mb) * (1 << 20) // _ENTRY_BYTES)
+        size = 1 << (entries.bit_length() - 1)
+        self._tt = [None] * size
+        self._tt_mask = size - 1
+
+    def clear(self) -> None:
+        """Forget everything learned (new game)."""
+        self._tt = [None] * len(self._tt)
+        self._history.clear()
+        for killers in self._killers:
+            killers[0] = killers[1] = None
+
+    def stop(self) -> None:
+        """Ask a running think() to return as soon as possible (thread-safe)."""
+        self.stop_event.set()
+
+    def ponderhit(self) -> None:
+        """The pondered move was played: start the clock of the ongoing search."""
+        if self._budget is not None:
+            now = time.monotonic()
+            self._deadline = now + self._budget
+            self._soft_deadline = now + self._soft_budget
+        self._pondering = False
+
+    # -------------------------
+    # Driver
+    # -------------------------
+    def think(self, board, limits: Optional[SearchLimits] = None, history: Iterable[int] = (),
+              info: Optional[Callable[[Dict[str, object]], None]] = None) -> Tuple[Optional[Move], Optional[Move]]:
+        """
+        Search the board's position. history holds the hashes of the game's
+        earlier positions (repetitions score as draws); info is called after
+        every completed iteration with depth, multipv (the rank of the line,
+        1 = best), score, mate, nodes, nps, time (ms) and pv; with
+        limits.multipv > 1 once per line, as each is found. Infinite and ponder searches do not return before
+        stop() (or, when pondering, ponderhit() and the time running out).
+        stop_event is not cleared here: clear it before starting a search.
+        Returns (best_move, ponder_move); best_move is None without legal moves.
+        """
+        limits = limits or SearchLimits()
+        started = time.monotonic()
+        self.nodes = 0
+        self._max_nodes = limits.nodes
+        self._pondering = limits.ponder
+        self._budget = limits.time_budget(board.turn)
+        self._deadline = self._soft_deadline = None
+        if self._budget is not None:
+            # a new iteration started late would rarely finish: leave the rest of the budget unused
+            self._soft_budget = self._budget if limits.movetime is not None else self._budget * 0.6
+            if not limits.ponder and not limits.infinite:
+                self._deadline = started + self._budget
+                self._soft_deadline = started + self._soft_budget
+        self._seen = {}
+        for key in history:
+            self._seen[key] = self._seen.get(key, 0) + 1
+        history_scores = self._history
+        for move_key in history_scores:
+            history_scores[move_key] >>= 1
+
+        root_moves = Rules.get_legal_moves(board)
+        entry = self._tt[board.hash & self._tt_mask]
+        if entry is not None and entry[0] == board.hash and entry[4] in root_moves:
+            # searched before (the previous move's search or a ponder search): its best move goes first
+            root_moves.remove(entry[4])
+            root_moves.insert(0, entry[4])
+        best_move = root_moves[0] if root_moves else None
+        pv: List[Move] = [best_move] if best_move else []
+        max_depth = min(limits.depth or MAX_DEPTH, MAX_DEPTH)
+        multipv = max(1, min(limits.multipv or 1, len(root_moves)))
+        depth = 0
+        while root_moves and depth < max_depth:
+            depth += 1
+            lines: List[Tuple[Move, int, List[Move]]] = []  # (move, score, pv) of this iteration, best first
+            stopped = False
+            try:
+                while len(lines) < multipv:
+                    found = {line[0] for line in lines}
+                    move, score = self._search_root(board, depth, [m for m in root_moves if m not in found])
+                    line_pv = self._principal_variation(board, depth)
+                    if not line_pv or line_pv[0] != move:
+                        line_pv = [move]
+                    lines.append((move, score, line_pv))
+                    if info is not None:
+                        elapsed = time.monotonic() - started
+                        info({
+                            "depth": depth, "multipv": len(lines), "score": score, "mate": _mate_distance(score),
+                            "nodes": self.nodes, "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+                            "time": int(elapsed * 1000), "pv": line_pv,
+                        })
+            except _Stopped:
+                stopped = True
+            if not lines:
+                break
+            # the best line of an interrupted multi-PV iteration is complete: keep it
+            best_move, score, pv = lines[0]
+            found = [line[0] for line in lines]
+            root_moves = found + [move for move in root_moves if move not in found]
+            if len(lines) > 1:
+                # the root entry holds the last line searched: point it back at the best one
+                self._store(board.hash, depth, _EXACT, score, best_move, 0)
+            if stopped or self.stop_event.is_set():
+                break
+            if self._soft_deadline is not None and time.monotonic() >= self._soft_deadline:
+                break
+            if abs(score) > MATE_BOUND and not (limits.infinite or self._pondering):
+                break  # a forced mate does not get better by searching deeper
+
+        # the protocol forbids answering an infinite or pondering search before it is stopped
+        while (limits.infinite or self._pondering) and not self.stop_event.is_set():
+            self.stop_event.wait(0.01)
+        self._pondering = False
+        return best_move, (pv[1] if len(pv) > 1 else None)
+
+    def _search_root(self, board, depth: int, moves: List[Move]) -> Tuple[Move, int]:
+        alpha = -INFINITY
+        beta = INFINITY
+        best_move = moves[0]
+        key = board.hash
+        self._seen[key] = self._seen.get(key, 0) + 1
+        try:
+            for index, move in enumerate(moves):
+                undo = board.make_move(*move)
+                try:
+                    if index == 0:
+                        score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+                    else:
+                        score = -self._negamax(board, depth - 1, -alpha - 1, -alpha, 1)
+                        if score > alpha:
+                            score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+                finally:
+                    board.unmake_move(undo)
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+        finally:
+            self._seen[key] -= 1
+        self._store(key, depth, _EXACT, alpha, best_move, 0)
+        return best_move, alpha
+
+    # -------------------------
+    # Tree search
+    # -------------------------
+    def _check_limits(self) -> None:
+        if self.stop_event.is_set():
+            raise _Stopped
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise _Stopped
+        if self._max_nodes is not None and self.nodes >= self._max_nodes:
+            raise _Stopped
+
+    def _negamax(self, board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        key = board.hash
+        if self._seen.get(key):
+            return 0  # repetition
+
+        color = board.turn
+        in_check = Rules.is_in_check(board, color)
+        if in_check:
+            depth += 1
+        if depth <= 0 or ply >= MAX_DEPTH:
+            return self._quiesce(board, alpha, beta, ply)
+
+        self.nodes += 1
+        if not self.nodes & _CHECK_EVERY:
+            self._check_limits()
+
+        tt_move = None
+        entry = self._tt[key & self._tt_mask]
+        if entry is not None and entry[0] == key:
+            _, entry_depth, flag, entry_score, tt_move = entry
+            if entry_depth >= depth:
+                entry_score = _score_from_tt(entry_score, ply)
+                if flag == _EXACT or (flag == _LOWER and entry_score >= beta) \
+                        or (flag == _UPPER and entry_score <= alpha):
+                    return entry_score
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        legal = 0
+        self._seen[key] = 1
+        try:
+            for move in self._ordered(board, Rules.generate_moves(board, color), tt_move, ply):
+                undo = board.make_move(*move)
+                try:
+                    if Rules.is_in_check(board, color):
+                        continue  # pseudo-legal move leaves the king en prise
+                    legal += 1
+                    if legal == 1:
+                        score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+                    else:
+                        score = -self._negamax(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                        if alpha < score < beta:
+                            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    board.unmake_move(undo)
+
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    if board.squares[move[1]] is None and not move[2]:
+                        killers = self._killers[ply]
+                        if killers[0] != move:
+                            killers[1] = killers[0]
+                            killers[0] = move
+                        self._history[move[:2]] = self._history.get(move[:2], 0) + depth * depth
+                    break
+        finally:
+            del self._seen[key]
+
+        if legal == 0:
+            return -MATE_SCORE + ply if in_check else 0
+
+        if best_score <= original_alpha:
+            flag = _UPPER
+        elif best_score >= beta:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        self._store(key, depth, flag, best_score, best_move, ply)
+        return best_score
+
+    def _quiesce(self, board, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & _CHECK_EVERY:
+            self._check_limits()
+
+        stand_pat = self.evaluate(board)
+        if stand_pat >= beta or ply >= MAX_DEPTH + 8:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        color = board.turn
+        squares = board.squares
+        captures = []
+        for move in Rules.generate_moves(board, color):
+            victim = squares[move[1]]
+            if victim is None and not move[2]:
+                continue
+            gain = (PIECE_VALUES[victim.kind.type_code] if victim is not None else 0) \
+                + (PIECE_VALUES[move[2]] - PIECE_VALUES[1] if move[2] else 0)
+            if stand_pat + gain + 200 < alpha:
+                continue  # delta pruning: even winning the piece cannot raise alpha
+            captures.append((gain * 16 - PIECE_VALUES[squares[move[0]].kind.type_code] // 16, move))
+        captures.sort(key=_first, reverse=True)
+
+        for _, move in captures:
+            undo = board.make_move(*move)
+            try:
+                if Rules.is_in_check(board, color):
+                    continue
+                score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _ordered(self, board, moves: List[Move], tt_move: Optional[Move], ply: int) -> List[Move]:
+        """Hash move, then captures (most valuable victim first), killers, history."""
+        squares = board.squares
+        killers = self._killers[ply]
+        history = self._history
+        scored = []
+        for move in moves:
+            if move == tt_move:
+                score = 1 << 30
+            else:
+                victim = squares[move[1]]
+                if victim is not None:
+                    score = (1 << 24) + PIECE_VALUES[victim.kind.type_code] * 16 \
+                        - PIECE_VALUES[squares[move[0]].kind.type_code] // 16
+                elif move[2]:
+                    score = (1 << 23) + PIECE_VALUES[move[2]]
+                elif move == killers[0] or move == killers[1]:
+                    score = 1 << 22
+                else:
+                    score = history.get(move[:2], 0)
+            scored.append((score, move))
+        scored.sort(key=_first, reverse=True)
+        return [move for _, move in scored]
+
+    # -------------------------
+    # Transposition table
+    # -------------------------
+    def _store(self, key: int, depth: int, flag: int, score: int, move: Optional[Move], ply: int) -> None:
+        self._tt[key & self._tt_mask] = (key, depth, flag, _score_to_tt(score, ply), move)
+
+    def _principal_variation(self, board, depth: int) -> List[Move]:
+        """Follow hash moves from the root (each checked to be legal)."""
+        pv: List[Move] = []
+        undos = []
+        seen = set()
+        try:
+            while len(pv) < depth:
+                key = board.hash
+                entry = self._tt[key & self._tt_mask]
+                if key in seen or entry is None or entry[0] != key or entry[4] is None:
+                    break
+                move = entry[4]
+                if move not in Rules.get_legal_moves(board):
+                    break
+                seen.add(key)
+                pv.append(move)
+                undos.append(board.make_move(*move))
+        finally:
+            for undo in reversed(undos):
+                board.unmake_move(undo)
+        return pv
+
+
+def _first(item):
+    return item[0]
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # mate scores are stored relative to the node, not the root
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def _mate_distance(score: int) -> Optional[int]:
+    """Moves to mate (negative when being mated), None for a normal score."""
+    if score > MATE_BOUND:
+        return (MATE_SCORE - score + 1) // 2
+    if score < -MATE_BOUND:
+        return -((MATE_SCORE + score) // 2)
+    return None
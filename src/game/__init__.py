@@ -1,6 +1,6 @@
 """
 Game package - contains all the core classes and logic for the chess game.
-Actually: Board, Piece, Player, Move, Rules, GameState, Notation
+Actually: Board, Piece, Player, Move, Rules, GameState, Notation, Position, GameTree
 """
 
 from .board import Board
@@ -10,6 +10,8 @@ from .move import Move
 from .rules import Rules
 from .notation import Notation
 from .game_state import GameState
+from .position import Position
+from .variation import GameTree, VariationNode
 
 
-__all__ = ['Board', 'Piece', 'Player', 'Move', 'Rules', 'Notation', 'GameState']
\ No newline at end of file
+__all__ = ['Board', 'Piece', 'Player', 'Move', 'Rules', 'Notation', 'GameState', 'Position', 'GameTree', 'VariationNode']
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""
+Incrementally updated attack maps.
+
+AttackMap is a Board observer (see Board.attach) that knows, for every
+square and both colors, which pieces attack it and how many do:
+attackers[color][square] is a bit mask of the attacking pieces' squares
+(bit i = square i, a8 = bit 0) and counts[color][square] its number of bits,
+so every query is an index.
+
+A move changes the occupancy of two to four squares (start, end, the pawn
+taken en passant, the castling rook). Only the pieces on those squares and
+the sliders whose attacks reach one of them can attack differently
+afterwards, so only they are recomputed. Moves are taken back in the
+reverse order they were made, so before each update the map saves its
+tables (five 64-entry list copies) and unmake just restores them; an unmake
+that does not match the saved move recomputes the same squares instead.
+Building a map from scratch (attach, or a rehash after the squares were
+edited directly) is one pass over the pieces.
+
+Attacks are pseudo-legal and include the attacker's own pieces (defence): a
+pinned piece still attacks, and a slider's attack stops at the first piece
+in the way, whatever its color.
+
+While a map is attached, board.attack_map points at it and
+Rules.is_square_attacked (check detection, castling through check) answers
+from the map instead of scanning the board.
+"""
+
+from operator import gt
+from typing import List, Optional
+
+from src.game.constants import BOARD_WIDTH, BOARD_HEIGHT, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from src.game.pieces import KNIGHT_TARGETS, KING_TARGETS, ROOK_RAYS, BISHOP_RAYS
+
+SQUARES = BOARD_WIDTH * BOARD_HEIGHT
+
+# PAWN_TARGETS[color][square]: squares a pawn of that color on square attacks
+PAWN_TARGETS = tuple(
+    tuple(
+        tuple((square // BOARD_WIDTH + forward) * BOARD_WIDTH + col
+              for col in (square % BOARD_WIDTH - 1, square % BOARD_WIDTH + 1)
+              if 0 <= col < BOARD_WIDTH and 0 <= square // BOARD_WIDTH + forward < BOARD_HEIGHT)
+        for square in range(SQUARES)
+    )
+    for forward in (-1, 1)  # WHITE moves towards row 0, BLACK towards row 7
+)
+_SLIDER_RAYS = {
+    BISHOP: BISHOP_RAYS,
+    ROOK: ROOK_RAYS,
+    QUEEN: tuple(r + b for r, b in zip(ROOK_RAYS, BISHOP_RAYS)),
+}
+# rough piece values by type for hanging(): who wins an exchange on a square
+EXCHANGE_VALUES = (0, 1, 3, 3, 5, 9, 0)
+MAX_SAVED = 256  # saved tables kept for unmake (a game played on without unmaking drops the oldest)
+
+
+class AttackMap:
+    """Per-square attackers of both colors for one board, kept current by make/unmake."""
+
+    __slots__ = ("board", "attackers", "counts", "_targets", "_sliders", "_saved", "updates", "rebuilds")
+
+    def __init__(self, board=None):
+        self.board = None
+        # attackers[color][square]: bit mask of the squares of color's pieces attacking square
+        self.attackers = ([0] * SQUARES, [0] * SQUARES)
+        self.counts = ([0] * SQUARES, [0] * SQUARES)  # counts[color][square]: number of those attackers
+        self._targets: List[Optional[tuple]] = [None] * SQUARES  # (color, attacked squares) of the piece on each square
+        self._sliders = 0  # squares holding a bishop, rook or queen
+        self._saved = []  # (undo, attackers, counts, targets, sliders) before each move, for reverted
+        self.updates = 0  # incremental updates, for diagnostics
+        self.rebuilds = 0  # full recomputations
+        if board is not None:
+            self.attach(board)
+
+    def attach(self, board) -> None:
+        """Follow board (leaving the previous one) and build the map from it."""
+        if self.board is not None:
+            self.detach()
+        self.board = board
+        board.attack_map = self
+        board.attach(self)
+
+    def detach(self) -> None:
+        board = self.board
+        if board is None:
+            return
+        board.detach(self)
+        if board.attack_map is self:
+            board.attack_map = None
+        self.board = None
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def attackers_of(self, square: int, color: int) -> int:
+        """Bit mask of the squares of color's pieces attacking square."""
+        return self.attackers[color][square]
+
+    def count(self, square: int, color: int) -> int:
+        return self.counts[color][square]
+
+    def is_attacked(self, square: int, color: int) -> bool:
+        return self.attackers[color][square] != 0
+
+    def in_check(self, color: int) -> bool:
+        king = self.board.king_square(color)
+        return king >= 0 and self.attackers[color ^ 1][king] != 0
+
+    def control(self, color: int) -> int:
+        """Number of squares color attacks more often than the other side."""
+        return sum(map(gt, self.counts[color], self.counts[color ^ 1]))
+
+    def hanging(self, color: int) -> List[int]:
+        """
+        Squares of color's pieces (king excluded) the other side can win: attacked
+        and not defended, or attacked by a less valuable piece.
+        """
+        squares = self.board.squares
+        own, enemy = self.attackers[color], self.attackers[color ^ 1]
+        result = []
+        for square, mask in enumerate(enemy):
+            if not mask:
+                continue
+            piece = squares[square]
+            if piece is None or piece.kind.color_code != color:
+                continue
+            value = EXCHANGE_VALUES[piece.kind.type_code]
+            if not value:
+                continue
+            if not own[square] or self._cheapest(mask) < value:
+                result.append(square)
+        return result
+
+    def _cheapest(self, mask: int) -> int:
+        squares = self.board.squares
+        cheapest = 1 << 30
+        while mask:
+            low = mask & -mask
+            value = EXCHANGE_VALUES[squares[low.bit_length() - 1].kind.type_code] or 1 << 20  # the king last
+            cheapest = min(cheapest, value)
+            mask ^= low
+        return cheapest
+
+    # -------------------------
+    # Board observer
+    # -------------------------
+    def reset(self, board) -> None:
+        self.rebuilds += 1
+        self.attackers = ([0] * SQUARES, [0] * SQUARES)
+        self.counts = ([0] * SQUARES, [0] * SQUARES)
+        self._targets = [None] * SQUARES
+        self._sliders = 0
+        self._saved = []
+        for square, piece in enumerate(board.squares):
+            if piece is not None:
+                self._add(square, piece.kind)
+
+    def moved(self, undo) -> None:
+        saved = self._saved
+        if len(saved) >= MAX_SAVED:
+            del saved[:MAX_SAVED // 2]
+        white, black = self.attackers
+        white_counts, black_counts = self.counts
+        saved.append((undo, (white[:], black[:]), (white_counts[:], black_counts[:]), self._targets[:], self._sliders))
+        self._update(undo)
+
+    def reverted(self, undo) -> None:
+        saved = self._saved
+        if saved and saved[-1][0] is undo:
+            _, self.attackers, self.counts, self._targets, self._sliders = saved.pop()
+        else:
+            self._update(undo)
+
+    def _update(self, undo) -> None:
+        """Recompute the pieces whose attacks a move (or its unmake) can have changed."""
+        self.updates += 1
+        changed = (1 << undo[0]) | (1 << undo[1]) | (1 << undo[6])
+        if undo[7] is not None:  # castling rook
+            changed |= (1 << undo[8]) | (1 << undo[9])
+        white, black = self.attackers
+        sliders = self._sliders
+        sources = changed
+        mask = changed
+        while mask:
+            low = mask & -mask
+            square = low.bit_length() - 1
+            sources |= (white[square] | black[square]) & sliders
+            mask ^= low
+        squares = self.board.squares
+        while sources:
+            low = sources & -sources
+            square = low.bit_length() - 1
+            self._remove(square)
+            piece = squares[square]
+            if piece is not None:
+                self._add(square, piece.kind)
+            sources ^= low
+
+    def _add(self, square: int, kind) -> None:
+        type_code = kind.type_code
+        color = kind.color_code
+        if type_code == PAWN:
+            targets = PAWN_TARGETS[color][square]
+        elif type_code == KNIGHT:
+            targets = KNIGHT_TARGETS[square]
+        elif type_code == KING:
+            targets = KING_TARGETS[square]
+        else:
+            squares = self.board.squares
+            found = []
+            for ray in _SLIDER_RAYS[type_code][square]:
+                for target in ray:
+                    found.append(target)
+                    if squares[target] is not None:
+                        break
+            targets = tuple(found)
+            self._sliders |= 1 << square
+        bit = 1 << square
+        table = self.attackers[color]
+        counts = self.counts[color]
+        for target in targets:
+            table[target] |= bit
+            counts[target] += 1
+        self._targets[square] = (color, targets)
+
+    def _remove(self, square: int) -> None:
+        entry = self._targets[square]
+        if entry is None:
+            return
+        color, targets = entry
+        keep = ~(1 << square)
+        table = self.attackers[color]
+        counts = self.counts[color]
+        for target in targets:
+            table[target] &= keep
+            counts[target] -= 1
+        self._sliders &= keep
+        self._targets[square] = None
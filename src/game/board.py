@@ -1,43 +1,204 @@
 import pygame as pg
 from src.game.constants import (
     TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT,
-    WHITE_TILE_COLOR, BLACK_TILE_COLOR
+    WHITE_TILE_COLOR, BLACK_TILE_COLOR,
+    WHITE, BLACK, PAWN, QUEEN, KING, PROMOTION_CODES,
+    CASTLE_WHITE_K, CASTLE_WHITE_Q, CASTLE_BLACK_K, CASTLE_BLACK_Q, CASTLE_ALL,
+    CASTLING_KEYS
 )
-from src.game.pieces import Piece
+from src.game.pieces import Piece, PieceKind
 from src.game.player import Player
 from src.game.rules import Rules
-from src.utils.assets import get_piece_image
+from src.game.zobrist import (PIECE_KEYS, CASTLING_KEYS as CASTLING_HASH_KEYS, EP_KEYS, SIDE_KEYS, compute_hash,
+                              compute_pawn_hash, can_take_en_passant)
+
+
+# castling rights kept when a piece leaves or lands on a square (rook and king home squares)
+_CASTLING_KEEP = [CASTLE_ALL] * (BOARD_WIDTH * BOARD_HEIGHT)
+_CASTLING_KEEP[0] &= ~CASTLE_BLACK_Q
+_CASTLING_KEEP[7] &= ~CASTLE_BLACK_K
+_CASTLING_KEEP[4] &= ~(CASTLE_BLACK_K | CASTLE_BLACK_Q)
+_CASTLING_KEEP[56] &= ~CASTLE_WHITE_Q
+_CASTLING_KEEP[63] &= ~CASTLE_WHITE_K
+_CASTLING_KEEP[60] &= ~(CASTLE_WHITE_K | CASTLE_WHITE_Q)
+
+
+class _TileRow:
+    """One row of the legacy ``board.tiles[row][col]`` view over ``Board.squares``."""
+
+    __slots__ = ("_squares", "_offset")
+
+    def __init__(self, squares, offset):
+        self._squares = squares
+        self._offset = offset
+
+    def __getitem__(self, col):
+        return self._squares[self._offset + col]
+
+    def __setitem__(self, col, piece):
+        self._squares[self._offset + col] = piece
+
+    def __len__(self):
+        return BOARD_WIDTH
+
+    def __iter__(self):
+        return iter(self._squares[self._offset:self._offset + BOARD_WIDTH])
+
+
+class _Tiles:
+    """Read/write 8x8 view over the flat square array (compatibility with the old matrix)."""
+
+    __slots__ = ("_rows",)
+
+    def __init__(self, squares):
+        self._rows = tuple(_TileRow(squares, row * BOARD_WIDTH) for row in range(BOARD_HEIGHT))
+
+    def __getitem__(self, row):
+        return self._rows[row]
+
+    def __len__(self):
+        return BOARD_HEIGHT
+
+    def __iter__(self):
+        return iter(self._rows)
 
 
 class Board:
-    def __init__(self):
-        # Matrix representing the chessboard
-        self.tiles = [[None for _ in range(BOARD_WIDTH)] for _ in range(BOARD_HEIGHT)]
-        self.pieces = []
+    __slots__ = (
+        "squares", "codes", "selected_piece", "turn", "castling", "ep_square",
+        "last_move", "captured_pieces", "_tiles", "_players", "_kings", "_hash", "_pawn_hash",
+        "_observers", "attack_map"
+    )
+
+    def __init__(self, setup=True):
+        """setup=False leaves the squares empty for the caller to fill (then call rehash)."""
+        # Flat 64-entry array (index = row * 8 + col): primary board storage
+        self.squares = [None] * (BOARD_WIDTH * BOARD_HEIGHT)
+        # piece code per square (0 = empty), mirroring squares for batch packing (see rehash)
+        self.codes = bytearray(BOARD_WIDTH * BOARD_HEIGHT)
         self.selected_piece = None
 
-        # Players and turn
-        self.players = [Player("white"), Player("black")]
-        self.current_player = self.players[0]  # White starts first
+        # Side to move as a color code (WHITE / BLACK); Player objects are built on demand
+        self.turn = WHITE
+        self._players = None
+        self._tiles = None
+        self._kings = [60, 4]  # cached king squares per color (see king_square)
+        self._hash = 0  # Zobrist hash without the side to move (see hash)
+        self._pawn_hash = 0  # Zobrist hash of the pawns only (see pawn_hash)
+        self._observers = ()  # see attach
+        self.attack_map = None  # attacks.AttackMap following this board, if one is attached
 
         # Special rule states
-        self.en_passant_target = None  # position where en passant capture would land (row, col) or None
+        self.castling = CASTLE_ALL  # castling rights bitmask (see constants.CASTLE_*)
+        self.ep_square = -1  # square where en passant capture would land, -1 if none
         self.last_move = None  # store last move (piece, start_pos, end_pos) for HUD/debug
         self.captured_pieces = []  # list of captured piece objects
 
-        # optional: castling rights if you want to track them on Board
-        self.castling_rights = {
-            "white_k": True, "white_q": True,
-            "black_k": True, "black_q": True
-        }
-
         # Load all pieces on the board
-        self.load_board()
+        if setup:
+            self.load_board()
+
+    # COMPATIBILITY VIEWS
+
+    @property
+    def tiles(self):
+        """8x8 ``tiles[row][col]`` view backed by ``squares``."""
+        if self._tiles is None:
+            self._tiles = _Tiles(self.squares)
+        return self._tiles
+
+    @property
+    def pieces(self):
+        """Pieces currently on the board."""
+        return [piece for piece in self.squares if piece is not None]
+
+    @property
+    def players(self):
+        if self._players is None:
+            self._players = [Player("white"), Player("black")]
+        return self._players
+
+    @property
+    def current_player(self):
+        return self.players[self.turn]
+
+    @current_player.setter
+    def current_player(self, player):
+        self.turn = WHITE if player.color == "white" else BLACK
+
+    @property
+    def en_passant_target(self):
+        """En passant landing square as (row, col) or None."""
+        if self.ep_square < 0:
+            return None
+        return divmod(self.ep_square, BOARD_WIDTH)
+
+    @en_passant_target.setter
+    def en_passant_target(self, position):
+        self.ep_square = -1 if position is None else position[0] * BOARD_WIDTH + position[1]
+
+    @property
+    def castling_rights(self):
+        """Castling rights as a fresh dict ({'white_k': True, ...})."""
+        return {key: bool(self.castling & bit) for key, bit in CASTLING_KEYS}
+
+    @castling_rights.setter
+    def castling_rights(self, rights):
+        if rights is None:
+            return
+        if isinstance(rights, int):
+            self.castling = rights
+            return
+        self.castling = sum(bit for key, bit in CASTLING_KEYS if rights.get(key))
+
+    @property
+    def hash(self):
+        """Zobrist hash of the position, side to move included."""
+        return self._hash ^ SIDE_KEYS[self.turn]
+
+    @property
+    def pawn_hash(self):
+        """Zobrist hash of the pawn placement alone (key of engine.pawn_hash.PawnTable)."""
+        return self._pawn_hash
+
+    def rehash(self):
+        """
+        Recompute the hashes and codes from scratch (after editing squares directly).
+        An en passant square no pawn can take on is dropped, as _apply never sets one.
+        """
+        if not can_take_en_passant(self.squares, self.ep_square):
+            self.ep_square = -1
+        self.codes[:] = bytes(0 if piece is None else piece.kind.code for piece in self.squares)
+        self._hash = compute_hash(self)
+        self._pawn_hash = compute_pawn_hash(self)
+        for observer in self._observers:
+            observer.reset(self)
+
+    # OBSERVERS
+
+    def attach(self, observer):
+        """
+        Keep observer informed of every change to the position (e.g. an incrementally
+        updated evaluator): observer.moved(undo) after each move, observer.reverted(undo)
+        when it is taken back, observer.reset(board) after squares were edited
+        directly (see rehash). reset is also called right away.
+        """
+        if observer not in self._observers:
+            self._observers += (observer,)
+        observer.reset(self)
+
+    def detach(self, observer):
+        self._observers = tuple(other for other in self._observers if other is not observer)
 
     # INITIAL SETUP
 
     def load_board(self):
-        """Place all pieces on the board in their starting positions."""
+        """Place all pieces on the board in their starting positions and reset the game flags."""
+        squares = self.squares
+        # clear in place: the tiles view keeps a reference to this list
+        for index in range(len(squares)):
+            squares[index] = None
+
         piece_positions = {
             'rook': [(0, 0), (0, 7), (7, 0), (7, 7)],
             'knight': [(0, 1), (0, 6), (7, 1), (7, 6)],
@@ -49,24 +210,30 @@ class Board:
 
         for piece_type, positions in piece_positions.items():
             for pos in positions:
-                color = 'white' if pos[0] < 2 else 'black'
-                piece = Piece(piece_type, color, pos)
-                piece.image = get_piece_image(color, piece_type)  # Load image from assets
-                self.pieces.append(piece)
-                self.tiles[pos[0]][pos[1]] = piece
+                # row 0 is rank 8: black starts at the top, white at the bottom
+                color = 'black' if pos[0] < 2 else 'white'
+                squares[pos[0] * BOARD_WIDTH + pos[1]] = Piece(piece_type, color, pos)
+
+        self.selected_piece = None
+        self.turn = WHITE
+        self._kings = [60, 4]
+        self.castling = CASTLE_ALL
+        self.ep_square = -1
+        self.last_move = None
+        self.captured_pieces = []
+        self.rehash()
 
     # DRAWING
 
     def draw(self, screen):
         """Draw the board and pieces on the screen."""
-        for row in range(BOARD_HEIGHT):
-            for col in range(BOARD_WIDTH):
-                tile_color = WHITE_TILE_COLOR if (row + col) % 2 == 0 else BLACK_TILE_COLOR
-                pg.draw.rect(screen, tile_color, (col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        for index, piece in enumerate(self.squares):
+            row, col = divmod(index, BOARD_WIDTH)
+            tile_color = WHITE_TILE_COLOR if (row + col) % 2 == 0 else BLACK_TILE_COLOR
+            pg.draw.rect(screen, tile_color, (col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
 
-                piece = self.tiles[row][col]
-                if piece and piece.image:
-                    screen.blit(piece.image, (col * TILE_SIZE, row * TILE_SIZE))
+            if piece and piece.image:
+                screen.blit(piece.image, (col * TILE_SIZE, row * TILE_SIZE))
 
     # GAME LOGIC
 
@@ -77,14 +244,17 @@ class Board:
             self.selected_piece = None
             return
 
-        piece = self.tiles[row][col]
-        if piece and piece.color == self.current_player.color:
+        piece = self.squares[row * BOARD_WIDTH + col]
+        if piece and piece.kind.color_code == self.turn:
             self.selected_piece = piece
         else:
             self.selected_piece = None
 
-    def move_piece(self, start_pos, end_pos):
-        """Move a piece if the move is valid and handle special rules."""
+    def move_piece(self, start_pos, end_pos, promotion=None):
+        """
+        Move a piece if the move is valid and handle special rules.
+        promotion: optional piece type name for a promoting pawn (default queen).
+        """
         start_row, start_col = start_pos
         end_row, end_col = end_pos
 
@@ -95,87 +265,29 @@ class Board:
         if not (0 <= end_row < BOARD_HEIGHT and 0 <= end_col < BOARD_WIDTH):
             return False
 
-        piece = self.tiles[start_row][start_col]
-        target = self.tiles[end_row][end_col]
+        piece = self.squares[start_row * BOARD_WIDTH + start_col]
 
-        if not piece or piece.color != self.current_player.color:
+        if not piece or piece.kind.color_code != self.turn:
             return False
 
         # Validate move using Rules
         if not Rules.is_valid_move(self, piece, start_pos, end_pos):
             return False
 
-        # Prepare for history/last_move: record captured piece (normal capture)
-        captured = target
-
-        # Handle en passant capture:
-        # If the pawn moves to en_passant_target, the captured pawn is on the same column
-        # but on the row just behind the landing square.
-        if piece.type.lower() == "pawn" and self.en_passant_target == (end_row, end_col) and target is None:
-            if piece.color == "white":
-                capture_row = end_row + 1
-            else:
-                capture_row = end_row - 1
-            captured = self.tiles[capture_row][end_col]
-            # remove captured pawn
-            self.tiles[capture_row][end_col] = None
-            if captured:
-                self.captured_pieces.append(captured)
-
-        # Normal capture: add to captured_pieces if present
-        if target is not None:
-            self.captured_pieces.append(target)
-
-        # Move the piece
-        self.tiles[end_row][end_col] = piece
-        self.tiles[start_row][start_col] = None
-        piece.position = (end_row, end_col)
-        piece.has_moved = True
+        promotion_code = 0
+        if promotion:
+            promotion_code = PROMOTION_CODES.get(promotion.lower(), 0)
+            if not promotion_code:
+                return False  # can only promote to knight, bishop, rook or queen
+        undo = self._apply(start_row * BOARD_WIDTH + start_col, end_row * BOARD_WIDTH + end_col, promotion_code)
 
-        # Handle pawn promotion (Rules.check_pawn_promotion may change piece.type)
-        Rules.check_pawn_promotion(self, piece)
+        captured = undo[5]
+        if captured is not None:
+            self.captured_pieces.append(captured)
 
-        # Handle castling (move the rook as well) and update castling rights
         castle_data = None
-        if piece.type.lower() == "king" and abs(start_col - end_col) == 2:
-            rook_start_col = 0 if end_col < start_col else 7
-            rook_end_col = 3 if end_col < start_col else 5
-            rook = self.tiles[start_row][rook_start_col]
-            # move rook
-            self.tiles[start_row][rook_start_col] = None
-            self.tiles[start_row][rook_end_col] = rook
-            if rook:
-                rook.position = (start_row, rook_end_col)
-                rook.has_moved = True
-            # update castling rights for this color
-            if piece.color == "white":
-                self.castling_rights["white_k"] = False
-                self.castling_rights["white_q"] = False
-            else:
-                self.castling_rights["black_k"] = False
-                self.castling_rights["black_q"] = False
-            castle_data = {"rook_start": rook_start_col, "rook_end": rook_end_col}
-
-        # If a rook or king moved normally, clear appropriate castling rights
-        if piece.type.lower() == "king":
-            if piece.color == "white":
-                self.castling_rights["white_k"] = False
-                self.castling_rights["white_q"] = False
-            else:
-                self.castling_rights["black_k"] = False
-                self.castling_rights["black_q"] = False
-        if piece.type.lower() == "rook":
-            if start_row == 7 and start_col == 0:  # white queenside rook initial pos
-                self.castling_rights["white_q"] = False
-            if start_row == 7 and start_col == 7:  # white kingside rook initial pos
-                self.castling_rights["white_k"] = False
-            if start_row == 0 and start_col == 0:  # black queenside rook initial pos
-                self.castling_rights["black_q"] = False
-            if start_row == 0 and start_col == 7:  # black kingside rook initial pos
-                self.castling_rights["black_k"] = False
-
-        # Update en passant target square
-        self.update_en_passant(piece, start_pos, end_pos)
+        if undo[7] is not None:
+            castle_data = {"rook_start": undo[8] % BOARD_WIDTH, "rook_end": undo[9] % BOARD_WIDTH}
 
         # Store last move with useful metadata
         self.last_move = {
@@ -183,7 +295,8 @@ class Board:
             "start": start_pos,
             "end": end_pos,
             "captured": captured,
-            "castle": castle_data
+            "castle": castle_data,
+            "undo": undo
         }
 
         # Deselect
@@ -191,23 +304,161 @@ class Board:
 
         return True
 
+    # MAKE / UNMAKE
+
+    def make_move(self, start_sq, end_sq, promotion=0):
+        """
+        Apply a move given as square indices without validating it and pass the turn.
+        Returns an undo record for unmake_move (used by legality checks and search).
+        """
+        undo = self._apply(start_sq, end_sq, promotion)
+        self.turn ^= 1
+        return undo
+
+    def unmake_move(self, undo):
+        """Take back a move applied with make_move."""
+        self.turn ^= 1
+        self._revert(undo)
+
+    def _apply(self, start_sq, end_sq, promotion=0):
+        """Move the piece on start_sq to end_sq with all special rules; the turn is left untouched."""
+        squares = self.squares
+        codes = self.codes
+        piece = squares[start_sq]
+        kind = piece.kind
+        captured = squares[end_sq]
+        capture_sq = end_sq
+        undo_castling = self.castling
+        undo_ep = self.ep_square
+        undo_hash = self._hash
+        undo_pawn_hash = self._pawn_hash
+        h = undo_hash ^ PIECE_KEYS[kind.code][start_sq] ^ EP_KEYS[undo_ep + 1]
+        has_moved = piece.has_moved
+        rook = rook_from = rook_to = None
+        rook_has_moved = False
+        new_ep = -1
+
+        if kind.type_code == PAWN:
+            pawn_keys = PIECE_KEYS[kind.code]
+            self._pawn_hash ^= pawn_keys[start_sq] ^ pawn_keys[end_sq]
+            if end_sq == undo_ep and captured is None:
+                # en passant: the captured pawn sits behind the landing square
+                capture_sq = end_sq + BOARD_WIDTH if kind.color_code == WHITE else end_sq - BOARD_WIDTH
+                captured = squares[capture_sq]
+                squares[capture_sq] = None
+                codes[capture_sq] = 0
+            elif abs(end_sq - start_sq) == 2 * BOARD_WIDTH and can_take_en_passant(squares, (start_sq + end_sq) // 2):
+                new_ep = (start_sq + end_sq) // 2  # only when an enemy pawn stands next to end_sq
+            if end_sq < BOARD_WIDTH or end_sq >= BOARD_WIDTH * (BOARD_HEIGHT - 1):
+                piece.kind = PieceKind.from_code((kind.color_code << 3) | (promotion or QUEEN))
+                self._pawn_hash ^= pawn_keys[end_sq]  # the pawn leaves the pawn structure
+        elif kind.type_code == KING:
+            self._kings[kind.color_code] = end_sq
+            if abs(end_sq - start_sq) == 2:
+                # castling: move the rook as well
+                if end_sq < start_sq:
+                    rook_from, rook_to = start_sq - 4, start_sq - 1
+                else:
+                    rook_from, rook_to = start_sq + 3, start_sq + 1
+                rook = squares[rook_from]
+                if rook is not None:
+                    rook_keys = PIECE_KEYS[rook.kind.code]
+                    h ^= rook_keys[rook_from] ^ rook_keys[rook_to]
+                    rook_has_moved = rook.has_moved
+                    squares[rook_from] = None
+                    squares[rook_to] = rook
+                    codes[rook_from] = 0
+                    codes[rook_to] = rook.kind.code
+                    rook.square = rook_to
+                    rook.has_moved = True
+
+        if captured is not None:
+            h ^= PIECE_KEYS[captured.kind.code][capture_sq]
+            if captured.kind.type_code == PAWN:
+                self._pawn_hash ^= PIECE_KEYS[captured.kind.code][capture_sq]
+
+        squares[end_sq] = piece
+        squares[start_sq] = None
+        codes[end_sq] = piece.kind.code
+        codes[start_sq] = 0
+        piece.square = end_sq
+        piece.has_moved = True
+
+        castling = undo_castling & _CASTLING_KEEP[start_sq] & _CASTLING_KEEP[end_sq]
+        self.castling = castling
+        self.ep_square = new_ep
+        self._hash = (h ^ PIECE_KEYS[piece.kind.code][end_sq] ^ EP_KEYS[new_ep + 1]
+                      ^ CASTLING_HASH_KEYS[undo_castling] ^ CASTLING_HASH_KEYS[castling])
+
+        undo = (start_sq, end_sq, piece, kind, has_moved, captured, capture_sq,
+                rook, rook_from, rook_to, rook_has_moved, undo_castling, undo_ep, undo_hash, undo_pawn_hash)
+        for observer in self._observers:
+            observer.moved(undo)
+        return undo
+
+    def _revert(self, undo):
+        """Restore the position saved in an undo record from _apply."""
+        (start_sq, end_sq, piece, kind, has_moved, captured, capture_sq,
+         rook, rook_from, rook_to, rook_has_moved, castling, ep_square, position_hash, pawn_hash) = undo
+        squares = self.squares
+        codes = self.codes
+
+        squares[start_sq] = piece
+        squares[end_sq] = None
+        codes[start_sq] = kind.code
+        codes[end_sq] = 0
+        piece.square = start_sq
+        piece.kind = kind
+        piece.has_moved = has_moved
+        if captured is not None:
+            squares[capture_sq] = captured
+            codes[capture_sq] = captured.kind.code
+        if kind.type_code == KING:
+            self._kings[kind.color_code] = start_sq
+            if rook is not None:
+                squares[rook_to] = None
+                squares[rook_from] = rook
+                codes[rook_to] = 0
+                codes[rook_from] = rook.kind.code
+                rook.square = rook_from
+                rook.has_moved = rook_has_moved
+
+        self.castling = castling
+        self.ep_square = ep_square
+        self._hash = position_hash
+        self._pawn_hash = pawn_hash
+        for observer in self._observers:
+            observer.reverted(undo)
+
+    def king_square(self, color):
+        """Square index of the king of the given color code (-1 if there is none)."""
+        squares = self.squares
+        square = self._kings[color]
+        piece = squares[square]
+        code = (color << 3) | KING
+        if piece is not None and piece.kind.code == code:
+            return square
+        # the cache went stale (pieces moved through the tiles view): rescan
+        for square, piece in enumerate(squares):
+            if piece is not None and piece.kind.code == code:
+                self._kings[color] = square
+                return square
+        return -1
+
     def update_en_passant(self, piece, start_pos, end_pos):
         """Set en passant target if a pawn moved two squares."""
-        self.en_passant_target = None  # reset by default
-        if piece.type.lower() == "pawn":
+        self.ep_square = -1  # reset by default
+        if piece.kind.type_code == PAWN:
             start_row, start_col = start_pos
             end_row, end_col = end_pos
             # if pawn moved two squares, store the square it jumped over
             if abs(end_row - start_row) == 2:
                 mid_row = (start_row + end_row) // 2
-                self.en_passant_target = (mid_row, start_col)
-            else:
-                # otherwise reset
-                self.en_passant_target = None
+                self.ep_square = mid_row * BOARD_WIDTH + start_col
 
     def switch_turn(self):
         """Switch the current player."""
-        self.current_player = self.players[1] if self.current_player == self.players[0] else self.players[0]
+        self.turn ^= 1
 
     def is_valid_move(self, piece, start_pos, end_pos):
         """Wrapper for checking if a move is valid via Rules."""
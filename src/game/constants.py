@@ -10,6 +10,31 @@ WHITE_TILE_COLOR = (235, 235, 208)
 BLACK_TILE_COLOR = (119, 148, 85)
 HIGHLIGHT_COLOR = (186, 202, 68)
 
+# compact piece encoding: code = (color << 3) | piece type
+WHITE = 0
+BLACK = 1
+COLOR_NAMES = ("white", "black")
+
+PAWN = 1
+KNIGHT = 2
+BISHOP = 3
+ROOK = 4
+QUEEN = 5
+KING = 6
+PIECE_NAMES = (None, "pawn", "knight", "bishop", "rook", "queen", "king")
+PROMOTION_CODES = {"knight": KNIGHT, "bishop": BISHOP, "rook": ROOK, "queen": QUEEN}
+
+# castling rights bitmask
+CASTLE_WHITE_K = 1
+CASTLE_WHITE_Q = 2
+CASTLE_BLACK_K = 4
+CASTLE_BLACK_Q = 8
+CASTLE_ALL = 15
+CASTLING_KEYS = (
+    ("white_k", CASTLE_WHITE_K), ("white_q", CASTLE_WHITE_Q),
+    ("black_k", CASTLE_BLACK_K), ("black_q", CASTLE_BLACK_Q),
+)
+
 
 """
 TODO: Possibili costanti future
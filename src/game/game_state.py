@@ -2,7 +2,7 @@ import pygame as pg
 from typing import Optional, Tuple, List, Dict, Any
 from src.game.board import Board
 from src.game.rules import Rules
-from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT
+from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, KNIGHT, BISHOP, KING
 
 
 Position = Tuple[int, int]  # (row, col)
@@ -99,6 +99,7 @@ class GameState:
         """Attach a Board and reset all counters for a new game."""
         self.board = board
         self.current_color = "white"
+        board.turn = WHITE
         self.halfmove_clock = 0
         self.fullmove_number = 1
         self.en_passant_target = getattr(board, "en_passant_target", None)
@@ -112,9 +113,10 @@ class GameState:
     # -------------------------
     # Apply / record moves
     # -------------------------
-    def apply_move(self, start_pos: Position, end_pos: Position) -> bool:
+    def apply_move(self, start_pos: Position, end_pos: Position, promotion: Optional[str] = None) -> bool:
         """
         Apply a move on the attached board.
+        promotion: piece type name for a promoting pawn (default queen).
         This method:
          - validates & executes the move via board.move_piece
          - updates internal clocks and counters
@@ -147,6 +149,7 @@ class GameState:
             "prev_castling_rights": getattr(self.board, "castling_rights", None),
             "prev_halfmove": self.halfmove_clock,
             "prev_fullmove": self.fullmove_number,
+            "position_hash": self.board.hash,  # position before the move, for repetition checks
             # placeholders for special-case data
             "castle": None,
             "promotion": None,
@@ -165,7 +168,7 @@ class GameState:
         promotion_possible = moving_piece.type.lower() == "pawn" and (end_row == 0 or end_row == 7)
 
         # Execute the move using Board's logic (it already calls Rules)
-        moved = self.board.move_piece(start_pos, end_pos)
+        moved = self.board.move_piece(start_pos, end_pos, promotion)
         if not moved:
             return False
 
@@ -304,6 +307,9 @@ class GameState:
             except ValueError:
                 pass
 
+        # the squares were edited directly: bring the board's Zobrist hash back in line
+        self.board.rehash()
+
         # Finally, switch turn back
         self._switch_turn(backwards=True)
 
@@ -319,6 +325,9 @@ class GameState:
             self.current_color = "white" if self.current_color == "black" else "black"
         else:
             self.current_color = "white" if self.current_color == "black" else "black"
+        # keep the board's side to move in sync (Board.move_piece checks it)
+        if self.board is not None:
+            self.board.turn = WHITE if self.current_color == "white" else BLACK
 
     # -------------------------
     # Check / checkmate stubs
@@ -345,6 +354,50 @@ class GameState:
         except Exception:
             return False
 
+    def get_outcome(self) -> Optional[Tuple[str, str]]:
+        """
+        Return (result, reason) once the game is over, e.g. ("1-0", "checkmate"),
+        ("1/2-1/2", "stalemate"), ("1/2-1/2", "fifty-move rule"), ("1/2-1/2",
+        "threefold repetition") or ("1/2-1/2", "insufficient material"); None while it goes on.
+        """
+        if self.board is None:
+            return None
+        if not Rules.has_legal_move(self.board, self.current_color):
+            if Rules.is_in_check(self.board, self.current_color):
+                return ("0-1" if self.current_color == "white" else "1-0"), "checkmate"
+            return "1/2-1/2", "stalemate"
+        if self.halfmove_clock >= 100:
+            return "1/2-1/2", "fifty-move rule"
+        if self._repetitions() >= 2:
+            return "1/2-1/2", "threefold repetition"
+        if self._insufficient_material():
+            return "1/2-1/2", "insufficient material"
+        return None
+
+    def _repetitions(self) -> int:
+        """How many earlier positions equal the current one (since the last pawn move or capture)."""
+        if self.halfmove_clock < 4:
+            return 0
+        key = self.board.hash
+        recent = self.move_history[-self.halfmove_clock:]
+        return sum(1 for entry in recent if entry.get("position_hash") == key)
+
+    def _insufficient_material(self) -> bool:
+        """Only kings left, plus at most one knight or bishop."""
+        minors = 0
+        for piece in self.board.squares:
+            if piece is None:
+                continue
+            piece_type = piece.kind.type_code
+            if piece_type == KING:
+                continue
+            if piece_type not in (KNIGHT, BISHOP):
+                return False
+            minors += 1
+            if minors > 1:
+                return False
+        return True
+
     # -------------------------
     # Utilities: history access
     # -------------------------
@@ -1,5 +1,60 @@
+import re
 import pygame as pg
-from src.game.pieces import Piece
+from src.game.board import Board
+from src.game.constants import (
+    BOARD_WIDTH, BOARD_HEIGHT, PROMOTION_CODES, WHITE, BLACK,
+    PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, CASTLING_KEYS
+)
+from src.game.game_state import GameState
+from src.game.pieces import Piece, PieceKind
+from src.game.rules import Rules
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+_FEN_CASTLING = "KQkq"  # same order as CASTLING_KEYS
+_FEN_PIECES = {kind.symbol: kind for kind in (PieceKind.from_code(code) for code in range(16)) if kind}
+# castling right -> (home square of the king, home square of the rook)
+_CASTLING_HOMES = {"white_k": (60, 63), "white_q": (60, 56), "black_k": (4, 7), "black_q": (4, 0)}
+
+_UCI_PROMOTIONS = {"n": "knight", "b": "bishop", "r": "rook", "q": "queen"}
+_UCI_LETTERS = {PROMOTION_CODES[name]: letter for letter, name in _UCI_PROMOTIONS.items()}
+
+_SAN_PIECES = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+_SAN_LETTERS = {code: letter for letter, code in _SAN_PIECES.items()}
+_SAN_RE = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+PGN_RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+_PGN_TAG_RE = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+_PGN_TOKEN_RE = re.compile(r"\{[^}]*\}|;[^\n]*|\$\d+|\(|\)|1-0|0-1|1/2-1/2|\*|\d+\.(?:\.\.)?|[^\s{}();$]+")
+_SEVEN_TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+
+def _pgn_tags(headers, result, start_fen):
+    """Seven tag roster (plus SetUp/FEN for a non-standard start) updated with headers."""
+    tags = {name: "?" for name in _SEVEN_TAG_ROSTER}
+    tags["Result"] = result
+    if start_fen and start_fen != START_FEN:
+        tags["SetUp"] = "1"
+        tags["FEN"] = start_fen
+    tags.update(headers or {})
+    return tags
+
+
+def _pgn_text(tags, tokens):
+    """Tag section plus movetext wrapped at 79 columns."""
+    movetext = []
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            movetext.append(line)
+            line = token
+        elif token == ")" or line.endswith("("):
+            line += token
+        else:
+            line = f"{line} {token}" if line else token
+    movetext.append(line)
+    lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+    return "\n".join(lines) + "\n\n" + "\n".join(movetext) + "\n"
 
 
 class Notation:
@@ -137,6 +192,418 @@ class Notation:
         }
         return move_data
 
+    # UCI COORDINATE MOVES
+
+    @staticmethod
+    def move_to_uci(move):
+        """
+        Convert a (start_sq, end_sq, promotion_code) move tuple into UCI coordinates.
+        Example: (52, 36, 0) -> 'e2e4', (12, 4, 5) -> 'e7e8q'
+        """
+        start_sq, end_sq, promotion = move
+        text = (Notation.pos_to_notation(divmod(start_sq, BOARD_WIDTH))
+                + Notation.pos_to_notation(divmod(end_sq, BOARD_WIDTH)))
+        if promotion:
+            text += _UCI_LETTERS[promotion]
+        return text
+
+    @staticmethod
+    def parse_uci(text):
+        """
+        Parse a UCI coordinate move ('e2e4', 'e7e8q') into a
+        (start_sq, end_sq, promotion_code) tuple. Raises ValueError if malformed.
+        """
+        text = text.strip().lower()
+        if len(text) not in (4, 5):
+            raise ValueError(f"Invalid UCI move: {text!r}")
+        squares = []
+        for square in (text[0:2], text[2:4]):
+            if not ("a" <= square[0] <= "h" and "1" <= square[1] <= "8"):
+                raise ValueError(f"Invalid UCI move: {text!r}")
+            row, col = Notation.notation_to_pos(square)
+            squares.append(row * BOARD_WIDTH + col)
+        promotion = 0
+        if len(text) == 5:
+            if text[4] not in _UCI_PROMOTIONS:
+                raise ValueError(f"Invalid UCI promotion: {text!r}")
+            promotion = PROMOTION_CODES[_UCI_PROMOTIONS[text[4]]]
+        return squares[0], squares[1], promotion
+
+    # SAN (STANDARD ALGEBRAIC NOTATION)
+
+    @staticmethod
+    def move_to_san(board, move):
+        """
+        Convert a legal (start_sq, end_sq, promotion_code) move for the side to move
+        into SAN, with disambiguation and check/mate suffix. Example: 'Nbd7', 'exd6', 'O-O+'
+        """
+        start_sq, end_sq, promotion = move
+        squares = board.squares
+        kind = squares[start_sq].kind
+        piece_type = kind.type_code
+
+        if piece_type == KING and abs(end_sq - start_sq) == 2:
+            san = "O-O" if end_sq > start_sq else "O-O-O"
+        else:
+            end_not = Notation.pos_to_notation(divmod(end_sq, BOARD_WIDTH))
+            capture = squares[end_sq] is not None or (piece_type == PAWN and end_sq == board.ep_square)
+            if piece_type == PAWN:
+                start_file = chr(start_sq % BOARD_WIDTH + ord('a'))
+                san = f"{start_file}x{end_not}" if capture else end_not
+                if promotion:
+                    san += "=" + _SAN_LETTERS[promotion]
+            else:
+                # disambiguate between same-type pieces that can reach the square
+                rivals = [
+                    other for other, target, _ in Rules.generate_moves(board, kind.color_code, piece_type)
+                    if target == end_sq and other != start_sq and squares[other].kind is kind
+                    and Rules.leaves_king_safe(board, other, target)
+                ]
+                origin = ""
+                if rivals:
+                    start_not = Notation.pos_to_notation(divmod(start_sq, BOARD_WIDTH))
+                    if all(other % BOARD_WIDTH != start_sq % BOARD_WIDTH for other in rivals):
+                        origin = start_not[0]
+                    elif all(other // BOARD_WIDTH != start_sq // BOARD_WIDTH for other in rivals):
+                        origin = start_not[1]
+                    else:
+                        origin = start_not
+                san = _SAN_LETTERS[piece_type] + origin + ("x" if capture else "") + end_not
+
+        undo = board.make_move(start_sq, end_sq, promotion)
+        if Rules.is_in_check(board, board.turn):
+            san += "+" if Rules.has_legal_move(board) else "#"
+        board.unmake_move(undo)
+        return san
+
+    @staticmethod
+    def san_to_move(board, san):
+        """
+        Resolve a SAN move for the side to move into a legal
+        (start_sq, end_sq, promotion_code) tuple. Raises ValueError if it is
+        malformed, illegal or ambiguous.
+        """
+        text = san.strip().rstrip("+#!?")
+        color = board.turn
+        if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+            king_sq = board.king_square(color)
+            target = king_sq + (2 if len(text) == 3 else -2)
+            for move in Rules.generate_moves(board, color, KING):
+                if move[0] == king_sq and move[1] == target and Rules.leaves_king_safe(board, *move):
+                    return move
+            raise ValueError(f"Illegal castling: {san!r}")
+
+        match = _SAN_RE.match(text)
+        if match is None:
+            raise ValueError(f"Invalid SAN move: {san!r}")
+        letter, from_file, from_rank, _, target, promotion = match.groups()
+        piece_type = _SAN_PIECES[letter] if letter else PAWN
+        piece_code = (color << 3) | piece_type
+        row, col = Notation.notation_to_pos(target)
+        end_sq = row * BOARD_WIDTH + col
+        promotion_code = _SAN_PIECES[promotion] if promotion else 0
+        file_col = ord(from_file) - ord('a') if from_file else None
+        rank_row = 8 - int(from_rank) if from_rank else None
+
+        squares = board.squares
+        found = []
+        for move in Rules.generate_moves(board, color, piece_type):
+            start_sq, move_end, move_promotion = move
+            if move_end != end_sq or squares[start_sq].kind.code != piece_code:
+                continue
+            if move_promotion and move_promotion != (promotion_code or QUEEN):
+                continue
+            if file_col is not None and start_sq % BOARD_WIDTH != file_col:
+                continue
+            if rank_row is not None and start_sq // BOARD_WIDTH != rank_row:
+                continue
+            if Rules.leaves_king_safe(board, start_sq, move_end, move_promotion):
+                found.append(move)
+        if len(found) != 1:
+            raise ValueError(f"{'Ambiguous' if found else 'Illegal'} SAN move: {san!r}")
+        return found[0]
+
+    @staticmethod
+    def history_to_moves(game_state):
+        """Return the game's move_history as (start_sq, end_sq, promotion_code) tuples."""
+        moves = []
+        for entry in game_state.move_history:
+            (start_row, start_col), (end_row, end_col) = entry["start_pos"], entry["end_pos"]
+            promotion = entry.get("promotion")
+            moves.append((start_row * BOARD_WIDTH + start_col, end_row * BOARD_WIDTH + end_col,
+                          PROMOTION_CODES[promotion["promoted_to"]] if promotion else 0))
+        return moves
+
+    # PGN
+
+    @staticmethod
+    def read_pgn(lines):
+        """
+        Parse PGN text (any iterable of lines, e.g. an open file) and yield one dict
+        per game: {"headers": {...}, "moves": [san, ...], "result": "1-0"}.
+        Comments, NAGs and variations are skipped.
+        """
+        headers = {}
+        movetext = []
+        for line in lines:
+            stripped = line.strip()
+            tag = _PGN_TAG_RE.match(stripped) if stripped.startswith("[") else None
+            if tag:
+                if movetext:
+                    yield Notation._parse_movetext(headers, "\n".join(movetext))
+                    headers, movetext = {}, []
+                headers[tag.group(1)] = tag.group(2).replace('\\"', '"')
+            elif stripped and not stripped.startswith("%"):
+                movetext.append(stripped)
+        if headers or movetext:
+            yield Notation._parse_movetext(headers, "\n".join(movetext))
+
+    @staticmethod
+    def _parse_movetext(headers, text):
+        moves = []
+        result = headers.get("Result", "*")
+        depth = 0  # variation nesting
+        for token in _PGN_TOKEN_RE.findall(text):
+            first = token[0]
+            if first == "(":
+                depth += 1
+            elif first == ")":
+                depth = max(0, depth - 1)
+            elif depth or first in "{;$" or token[-1] == ".":
+                continue
+            elif token in PGN_RESULTS:
+                result = token
+            else:
+                moves.append(token)
+        return {"headers": headers, "moves": moves, "result": result}
+
+    @staticmethod
+    def to_pgn(moves, headers=None, result="*", start_fen=None, comments=None):
+        """
+        Build PGN text for a list of (start_sq, end_sq, promotion_code) moves.
+        comments: optional {ply_index: text} added after the move with that index.
+        """
+        tags = _pgn_tags(headers, result, start_fen)
+        game_state = Notation.from_fen(start_fen or START_FEN)
+        board = game_state.board
+        number = game_state.fullmove_number
+        tokens = []
+        for ply, move in enumerate(moves):
+            if board.turn == WHITE:
+                tokens.append(f"{number}.")
+            elif ply == 0:
+                tokens.append(f"{number}...")
+            tokens.append(Notation.move_to_san(board, move))
+            if comments and ply in comments:
+                tokens.append("{" + comments[ply].replace("}", ")") + "}")
+            board.make_move(*move)
+            if board.turn == WHITE:
+                number += 1
+        tokens.append(tags["Result"])
+        return _pgn_text(tags, tokens)
+
+    @staticmethod
+    def tree_to_pgn(tree, headers=None, result="*"):
+        """
+        Build PGN text for a variation.GameTree: main line with every sideline
+        in parentheses and node comments in braces.
+        """
+        tags = _pgn_tags(headers, result, tree.start_fen)
+        tokens = []
+        if tree.root.comment:
+            tokens.append("{" + tree.root.comment.replace("}", ")") + "}")
+        Notation._line_tokens(tree, tree.root, tokens)
+        tokens.append(tags["Result"])
+        return _pgn_text(tags, tokens)
+
+    @staticmethod
+    def _line_tokens(tree, node, tokens, need_number=True):
+        """
+        Movetext from node on: each main-line move is followed by its alternatives.
+        need_number: black's next move gets "N..." (at the start and after comments / variations).
+        """
+        while node.children:
+            main = node.children[0]
+            need_number = Notation._move_tokens(tree, main, tokens, need_number)
+            for sideline in node.children[1:]:
+                tokens.append("(")
+                Notation._line_tokens(tree, sideline, tokens, Notation._move_tokens(tree, sideline, tokens, True))
+                tokens.append(")")
+                need_number = True
+            node = main
+
+    @staticmethod
+    def _move_tokens(tree, node, tokens, need_number):
+        """Append one move (with its number and comment); returns need_number for the next move."""
+        number = tree.fullmove_number(node.ply - 1)
+        if tree.mover(node) == WHITE:
+            tokens.append(f"{number}.")
+        elif need_number:
+            tokens.append(f"{number}...")
+        tokens.append(node.san)
+        if node.comment:
+            tokens.append("{" + node.comment.replace("}", ")") + "}")
+            return True
+        return False
+
+    @staticmethod
+    def read_pgn_tree(text):
+        """
+        Parse the first game of PGN text into a variation.GameTree, keeping
+        variations and comments. Returns (tree, headers, result); the tree is
+        left at its root. Raises ValueError for illegal moves.
+        """
+        from src.game.variation import GameTree  # deferred: variation builds on Notation
+
+        headers = {}
+        movetext = []
+        for line in text.splitlines():
+            stripped = line.strip()
+            tag = _PGN_TAG_RE.match(stripped) if stripped.startswith("[") else None
+            if tag:
+                if movetext:
+                    break  # only the first game
+                headers[tag.group(1)] = tag.group(2).replace('\\"', '"')
+            elif stripped and not stripped.startswith("%"):
+                movetext.append(stripped)
+
+        tree = GameTree(headers["FEN"] if headers.get("SetUp") == "1" and "FEN" in headers else START_FEN)
+        result = headers.get("Result", "*")
+        starts = []  # node each open variation returns to
+        opening = None  # comment before the first move of a variation, kept for that move
+        opened = False  # no move read yet since the last "("
+        for token in _PGN_TOKEN_RE.findall("\n".join(movetext)):
+            first = token[0]
+            if first == "(":
+                starts.append(tree.current)
+                tree.back()  # a variation replaces the move just played
+                opened = True
+            elif first == ")":
+                if starts:
+                    tree.goto(starts.pop())
+                opening, opened = None, False
+            elif first == "{":
+                comment = token[1:-1].strip()
+                if opened:
+                    opening = f"{opening} {comment}" if opening else comment
+                else:
+                    node = tree.current
+                    node.comment = f"{node.comment} {comment}" if node.comment else comment
+            elif first in ";$" or token[-1] == ".":
+                continue
+            elif token in PGN_RESULTS:
+                result = token
+            else:
+                tree.add_san(token, opening)
+                opening, opened = None, False
+        tree.goto(tree.root)
+        return tree, headers, result
+
+    # FEN
+
+    @staticmethod
+    def to_fen(game_state: GameState) -> str:
+        """Describe the game state's position as a FEN string."""
+        board = game_state.board
+        rows = []
+        for row in range(BOARD_HEIGHT):
+            text = ""
+            empty = 0
+            for piece in board.squares[row * BOARD_WIDTH:(row + 1) * BOARD_WIDTH]:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += piece.kind.symbol
+            if empty:
+                text += str(empty)
+            rows.append(text)
+
+        castling = "".join(
+            letter for letter, (key, bit) in zip(_FEN_CASTLING, CASTLING_KEYS) if board.castling & bit
+        ) or "-"
+        ep = Notation.pos_to_notation(board.en_passant_target) if board.ep_square >= 0 else "-"
+        side = "w" if board.turn == WHITE else "b"
+        return (f"{'/'.join(rows)} {side} {castling} {ep} "
+                f"{game_state.halfmove_clock} {game_state.fullmove_number}")
+
+    @staticmethod
+    def from_fen(fen: str, game_state: GameState = None) -> GameState:
+        """
+        Set up a GameState (a new one unless given) from a FEN string.
+        Raises ValueError if the FEN is malformed.
+        """
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"Invalid FEN: {fen!r}")
+        placement, side, castling, ep = fields[:4]
+        halfmove = int(fields[4]) if len(fields) > 4 else 0
+        fullmove = int(fields[5]) if len(fields) > 5 else 1
+
+        rows = placement.split("/")
+        if len(rows) != BOARD_HEIGHT or side not in ("w", "b"):
+            raise ValueError(f"Invalid FEN: {fen!r}")
+
+        if game_state is None:
+            game_state = GameState(Board())
+        elif game_state.board is None:
+            game_state.start_new_game(Board())
+        board = game_state.board
+        squares = board.squares
+        for index in range(len(squares)):
+            squares[index] = None
+
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                    continue
+                kind = _FEN_PIECES.get(char)
+                if kind is None or col >= BOARD_WIDTH:
+                    raise ValueError(f"Invalid FEN: {fen!r}")
+                piece = Piece(kind.type, kind.color, (row, col))
+                if kind.type_code == PAWN:
+                    piece.has_moved = row != (6 if kind.color_code == WHITE else 1)
+                elif kind.type_code in (ROOK, KING):
+                    piece.has_moved = True  # cleared below for pieces that may still castle
+                squares[row * BOARD_WIDTH + col] = piece
+                col += 1
+            if col != BOARD_WIDTH:
+                raise ValueError(f"Invalid FEN: {fen!r}")
+
+        board.castling = 0
+        for letter, (key, bit) in zip(_FEN_CASTLING, CASTLING_KEYS):
+            if letter in castling:
+                king_sq, rook_sq = _CASTLING_HOMES[key]
+                king, rook = squares[king_sq], squares[rook_sq]
+                if king is None or rook is None or king.type != "king" or rook.type != "rook":
+                    continue  # ignore rights the position cannot have
+                board.castling |= bit
+                king.has_moved = False
+                rook.has_moved = False
+
+        game_state.start_new_game(board)
+        board.ep_square = -1
+        if ep != "-":
+            board.en_passant_target = Notation.notation_to_pos(ep)
+        board.turn = WHITE if side == "w" else BLACK
+        board.selected_piece = None
+        board.last_move = None
+        board.captured_pieces = []
+        board.king_square(WHITE)
+        board.king_square(BLACK)
+        board.rehash()
+
+        game_state.current_color = "white" if side == "w" else "black"
+        game_state.halfmove_clock = halfmove
+        game_state.fullmove_number = fullmove
+        game_state.en_passant_target = board.en_passant_target
+        game_state.castling_rights = board.castling_rights
+        return game_state
+
     # UTILITY HELPERS
 
     @staticmethod
@@ -1,14 +1,162 @@
 import pygame as pg
-from src.game.constants import TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT
+from src.game.constants import (
+    TILE_SIZE, BOARD_WIDTH, BOARD_HEIGHT,
+    WHITE, BLACK, COLOR_NAMES, PIECE_NAMES,
+    PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+)
 from src.utils.assets import get_piece_image
 
+PIECE_SYMBOLS = (None, "p", "n", "b", "r", "q", "k")
+
+# movement patterns as (row, col) steps
+KNIGHT_STEPS = ((2, 1), (2, -1), (-2, 1), (-2, -1),
+                (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1),
+              (1, 1), (1, -1), (-1, 1), (-1, -1))
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+SLIDER_DIRECTIONS = {
+    ROOK: ROOK_DIRECTIONS,
+    BISHOP: BISHOP_DIRECTIONS,
+    QUEEN: ROOK_DIRECTIONS + BISHOP_DIRECTIONS,
+}
+
+
+def _step_targets(steps):
+    """For every square index, the squares reachable with one of the given steps."""
+    table = []
+    for square in range(BOARD_WIDTH * BOARD_HEIGHT):
+        row, col = divmod(square, BOARD_WIDTH)
+        table.append(tuple(
+            (row + dr) * BOARD_WIDTH + col + dc for dr, dc in steps
+            if 0 <= row + dr < BOARD_HEIGHT and 0 <= col + dc < BOARD_WIDTH
+        ))
+    return tuple(table)
+
+
+def _ray_targets(directions):
+    """For every square index, one tuple of squares per direction (nearest first)."""
+    table = []
+    for square in range(BOARD_WIDTH * BOARD_HEIGHT):
+        row, col = divmod(square, BOARD_WIDTH)
+        rays = []
+        for dr, dc in directions:
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < BOARD_HEIGHT and 0 <= c < BOARD_WIDTH:
+                ray.append(r * BOARD_WIDTH + c)
+                r += dr
+                c += dc
+            if ray:
+                rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return tuple(table)
+
+
+# precomputed square tables used by move generation and attack detection
+KNIGHT_TARGETS = _step_targets(KNIGHT_STEPS)
+KING_TARGETS = _step_targets(KING_STEPS)
+ROOK_RAYS = _ray_targets(ROOK_DIRECTIONS)
+BISHOP_RAYS = _ray_targets(BISHOP_DIRECTIONS)
+
+
+class PieceKind:
+    """
+    Immutable descriptor shared by every piece of the same color and type (flyweight).
+    Holds the small integer codes, the string names and the lazily loaded image.
+    """
+
+    __slots__ = ("code", "type_code", "color_code", "type", "color", "symbol", "_image")
+
+    def __init__(self, color_code: int, type_code: int):
+        init = object.__setattr__
+        init(self, "code", (color_code << 3) | type_code)
+        init(self, "type_code", type_code)
+        init(self, "color_code", color_code)
+        init(self, "type", PIECE_NAMES[type_code])
+        init(self, "color", COLOR_NAMES[color_code])
+        symbol = PIECE_SYMBOLS[type_code]
+        init(self, "symbol", symbol.upper() if color_code == WHITE else symbol)
+        init(self, "_image", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PieceKind is immutable")
+
+    def __reduce__(self):
+        # unpickle to the shared instance (keeps identity across processes)
+        return (PieceKind.from_code, (self.code,))
+
+    def __repr__(self):
+        return f"PieceKind({self.color}, {self.type})"
+
+    @property
+    def image(self) -> pg.Surface:
+        """Piece image, loaded on first use and shared by all pieces of this kind."""
+        if self._image is None:
+            object.__setattr__(self, "_image", get_piece_image(self.color, self.type))
+        return self._image
+
+    @staticmethod
+    def get(color: str, piece_type: str) -> "PieceKind":
+        """Return the shared descriptor for a color/type pair given by name."""
+        return _KINDS_BY_NAME[(color.lower(), piece_type.lower())]
+
+    @staticmethod
+    def from_code(code: int) -> "PieceKind":
+        """Return the shared descriptor for an integer piece code."""
+        return _KINDS[code]
+
+
+_KINDS = [None] * 16
+_KINDS_BY_NAME = {}
+for _color in (WHITE, BLACK):
+    for _type in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+        _kind = PieceKind(_color, _type)
+        _KINDS[_kind.code] = _kind
+        _KINDS_BY_NAME[(_kind.color, _kind.type)] = _kind
+
+
 class Piece:
+    __slots__ = ("kind", "square", "has_moved")
+
     def __init__(self, piece_type, color, position):
-        self.type = piece_type  # 'pawn', 'rook', 'knight', 'bishop', 'queen', 'king'
-        self.color = color      # 'white' or 'black'
-        self.position = position  # (row, col)
+        self.kind = PieceKind.get(color, piece_type)  # shared descriptor (type, color, image)
+        self.square = position[0] * BOARD_WIDTH + position[1]  # index into Board.squares
         self.has_moved = False
-        self.image = get_piece_image(color, piece_type)
+
+    # String-typed compatibility view
+
+    @property
+    def type(self) -> str:
+        return self.kind.type  # 'pawn', 'rook', 'knight', 'bishop', 'queen', 'king'
+
+    @type.setter
+    def type(self, piece_type: str):
+        # promotion (and its undo) swaps the shared descriptor
+        self.kind = PieceKind.get(self.kind.color, piece_type)
+
+    @property
+    def color(self) -> str:
+        return self.kind.color  # 'white' or 'black'
+
+    @property
+    def position(self):
+        return divmod(self.square, BOARD_WIDTH)  # (row, col)
+
+    @position.setter
+    def position(self, position):
+        self.square = position[0] * BOARD_WIDTH + position[1]
+
+    @property
+    def image(self) -> pg.Surface:
+        return self.kind.image
+
+    @property
+    def code(self) -> int:
+        return self.kind.code
+
+    def __repr__(self):
+        return f"Piece({self.color}, {self.type}, {self.position})"
 
     def _is_on_board(self, r, c):
         # Check if the position is within the board boundaries
@@ -17,76 +165,48 @@ class Piece:
     def get_valid_moves(self, board):
         # Return a list of valid moves for this piece
         moves = []
-        row, col = self.position
+        squares = board.squares
+        color = self.kind.color_code
+        piece_type = self.kind.type_code
+        row, col = divmod(self.square, BOARD_WIDTH)
 
-        if self.type == 'pawn':
-            direction = -1 if self.color == 'white' else 1
+        if piece_type == PAWN:
+            direction = -1 if color == WHITE else 1
+            r = row + direction
+            if not self._is_on_board(r, col):
+                return moves
             # Move forward one square
-            if self._is_on_board(row + direction, col) and board.tiles[row + direction][col] is None:
-                moves.append((row + direction, col))
+            if squares[r * BOARD_WIDTH + col] is None:
+                moves.append((r, col))
                 # Move forward two squares from starting position
-                if not self.has_moved and self._is_on_board(row + 2 * direction, col) and board.tiles[row + 2 * direction][col] is None:
-                    moves.append((row + 2 * direction, col))
+                r2 = r + direction
+                if not self.has_moved and self._is_on_board(r2, col) and squares[r2 * BOARD_WIDTH + col] is None:
+                    moves.append((r2, col))
             # Capture diagonally
-            for dc in [-1, 1]:
-                r, c = row + direction, col + dc
+            for c in (col - 1, col + 1):
                 if self._is_on_board(r, c):
-                    target = board.tiles[r][c]
-                    if target and target.color != self.color:
+                    target = squares[r * BOARD_WIDTH + c]
+                    if target is not None and target.kind.color_code != color:
                         moves.append((r, c))
 
-        elif self.type == 'rook':
-            directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-            for dr, dc in directions:
-                r, c = row + dr, col + dc
-                while self._is_on_board(r, c):
-                    target = board.tiles[r][c]
-                    if target is None:
-                        moves.append((r, c))
-                    elif target.color != self.color:
-                        moves.append((r, c))
-                        break
-                    else:
-                        break
-                    r += dr
-                    c += dc
-
-        elif self.type == 'knight':
-            knight_moves = [(2, 1), (2, -1), (-2, 1), (-2, -1),
-                            (1, 2), (1, -2), (-1, 2), (-1, -2)]
-            for dr, dc in knight_moves:
+        elif piece_type == KNIGHT or piece_type == KING:
+            steps = KNIGHT_STEPS if piece_type == KNIGHT else KING_STEPS
+            for dr, dc in steps:
                 r, c = row + dr, col + dc
                 if self._is_on_board(r, c):
-                    target = board.tiles[r][c]
-                    if target is None or target.color != self.color:
+                    target = squares[r * BOARD_WIDTH + c]
+                    if target is None or target.kind.color_code != color:
                         moves.append((r, c))
+            # Castling moves can be added here
 
-        elif self.type == 'bishop':
-            directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-            for dr, dc in directions:
-                r, c = row + dr, col + dc
-                while self._is_on_board(r, c):
-                    target = board.tiles[r][c]
-                    if target is None:
-                        moves.append((r, c))
-                    elif target.color != self.color:
-                        moves.append((r, c))
-                        break
-                    else:
-                        break
-                    r += dr
-                    c += dc
-
-        elif self.type == 'queen':
-            directions = [(1, 0), (-1, 0), (0, 1), (0, -1),
-                          (1, 1), (1, -1), (-1, 1), (-1, -1)]
-            for dr, dc in directions:
+        else:
+            for dr, dc in SLIDER_DIRECTIONS[piece_type]:
                 r, c = row + dr, col + dc
                 while self._is_on_board(r, c):
-                    target = board.tiles[r][c]
+                    target = squares[r * BOARD_WIDTH + c]
                     if target is None:
                         moves.append((r, c))
-                    elif target.color != self.color:
+                    elif target.kind.color_code != color:
                         moves.append((r, c))
                         break
                     else:
@@ -94,15 +214,4 @@ class Piece:
                     r += dr
                     c += dc
 
-        elif self.type == 'king':
-            king_moves = [(1, 0), (-1, 0), (0, 1), (0, -1),
-                          (1, 1), (1, -1), (-1, 1), (-1, -1)]
-            for dr, dc in king_moves:
-                r, c = row + dr, col + dc
-                if self._is_on_board(r, c):
-                    target = board.tiles[r][c]
-                    if target is None or target.color != self.color:
-                        moves.append((r, c))
-            # Castling moves can be added here
-
         return moves
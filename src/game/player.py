@@ -1,13 +1,46 @@
 import pygame as pg
 
 class Player:
+    __slots__ = ("color", "speed", "captured_pieces", "_position", "_velocity", "_size")
+
     def __init__(self, color: str):
-        self.position = pg.Vector2(100, 100)
-        self.velocity = pg.Vector2(0, 0)
-        self.speed = 5
-        self.size = pg.Vector2(50, 50)
         self.color = color  
+        self.speed = 5
         self.captured_pieces = []
+        # pygame vectors are only needed by the UI: created on first access
+        self._position = None
+        self._velocity = None
+        self._size = None
+
+    @property
+    def position(self):
+        if self._position is None:
+            self._position = pg.Vector2(100, 100)
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+
+    @property
+    def velocity(self):
+        if self._velocity is None:
+            self._velocity = pg.Vector2(0, 0)
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value):
+        self._velocity = value
+
+    @property
+    def size(self):
+        if self._size is None:
+            self._size = pg.Vector2(50, 50)
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
 
     def handle_input(self):
         keys = pg.key.get_pressed()
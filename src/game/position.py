@@ -0,0 +1,279 @@
+"""
+Immutable chess positions for branching analysis.
+
+A Position never changes: make_move returns a new one and the old one stays
+valid, so variations can be explored side by side and positions can be
+handed to other threads or processes without copying or undo bookkeeping.
+
+The squares are kept as 8 row tuples of piece codes ((color << 3) | type,
+0 = empty). A move rebuilds only the rows it touches (one or two, three for
+en passant and castling) and shares the other rows with its parent, so a new
+position costs O(changed squares), not a copy of the 64-square board. The
+Zobrist hash is updated incrementally and equals Board.hash of the same
+position, so positions can be looked up in the same tables as boards.
+"""
+
+from typing import Iterable, Tuple
+
+from src.game.board import Board, _CASTLING_KEEP
+from src.game.constants import BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, PAWN, ROOK, QUEEN, KING, CASTLING_KEYS
+from src.game.pieces import Piece, PieceKind
+from src.game.rules import Rules
+from src.game.zobrist import PIECE_KEYS, CASTLING_KEYS as CASTLING_HASH_KEYS, EP_KEYS, SIDE_KEYS, EP_CAPTURERS
+
+Move = Tuple[int, int, int]  # (start_sq, end_sq, promotion_code)
+
+_FEN_CASTLING = "KQkq"  # same order as CASTLING_KEYS
+
+
+class Position:
+    """One position: placement, side to move, castling rights, en passant and move counters."""
+
+    __slots__ = ("rows", "turn", "castling", "ep_square", "halfmove_clock", "fullmove_number", "_hash")
+
+    def __init__(self, rows, turn=WHITE, castling=0, ep_square=-1, halfmove_clock=0, fullmove_number=1,
+                 position_hash=None):
+        init = object.__setattr__
+        init(self, "rows", tuple(tuple(row) for row in rows))
+        init(self, "turn", turn)
+        init(self, "castling", castling)
+        if not self._can_take_en_passant(ep_square):
+            ep_square = -1  # like Board: only set when a pawn can take there
+        init(self, "ep_square", ep_square)
+        init(self, "halfmove_clock", halfmove_clock)
+        init(self, "fullmove_number", fullmove_number)
+        if position_hash is None:
+            position_hash = CASTLING_HASH_KEYS[castling] ^ EP_KEYS[ep_square + 1]
+            for square, code in enumerate(self.squares()):
+                if code:
+                    position_hash ^= PIECE_KEYS[code][square]
+        init(self, "_hash", position_hash)  # without the side to move, like Board._hash
+
+    @classmethod
+    def _derived(cls, rows, turn, castling, ep_square, halfmove_clock, fullmove_number, position_hash):
+        """Build a child position from already shared row tuples (no copying, no hashing)."""
+        position = object.__new__(cls)
+        init = object.__setattr__
+        init(position, "rows", rows)
+        init(position, "turn", turn)
+        init(position, "castling", castling)
+        init(position, "ep_square", ep_square)
+        init(position, "halfmove_clock", halfmove_clock)
+        init(position, "fullmove_number", fullmove_number)
+        init(position, "_hash", position_hash)
+        return position
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        return (Position._derived, (self.rows, self.turn, self.castling, self.ep_square,
+                                    self.halfmove_clock, self.fullmove_number, self._hash))
+
+    def __eq__(self, other):
+        # the move counters do not make positions different
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self._hash == other._hash and self.turn == other.turn and self.rows == other.rows
+                and self.castling == other.castling and self.ep_square == other.ep_square)
+
+    def __hash__(self):
+        return self.hash
+
+    def __repr__(self):
+        return f"Position({self.fen()!r})"
+
+    # -------------------------
+    # Conversions
+    # -------------------------
+    @staticmethod
+    def from_board(board: Board, halfmove_clock: int = 0, fullmove_number: int = 1) -> "Position":
+        codes = board.codes
+        rows = tuple(tuple(codes[start:start + BOARD_WIDTH])
+                     for start in range(0, BOARD_WIDTH * BOARD_HEIGHT, BOARD_WIDTH))
+        return Position._derived(rows, board.turn, board.castling, board.ep_square,
+                                 halfmove_clock, fullmove_number, board._hash)
+
+    @staticmethod
+    def from_game_state(game_state) -> "Position":
+        return Position.from_board(game_state.board, game_state.halfmove_clock, game_state.fullmove_number)
+
+    @staticmethod
+    def from_fen(fen: str) -> "Position":
+        """Raises ValueError if the FEN is malformed."""
+        from src.game.notation import Notation  # deferred: notation imports the game modules
+        return Position.from_game_state(Notation.from_fen(fen))
+
+    @staticmethod
+    def initial() -> "Position":
+        return Position.from_board(Board())
+
+    def to_game_state(self):
+        """A fresh, mutable GameState (with its own Board) set up on this position."""
+        from src.game.notation import Notation
+        return Notation.from_fen(self.fen())
+
+    def to_board(self) -> Board:
+        """A fresh Board set up on this position, built from the codes (no FEN parsing)."""
+        board = Board(setup=False)
+        squares = board.squares
+        castling = self.castling
+        for square, code in enumerate(self.squares()):
+            if not code:
+                continue
+            kind = PieceKind.from_code(code)
+            piece = Piece(kind.type, kind.color, divmod(square, BOARD_WIDTH))
+            if kind.type_code == PAWN:
+                piece.has_moved = square // BOARD_WIDTH != (6 if kind.color_code == WHITE else 1)
+            elif kind.type_code in (ROOK, KING):
+                # unmoved only while a castling right depends on this square
+                piece.has_moved = not castling & ~_CASTLING_KEEP[square]
+            squares[square] = piece
+        board.turn = self.turn
+        board.castling = castling
+        board.ep_square = self.ep_square
+        board.king_square(WHITE)
+        board.king_square(BLACK)
+        board.rehash()
+        return board
+
+    def fen(self) -> str:
+        placement = []
+        for row in self.rows:
+            text = ""
+            empty = 0
+            for code in row:
+                if not code:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += PieceKind.from_code(code).symbol
+            if empty:
+                text += str(empty)
+            placement.append(text)
+        castling = "".join(letter for letter, (_, bit) in zip(_FEN_CASTLING, CASTLING_KEYS) if self.castling & bit) or "-"
+        if self.ep_square >= 0:
+            row, col = divmod(self.ep_square, BOARD_WIDTH)
+            ep = "abcdefgh"[col] + str(BOARD_HEIGHT - row)
+        else:
+            ep = "-"
+        side = "w" if self.turn == WHITE else "b"
+        return f"{'/'.join(placement)} {side} {castling} {ep} {self.halfmove_clock} {self.fullmove_number}"
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    @property
+    def hash(self) -> int:
+        """Zobrist hash, side to move included (equal to Board.hash of the same position)."""
+        return self._hash ^ SIDE_KEYS[self.turn]
+
+    def __getitem__(self, square: int) -> int:
+        """Piece code on a square index (0 if empty)."""
+        return self.rows[square >> 3][square & 7]
+
+    def squares(self) -> Iterable[int]:
+        """The 64 piece codes in square index order."""
+        for row in self.rows:
+            yield from row
+
+    def _can_take_en_passant(self, ep_square: int) -> bool:
+        capturers = EP_CAPTURERS[ep_square] if ep_square >= 0 else None
+        return capturers is not None and any(self[square] == capturers[0] for square in capturers[1])
+
+    def king_square(self, color: int) -> int:
+        code = (color << 3) | KING
+        for square, piece in enumerate(self.squares()):
+            if piece == code:
+                return square
+        return -1
+
+    def legal_moves(self):
+        """Legal moves as (start_sq, end_sq, promotion_code); evaluated on a scratch Board."""
+        return Rules.get_legal_moves(self.to_board())
+
+    # -------------------------
+    # Moves
+    # -------------------------
+    def make_move(self, move: Move) -> "Position":
+        """
+        The position after a move (not validated, like Board.make_move). Only the
+        rows with changed squares are rebuilt; all others are shared with self.
+        """
+        start_sq, end_sq, promotion = move
+        code = self[start_sq]
+        if not code:
+            raise ValueError(f"No piece on square {start_sq}")
+        color = code >> 3
+        piece_type = code & 7
+        captured = self[end_sq]
+        changes = {start_sq: 0}
+        h = self._hash ^ PIECE_KEYS[code][start_sq] ^ EP_KEYS[self.ep_square + 1]
+        new_ep = -1
+        moved_code = code
+
+        if piece_type == PAWN:
+            if end_sq == self.ep_square and not captured:
+                # en passant: the captured pawn sits behind the landing square
+                capture_sq = end_sq + BOARD_WIDTH if color == WHITE else end_sq - BOARD_WIDTH
+                captured = self[capture_sq]
+                changes[capture_sq] = 0
+                h ^= PIECE_KEYS[captured][capture_sq]
+                captured = 0  # already removed from the hash
+            elif abs(end_sq - start_sq) == 2 * BOARD_WIDTH and self._can_take_en_passant((start_sq + end_sq) // 2):
+                new_ep = (start_sq + end_sq) // 2
+            if end_sq < BOARD_WIDTH or end_sq >= BOARD_WIDTH * (BOARD_HEIGHT - 1):
+                moved_code = (color << 3) | (promotion or QUEEN)
+        elif piece_type == KING and abs(end_sq - start_sq) == 2:
+            # castling: move the rook as well
+            if end_sq < start_sq:
+                rook_from, rook_to = start_sq - 4, start_sq - 1
+            else:
+                rook_from, rook_to = start_sq + 3, start_sq + 1
+            rook = self[rook_from]
+            if rook:
+                changes[rook_from] = 0
+                changes[rook_to] = rook
+                h ^= PIECE_KEYS[rook][rook_from] ^ PIECE_KEYS[rook][rook_to]
+
+        if captured:
+            h ^= PIECE_KEYS[captured][end_sq]
+        changes[end_sq] = moved_code
+
+        castling = self.castling & _CASTLING_KEEP[start_sq] & _CASTLING_KEEP[end_sq]
+        h ^= PIECE_KEYS[moved_code][end_sq] ^ EP_KEYS[new_ep + 1]
+        h ^= CASTLING_HASH_KEYS[self.castling] ^ CASTLING_HASH_KEYS[castling]
+
+        rows = list(self.rows)
+        for row in {square >> 3 for square in changes}:
+            cells = list(rows[row])
+            for square, value in changes.items():
+                if square >> 3 == row:
+                    cells[square & 7] = value
+            rows[row] = tuple(cells)
+
+        irreversible = piece_type == PAWN or self[end_sq] != 0  # resets the fifty-move counter
+        return Position._derived(
+            tuple(rows), self.turn ^ 1, castling, new_ep,
+            0 if irreversible else self.halfmove_clock + 1,
+            self.fullmove_number + (1 if self.turn == BLACK else 0),
+            h,
+        )
+
+    def play(self, moves: Iterable[Move]) -> "Position":
+        """The position after a sequence of moves."""
+        position = self
+        for move in moves:
+            position = position.make_move(move)
+        return position
+
+    def changed_squares(self, other: "Position") -> Tuple[int, ...]:
+        """Squares whose contents differ from other (cheap: shared rows are skipped by identity)."""
+        changed = []
+        for row, (mine, theirs) in enumerate(zip(self.rows, other.rows)):
+            if mine is theirs:
+                continue
+            changed.extend(row * BOARD_WIDTH + col for col in range(BOARD_WIDTH) if mine[col] != theirs[col])
+        return tuple(changed)
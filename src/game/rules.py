@@ -1,5 +1,25 @@
 import pygame as pg
-from src.game.pieces import Piece
+from src.game.constants import (
+    BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK,
+    PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    CASTLE_WHITE_K, CASTLE_WHITE_Q, CASTLE_BLACK_K, CASTLE_BLACK_Q
+)
+from src.game.pieces import (
+    Piece, KNIGHT_TARGETS, KING_TARGETS, ROOK_RAYS, BISHOP_RAYS
+)
+
+# (king home square, castling right bit, king target, squares that must be empty, square the king crosses)
+_CASTLING_MOVES = {
+    WHITE: ((60, CASTLE_WHITE_K, 62, (61, 62), 61), (60, CASTLE_WHITE_Q, 58, (59, 58, 57), 59)),
+    BLACK: ((4, CASTLE_BLACK_K, 6, (5, 6), 5), (4, CASTLE_BLACK_Q, 2, (3, 2, 1), 3)),
+}
+_SLIDER_RAYS = {
+    ROOK: ROOK_RAYS,
+    BISHOP: BISHOP_RAYS,
+    QUEEN: tuple(r + b for r, b in zip(ROOK_RAYS, BISHOP_RAYS)),
+}
+_PROMOTION_TYPES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
 
 class Rules:
 
@@ -12,10 +32,10 @@ class Rules:
         # General checks
         if start_pos == end_pos:
             return False  
-        if not (0 <= end_row < 8 and 0 <= end_col < 8):
+        if not (0 <= end_row < BOARD_HEIGHT and 0 <= end_col < BOARD_WIDTH):
             return False  # out of bounds
         
-        target = board.tiles[end_row][end_col]
+        target = board.squares[end_row * BOARD_WIDTH + end_col]
         if target and target.color == piece.color:
             return False  # No capturing own pieces
 
@@ -33,7 +53,13 @@ class Rules:
         if not rule_func:
             return False
 
-        return rule_func(board, piece, start_pos, end_pos)
+        if not rule_func(board, piece, start_pos, end_pos):
+            return False
+
+        # King safety: the move may not leave the mover's own king attacked
+        return Rules.leaves_king_safe(
+            board, start_row * BOARD_WIDTH + start_col, end_row * BOARD_WIDTH + end_col
+        )
 
 
     # PIECES MOVEMENT RULES
@@ -49,22 +75,22 @@ class Rules:
 
         # Movement forward
         if start_col == end_col:
-            if end_row == start_row + direction and board.tiles[end_row][end_col] is None:
+            if end_row == start_row + direction and board.squares[end_row * BOARD_WIDTH + end_col] is None:
                 return True
             # Initial two-square move
             if start_row == start_rank and end_row == start_row + 2 * direction:
-                if (board.tiles[start_row + direction][start_col] is None and 
-                    board.tiles[end_row][end_col] is None):
+                if (board.squares[(start_row + direction) * BOARD_WIDTH + start_col] is None and 
+                    board.squares[end_row * BOARD_WIDTH + end_col] is None):
                     return True
             return False
 
         # Capturing diagonally
         if abs(start_col - end_col) == 1 and end_row == start_row + direction:
-            target = board.tiles[end_row][end_col]
+            target = board.squares[end_row * BOARD_WIDTH + end_col]
             if target and target.color != piece.color:
                 return True
             # En passant
-            if hasattr(board, "en_passant_target") and board.en_passant_target == (end_row, end_col):
+            if board.ep_square == end_row * BOARD_WIDTH + end_col:
                 return True
 
         return False
@@ -140,18 +166,33 @@ class Rules:
             if piece.has_moved:
                 return False  # King has moved before
 
+            color = piece.kind.color_code
+            kingside = end_col > start_col
+            if color == WHITE:
+                right = CASTLE_WHITE_K if kingside else CASTLE_WHITE_Q
+            else:
+                right = CASTLE_BLACK_K if kingside else CASTLE_BLACK_Q
+            if not board.castling & right:
+                return False  # castling right already lost
+
             rook_col = 0 if end_col < start_col else 7
-            rook = board.tiles[start_row][rook_col]
+            rook = board.squares[start_row * BOARD_WIDTH + rook_col]
             if not rook or rook.type.lower() != "rook" or rook.color != piece.color or rook.has_moved:
                 return False  # Invalid rook for castling
 
             # Check clear path between king and rook
             step = 1 if rook_col == 7 else -1
             for col in range(start_col + step, rook_col, step):
-                if board.tiles[start_row][col] is not None:
+                if board.squares[start_row * BOARD_WIDTH + col] is not None:
                     return False  # Path not clear
 
-            # TODO: Check if king is in check before, during, or after castling
+            # The king may not castle out of or through check (the landing square
+            # is covered by the king safety test in is_valid_move)
+            enemy = color ^ 1
+            if Rules.is_square_attacked(board, start_row * BOARD_WIDTH + start_col, enemy):
+                return False
+            if Rules.is_square_attacked(board, start_row * BOARD_WIDTH + start_col + step, enemy):
+                return False
             return True
 
         return False
@@ -175,7 +216,7 @@ class Rules:
         row, col = start_row + row_step, start_col + col_step
 
         while (row, col) != (end_row, end_col):
-            if board.tiles[row][col] is not None:
+            if board.squares[row * BOARD_WIDTH + col] is not None:
                 return False
             row += row_step
             col += col_step
@@ -186,27 +227,211 @@ class Rules:
     # SPECIAL RULES AND CHECK LOGIC
 
     @staticmethod
-    def check_pawn_promotion(board, piece):
+    def check_pawn_promotion(board, piece, promotion="queen"):
         """Promote pawn if it reaches the last rank."""
         if piece.type.lower() == "pawn":
             row, _ = piece.position
             if (piece.color == "white" and row == 0) or (piece.color == "black" and row == 7):
-                piece.type = "queen"  # TODO: Allow player to choose promotion piece
+                piece.type = promotion
                 print(f"{piece.color.capitalize()} pawn promoted to {piece.type}!")
 
 
+    @staticmethod
+    def _color_code(color):
+        """Accept a color name ('white'/'black') or a color code."""
+        if isinstance(color, int):
+            return color
+        return WHITE if color == "white" else BLACK
+
+
+    @staticmethod
+    def is_square_attacked(board, square, by_color):
+        """
+        Return True if a piece of by_color (name or code) attacks the square index
+        (a lookup when an attacks.AttackMap follows the board).
+        """
+        by_color = Rules._color_code(by_color)
+        attack_map = board.attack_map
+        if attack_map is not None:
+            return attack_map.is_attacked(square, by_color)
+        squares = board.squares
+        row, col = divmod(square, BOARD_WIDTH)
+
+        # pawns attack diagonally forward, so look one row "behind" the square
+        pawn_row = row + 1 if by_color == WHITE else row - 1
+        if 0 <= pawn_row < BOARD_HEIGHT:
+            pawn_code = (by_color << 3) | PAWN
+            for c in (col - 1, col + 1):
+                if 0 <= c < BOARD_WIDTH:
+                    attacker = squares[pawn_row * BOARD_WIDTH + c]
+                    if attacker is not None and attacker.kind.code == pawn_code:
+                        return True
+
+        knight_code = (by_color << 3) | KNIGHT
+        for target in KNIGHT_TARGETS[square]:
+            attacker = squares[target]
+            if attacker is not None and attacker.kind.code == knight_code:
+                return True
+
+        king_code = (by_color << 3) | KING
+        for target in KING_TARGETS[square]:
+            attacker = squares[target]
+            if attacker is not None and attacker.kind.code == king_code:
+                return True
+
+        queen_code = (by_color << 3) | QUEEN
+        for slider_code, rays in (((by_color << 3) | ROOK, ROOK_RAYS), ((by_color << 3) | BISHOP, BISHOP_RAYS)):
+            for ray in rays[square]:
+                for target in ray:
+                    attacker = squares[target]
+                    if attacker is not None:
+                        code = attacker.kind.code
+                        if code == slider_code or code == queen_code:
+                            return True
+                        break
+
+        return False
+
+
     @staticmethod
     def is_in_check(board, color):
         """Return True if the given color's king is under attack."""
-        # TODO: Implement check detection logic
+        color = Rules._color_code(color)
+        king_sq = board.king_square(color)
+        if king_sq < 0:
+            return False
+        return Rules.is_square_attacked(board, king_sq, color ^ 1)
+
+
+    @staticmethod
+    def leaves_king_safe(board, start_sq, end_sq, promotion=0):
+        """Try the move on the board and report whether the mover's king is safe afterwards."""
+        color = board.squares[start_sq].kind.color_code
+        undo = board._apply(start_sq, end_sq, promotion)
+        safe = not Rules.is_in_check(board, color)
+        board._revert(undo)
+        return safe
+
+
+    # MOVE GENERATION
+
+    @staticmethod
+    def generate_moves(board, color=None, piece_type=None):
+        """
+        Pseudo-legal moves for color (default: side to move) as
+        (start_sq, end_sq, promotion_code) tuples, promotion_code 0 if none.
+        piece_type (a type code) restricts generation to that kind of piece.
+        """
+        color = board.turn if color is None else Rules._color_code(color)
+        squares = board.squares
+        moves = []
+        append = moves.append
+        last_row_start = BOARD_WIDTH * (BOARD_HEIGHT - 1)
+        # en passant only counts on the rank the opponent's pawn just skipped
+        ep_square = board.ep_square
+        if ep_square >= 0 and ep_square // BOARD_WIDTH != (2 if color == WHITE else 5):
+            ep_square = -1
+
+        for start, piece in enumerate(squares):
+            if piece is None:
+                continue
+            kind = piece.kind
+            if kind.color_code != color or (piece_type is not None and kind.type_code != piece_type):
+                continue
+            kind_type = kind.type_code
+
+            if kind_type == PAWN:
+                step = -BOARD_WIDTH if color == WHITE else BOARD_WIDTH
+                col = start % BOARD_WIDTH
+                one = start + step
+                targets = []
+                if squares[one] is None:
+                    targets.append(one)
+                    start_row = 6 if color == WHITE else 1
+                    if start // BOARD_WIDTH == start_row and squares[one + step] is None:
+                        targets.append(one + step)
+                for dc in (-1, 1):
+                    if 0 <= col + dc < BOARD_WIDTH:
+                        target = one + dc
+                        victim = squares[target]
+                        if (victim is not None and victim.kind.color_code != color) or target == ep_square:
+                            targets.append(target)
+                for target in targets:
+                    if target < BOARD_WIDTH or target >= last_row_start:
+                        for promotion in _PROMOTION_TYPES:
+                            append((start, target, promotion))
+                    else:
+                        append((start, target, 0))
+
+            elif kind_type == KNIGHT or kind_type == KING:
+                for target in (KNIGHT_TARGETS if kind_type == KNIGHT else KING_TARGETS)[start]:
+                    victim = squares[target]
+                    if victim is None or victim.kind.color_code != color:
+                        append((start, target, 0))
+
+            else:
+                for ray in _SLIDER_RAYS[kind_type][start]:
+                    for target in ray:
+                        victim = squares[target]
+                        if victim is None:
+                            append((start, target, 0))
+                        else:
+                            if victim.kind.color_code != color:
+                                append((start, target, 0))
+                            break
+
+        # castling
+        if piece_type is not None and piece_type != KING:
+            return moves
+        enemy = color ^ 1
+        for home, right, target, empty, crossed in _CASTLING_MOVES[color]:
+            if not board.castling & right:
+                continue
+            king = squares[home]
+            if king is None or king.kind.code != (color << 3) | KING:
+                continue
+            if any(squares[sq] is not None for sq in empty):
+                continue
+            if Rules.is_square_attacked(board, home, enemy) or Rules.is_square_attacked(board, crossed, enemy):
+                continue
+            append((home, target, 0))
+
+        return moves
+
+
+    @staticmethod
+    def get_legal_moves(board, color=None):
+        """Legal moves for color (default: side to move), same tuple format as generate_moves."""
+        color = board.turn if color is None else Rules._color_code(color)
+        legal = []
+        for move in Rules.generate_moves(board, color):
+            undo = board._apply(*move)
+            if not Rules.is_in_check(board, color):
+                legal.append(move)
+            board._revert(undo)
+        return legal
+
+
+    @staticmethod
+    def has_legal_move(board, color=None):
+        """True as soon as one legal move is found (cheaper than get_legal_moves)."""
+        color = board.turn if color is None else Rules._color_code(color)
+        for move in Rules.generate_moves(board, color):
+            undo = board._apply(*move)
+            in_check = Rules.is_in_check(board, color)
+            board._revert(undo)
+            if not in_check:
+                return True
         return False
 
 
     @staticmethod
     def is_checkmate(board, color):
         """Return True if the given color is in checkmate."""
-        # TODO: Implement checkmate detection logic
-        return False
+        return Rules.is_in_check(board, color) and not Rules.has_legal_move(board, color)
 
 
-    
\ No newline at end of file
+    @staticmethod
+    def is_stalemate(board, color):
+        """Return True if the given color has no legal move but is not in check."""
+        return not Rules.is_in_check(board, color) and not Rules.has_legal_move(board, color)
@@ -0,0 +1,224 @@
+"""
+Game tree: main line plus sidelines, for browsing and annotating games.
+
+Every node is the position after one move and keeps what navigation needs:
+the move, its SAN (computed once, when the move is added and validated),
+the position hash, the halfmove clock and, while the node is on the current
+path, the board's undo record for its move. Jumping between any two nodes
+unmakes moves up to their common ancestor and makes the moves down to the
+target: O(path difference), nothing is validated again.
+
+    tree = GameTree()
+    tree.add_san("e4"); tree.add_san("e5")
+    tree.back(); tree.add_san("c5")        # sideline 1... c5
+    Notation.tree_to_pgn(tree)
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+from src.game.constants import PAWN, WHITE
+from src.game.notation import Notation, START_FEN
+from src.game.rules import Rules
+
+Move = Tuple[int, int, int]  # (start_sq, end_sq, promotion_code)
+
+
+class VariationNode:
+    """One move of the tree; children[0] continues the main line, the others are sidelines."""
+
+    __slots__ = ("parent", "move", "san", "children", "position_hash", "halfmove_clock", "ply", "undo", "comment")
+
+    def __init__(self, parent, move, san, position_hash, halfmove_clock, ply):
+        self.parent: Optional[VariationNode] = parent
+        self.move: Optional[Move] = move  # None for the root
+        self.san: Optional[str] = san
+        self.children: List[VariationNode] = []
+        self.position_hash = position_hash  # Board.hash of the position after the move
+        self.halfmove_clock = halfmove_clock
+        self.ply = ply  # moves from the root
+        self.undo = None  # undo record of the move while the node is on the current path
+        self.comment: Optional[str] = None
+
+    def __repr__(self):
+        return f"VariationNode({self.ply}, {self.san})"
+
+    def is_mainline(self) -> bool:
+        node = self
+        while node.parent is not None:
+            if node.parent.children[0] is not node:
+                return False
+            node = node.parent
+        return True
+
+    def path(self) -> List["VariationNode"]:
+        """Nodes from the first move down to this one."""
+        nodes = []
+        node = self
+        while node.parent is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+
+class GameTree:
+    """Variation tree over one live Board; ``board`` always shows the ``current`` node."""
+
+    def __init__(self, start_fen: str = START_FEN):
+        self.start_fen = start_fen
+        self._state = Notation.from_fen(start_fen)  # board plus counters for to_fen
+        self.board = self._state.board
+        self.start_turn = self.board.turn
+        self.start_fullmove = self._state.fullmove_number
+        self.root = VariationNode(None, None, None, self.board.hash, self._state.halfmove_clock, 0)
+        self.current = self.root
+
+    # -------------------------
+    # Building
+    # -------------------------
+    def add_move(self, move: Move, comment: Optional[str] = None) -> VariationNode:
+        """
+        Play a move from the current node: an existing child with that move is
+        reused, otherwise a new one is appended (the first child is the main line).
+        Raises ValueError for an illegal move.
+        """
+        move = tuple(move)
+        for child in self.current.children:
+            if child.move == move:
+                self._make(child)
+                self.current = child
+                if comment is not None:
+                    child.comment = comment
+                return child
+
+        board = self.board
+        if move not in Rules.get_legal_moves(board):
+            raise ValueError(f"Illegal move: {Notation.move_to_uci(move)}")
+        san = Notation.move_to_san(board, move)
+        parent = self.current
+        undo = board.make_move(*move)
+        irreversible = undo[3].type_code == PAWN or undo[5] is not None
+        node = VariationNode(parent, move, san, board.hash,
+                             0 if irreversible else parent.halfmove_clock + 1, parent.ply + 1)
+        node.undo = undo
+        node.comment = comment
+        parent.children.append(node)
+        self.current = node
+        return node
+
+    def add_san(self, san: str, comment: Optional[str] = None) -> VariationNode:
+        """add_move for a SAN move (raises ValueError if it is illegal or ambiguous)."""
+        return self.add_move(Notation.san_to_move(self.board, san), comment)
+
+    @classmethod
+    def from_moves(cls, moves, start_fen: str = START_FEN) -> "GameTree":
+        """A tree whose main line is the given moves; the current node is the last one."""
+        tree = cls(start_fen)
+        for move in moves:
+            tree.add_move(move)
+        return tree
+
+    def promote(self, node: VariationNode) -> None:
+        """Make the line through node the main line at every branch above it."""
+        while node.parent is not None:
+            siblings = node.parent.children
+            siblings.remove(node)
+            siblings.insert(0, node)
+            node = node.parent
+
+    def remove(self, node: VariationNode) -> None:
+        """Delete node and everything below it (the current node moves up out of it first)."""
+        if node.parent is None:
+            raise ValueError("Cannot remove the root")
+        current = self.current
+        while current is not None and current is not node:
+            current = current.parent
+        if current is node:
+            self.goto(node.parent)
+        node.parent.children.remove(node)
+
+    # -------------------------
+    # Navigation
+    # -------------------------
+    def goto(self, target: VariationNode) -> None:
+        """Move the board to target through the common ancestor of the two nodes."""
+        node = self.current
+        down = []
+        while target.ply > node.ply:
+            down.append(target)
+            target = target.parent
+        while node.ply > target.ply:
+            self._unmake(node)
+            node = node.parent
+        while node is not target:
+            self._unmake(node)
+            node = node.parent
+            down.append(target)
+            target = target.parent
+        for child in reversed(down):
+            self._make(child)
+        self.current = down[0] if down else node
+        self.board.selected_piece = None
+
+    def back(self, plies: int = 1) -> None:
+        node = self.current
+        for _ in range(plies):
+            if node.parent is None:
+                break
+            node = node.parent
+        self.goto(node)
+
+    def forward(self, variation: int = 0) -> bool:
+        """Follow a child of the current node (0 = main line); False at the end of the line."""
+        children = self.current.children
+        if variation >= len(children):
+            return False
+        self.goto(children[variation])
+        return True
+
+    def goto_ply(self, ply: int) -> None:
+        """Jump to the main-line node with that many moves from the root."""
+        node = self.root
+        while node.ply < ply and node.children:
+            node = node.children[0]
+        self.goto(node)
+
+    def mainline(self) -> Iterator[VariationNode]:
+        node = self.root
+        while node.children:
+            node = node.children[0]
+            yield node
+
+    def find(self, position_hash: int) -> Iterator[VariationNode]:
+        """All nodes (depth first) whose position has the given hash."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.position_hash == position_hash:
+                yield node
+            stack.extend(reversed(node.children))
+
+    def fen(self) -> str:
+        """FEN of the current node."""
+        node = self.current
+        self._state.halfmove_clock = node.halfmove_clock
+        self._state.fullmove_number = self.fullmove_number(node.ply)
+        return Notation.to_fen(self._state)
+
+    def fullmove_number(self, ply: int) -> int:
+        """Move number of the position ply moves from the root."""
+        return self.start_fullmove + (ply + (self.start_turn != WHITE)) // 2
+
+    def mover(self, node: VariationNode) -> int:
+        """Color code of the side that played node's move."""
+        return (self.start_turn + node.ply - 1) & 1
+
+    # -------------------------
+    # Board updates
+    # -------------------------
+    def _make(self, node: VariationNode) -> None:
+        node.undo = self.board.make_move(*node.move)
+
+    def _unmake(self, node: VariationNode) -> None:
+        self.board.unmake_move(node.undo)
+        node.undo = None
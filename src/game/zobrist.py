@@ -0,0 +1,80 @@
+"""
+Zobrist hashing keys.
+
+A position hash is the XOR of one random 64-bit key per (piece code, square),
+plus keys for the castling rights, the en passant file and the side to move.
+As in Polyglot, the en passant file only counts when a pawn of the side to
+move stands next to the pawn that just advanced two squares; Board and
+Position go further and only set ep_square then, so the same position
+reached by different move orders has one key (1.d4 d5 2.c4 = 1.c4 d5 2.d4).
+Board keeps the hash, and a second one over the pawns alone, up to date
+incrementally in its make/unmake path.
+"""
+
+import random
+
+from src.game.constants import BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, PAWN
+
+_rng = random.Random(0x5EED_C4E55)  # fixed seed: hashes are stable across runs and processes
+
+# PIECE_KEYS[code][square], code = (color << 3) | piece type
+PIECE_KEYS = tuple(
+    tuple(_rng.getrandbits(64) for _ in range(BOARD_WIDTH * BOARD_HEIGHT)) for _ in range(16)
+)
+# CASTLING_KEYS[castling bitmask]
+CASTLING_KEYS = tuple(_rng.getrandbits(64) for _ in range(16))
+# EP_KEYS[ep_square + 1]: only the file matters, -1 (no en passant) hashes to 0
+_EP_FILE_KEYS = tuple(_rng.getrandbits(64) for _ in range(BOARD_WIDTH))
+EP_KEYS = (0,) + tuple(_EP_FILE_KEYS[square % BOARD_WIDTH] for square in range(BOARD_WIDTH * BOARD_HEIGHT))
+# SIDE_KEYS[turn]
+SIDE_KEYS = (0, _rng.getrandbits(64))
+
+
+def _ep_capturers(ep_square):
+    row, col = divmod(ep_square, BOARD_WIDTH)
+    if row == 2:  # black pawn pushed to row 3, white takes
+        color, pushed = WHITE, ep_square + BOARD_WIDTH
+    elif row == 5:  # white pawn pushed to row 4, black takes
+        color, pushed = BLACK, ep_square - BOARD_WIDTH
+    else:
+        return None
+    return (color << 3) | PAWN, tuple(pushed + step for step in (-1, 1) if 0 <= col + step < BOARD_WIDTH)
+
+
+# EP_CAPTURERS[ep_square]: (code of the pawn that could take en passant there, squares it would
+# take from), None off the two en passant rows
+EP_CAPTURERS = tuple(_ep_capturers(square) for square in range(BOARD_WIDTH * BOARD_HEIGHT))
+
+
+def can_take_en_passant(squares, ep_square: int) -> bool:
+    """True if a pawn on Board.squares can take en passant on ep_square (-1: no)."""
+    if ep_square < 0:
+        return False
+    capturers = EP_CAPTURERS[ep_square]
+    if capturers is None:
+        return False
+    code, sources = capturers
+    for square in sources:
+        piece = squares[square]
+        if piece is not None and piece.kind.code == code:
+            return True
+    return False
+
+
+def compute_hash(board) -> int:
+    """Hash of the board's position computed from scratch (without the side to move)."""
+    ep_square = board.ep_square if can_take_en_passant(board.squares, board.ep_square) else -1
+    h = CASTLING_KEYS[board.castling] ^ EP_KEYS[ep_square + 1]
+    for square, piece in enumerate(board.squares):
+        if piece is not None:
+            h ^= PIECE_KEYS[piece.kind.code][square]
+    return h
+
+
+def compute_pawn_hash(board) -> int:
+    """Hash of the pawns alone (same keys as compute_hash), for pawn-structure caches."""
+    h = 0
+    for square, piece in enumerate(board.squares):
+        if piece is not None and piece.kind.type_code == PAWN:
+            h ^= PIECE_KEYS[piece.kind.code][square]
+    return h
@@ -0,0 +1,8 @@
+"""
+Server package - hosts many concurrent games over TCP (asyncio).
+Actually: GameServer, HostedGame
+"""
+
+from .server import GameServer, HostedGame
+
+__all__ = ['GameServer', 'HostedGame']
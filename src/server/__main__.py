@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+
+from src.server.server import GameServer, DEFAULT_HOST, DEFAULT_PORT
+from src.storage.journal import Journal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChessGame-py multi-game server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-games", type=int, default=None)
+    parser.add_argument("--journal", default=None, help="write-ahead log file (games survive restarts)")
+    args = parser.parse_args()
+
+    journal = Journal(args.journal) if args.journal else None
+    server = GameServer(max_games=args.max_games, journal=journal)
+    if server.games:
+        print(f"[server] recovered {len(server.games)} games from {args.journal}")
+    print(f"[server] listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
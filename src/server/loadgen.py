@@ -0,0 +1,181 @@
+"""
+Load generator for the game server (local client stand-in).
+
+Opens a number of connections, hosts several games on each (the client
+takes both seats), plays random legal moves chosen from a local GameState
+mirror and measures the round trip of every move: from sending MOVE to
+receiving its broadcast. Reports throughput and latency percentiles.
+
+    python -m src.server.loadgen --games 2000 --connections 40 --plies 60
+    python -m src.server.loadgen --local --games 500   # in-process server
+"""
+
+import argparse
+import asyncio
+import collections
+import random
+import time
+from typing import Dict, List, Optional
+
+from src.game.board import Board
+from src.game.constants import BOARD_WIDTH, PIECE_NAMES
+from src.game.game_state import GameState
+from src.game.notation import Notation
+from src.game.rules import Rules
+from src.server.server import GameServer, DEFAULT_HOST, DEFAULT_PORT
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadClient:
+    """One connection hosting many games; replies are routed to per-game futures."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.waiters = collections.deque()  # futures for OK / ERR replies, in request order
+        self.pending: Dict[int, asyncio.Future] = {}  # game_id -> future for its next MOVE/END
+        self.errors = 0
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            parts = line.decode().split()
+            if not parts:
+                continue
+            kind = parts[0]
+            if kind in ("MOVE", "END") or (kind == "ERR" and parts[1] != "-" and int(parts[1]) in self.pending):
+                future = self.pending.pop(int(parts[1]), None)
+                if kind == "ERR":
+                    self.errors += 1
+                if future is not None and not future.done():
+                    future.set_result(parts)
+            elif self.waiters:
+                self.waiters.popleft().set_result(parts)
+
+    async def command(self, line: str) -> List[str]:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def new_game(self) -> int:
+        reply = await self.command("NEW")
+        game_id = int(reply[2])
+        await self.command(f"JOIN {game_id}")
+        return game_id
+
+    async def play_move(self, game_id: int, uci: str) -> List[str]:
+        future = asyncio.get_running_loop().create_future()
+        self.pending[game_id] = future
+        self.writer.write(f"MOVE {game_id} {uci}\n".encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._reader_task.cancel()
+
+
+async def _play_game(client: LoadClient, plies: int, rng: random.Random, latencies: List[float]) -> int:
+    """Play one game of random legal moves; returns the number of plies played."""
+    game_id = await client.new_game()
+    mirror = GameState(Board())
+    played = 0
+    while played < plies:
+        moves = Rules.get_legal_moves(mirror.board)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        started = time.perf_counter()
+        reply = await client.play_move(game_id, Notation.move_to_uci(move))
+        latencies.append(time.perf_counter() - started)
+        if reply[0] != "MOVE":
+            break
+        start_sq, end_sq, promotion = move
+        mirror.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                          PIECE_NAMES[promotion] if promotion else None)
+        played += 1
+    await client.command(f"LEAVE {game_id}")
+    return played
+
+
+async def run_load(host: str, port: int, games: int, connections: int, plies: int,
+                   seed: int = 0, local: bool = False) -> Dict[str, float]:
+    """Run the load test and return a summary dict (latencies in milliseconds)."""
+    server: Optional[asyncio.AbstractServer] = None
+    game_server = GameServer()
+    if local:
+        server = await game_server.start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    clients = []
+    for _ in range(connections):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+        clients.append(LoadClient(reader, writer))
+
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        _play_game(clients[i % connections], plies, random.Random(rng.random()), latencies)
+        for i in range(games)
+    ))
+    elapsed = time.perf_counter() - started
+
+    for client in clients:
+        await client.close()
+    if server is not None:
+        # let the server see every disconnect before shutting it down
+        while game_server.connections:
+            await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    total = sum(results)
+    return {
+        "games": games,
+        "moves": total,
+        "seconds": elapsed,
+        "moves_per_sec": total / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "errors": sum(client.errors for client in clients),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the ChessGame-py server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--games", type=int, default=1000, help="concurrent games")
+    parser.add_argument("--connections", type=int, default=20, help="client sockets (games are spread over them)")
+    parser.add_argument("--plies", type=int, default=40, help="plies per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--local", action="store_true", help="start an in-process server on a free port")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load(args.host, args.port, args.games, args.connections,
+                                   args.plies, args.seed, args.local))
+    print(f"[loadgen] {summary['games']} games, {summary['moves']} moves in {summary['seconds']:.2f}s "
+          f"({summary['moves_per_sec']:.0f} moves/s), errors={summary['errors']}")
+    print(f"[loadgen] move round trip: p50={summary['p50_ms']:.2f}ms p90={summary['p90_ms']:.2f}ms "
+          f"p99={summary['p99_ms']:.2f}ms max={summary['max_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+"""
+Asyncio multi-game server.
+
+Hosts many concurrent GameState instances in one process. Clients talk a
+line-based text protocol over TCP, one command per line:
+
+  NEW                    -> OK NEW <game_id>            (the creator plays white)
+  JOIN <game_id>         -> OK JOIN <game_id> <color>   (black if free, else white)
+  WATCH <game_id>        -> OK WATCH <game_id>
+  MOVE <game_id> <uci>   -> MOVE <game_id> <ply> <uci>  broadcast to players and watchers
+  LEAVE <game_id>        -> OK LEAVE <game_id>
+  STATS                  -> OK STATS games=<n> connections=<n> moves=<n>
+  PING                   -> PONG
+  ANALYZE <game_id> [<multipv> [<movetime_ms>]]
+                         -> INFO <game_id> <depth> <rank> <score> <uci pv...>  per line found
+                            OK ANALYZE <game_id> <best uci|->                   when done
+
+Moves use UCI coordinates (e2e4, e7e8q) and are validated in-process with
+Rules. Errors are reported as ``ERR <game_id|-> <reason>``. When a game is
+over every subscriber receives ``END <game_id> <result> <reason>``.
+
+ANALYZE runs a multi-PV search of the game's current position in a worker
+process (one analysis at a time, later requests queue; the event loop never
+shares the GIL with a search) and streams every line to the requester as the
+search finds it; scores are centipawns for the side to move, or #n / #-n for
+mates. A connection may have ANALYSIS_MAX_PENDING analyses queued or
+running, and the server ANALYSIS_MAX_QUEUED in all (beyond that ANALYZE is
+answered "ERR <game> busy"); they are cancelled when the requester
+disconnects, and a failed search is answered with ERR.
+
+With a Journal attached every game start, move and result is logged, and
+unfinished games are rebuilt from it on startup (players JOIN them again).
+Commands only append to the journal's buffer; its fsyncs and compactions
+run in a worker thread.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.game.board import Board
+from src.game.constants import BOARD_WIDTH, BOARD_HEIGHT, WHITE, BLACK, COLOR_NAMES, PIECE_NAMES, PAWN
+from src.game.game_state import GameState
+from src.game.notation import Notation
+from src.game.position import Position
+from src.engine.search import Search, SearchLimits
+from src.storage.journal import Journal
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# drop clients that stop reading once this many bytes are queued for them
+MAX_WRITE_BUFFER = 1 << 20
+
+ANALYSIS_MULTIPV = 3  # ANALYZE defaults
+ANALYSIS_MOVETIME = 1000
+ANALYSIS_MAX_MULTIPV = 8
+ANALYSIS_MAX_MOVETIME = 10000
+ANALYSIS_HASH_MB = 16
+ANALYSIS_MAX_PENDING = 2  # queued or running analyses per connection
+ANALYSIS_MAX_QUEUED = 8  # queued or running analyses on the whole server (one worker, up to 10 s each)
+_CANCEL_SLOTS = 8  # recently cancelled analysis ids the worker checks (see _AnalysisToken)
+
+
+# -------------------------
+# Analysis worker process
+# -------------------------
+_worker_search: Optional[Search] = None
+_worker_lines = None  # multiprocessing queue of (analysis_id, protocol line) back to the server
+_worker_cancelled = None  # shared array of cancelled analysis ids
+
+
+def _init_analysis_worker(hash_mb: int, lines, cancelled) -> None:
+    global _worker_search, _worker_lines, _worker_cancelled
+    _worker_search = Search(hash_mb)
+    _worker_lines = lines
+    _worker_cancelled = cancelled
+
+
+class _AnalysisToken:
+    """
+    Stop flag of one analysis (duck-types threading.Event for Search.stop_event):
+    set once the server lists the analysis id as cancelled.
+    """
+
+    __slots__ = ("_analysis_id",)
+
+    def __init__(self, analysis_id: int):
+        self._analysis_id = analysis_id
+
+    def is_set(self) -> bool:
+        return self._analysis_id in _worker_cancelled[:]
+
+    def set(self) -> None:
+        pass  # think() stops on its own deadline
+
+    def clear(self) -> None:
+        pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        time.sleep(timeout or 0)
+        return self.is_set()
+
+
+def _run_analysis(analysis_id: int, game_id: int, fen: str, limits: SearchLimits) -> None:
+    """Worker process: search fen and send every line found, then the OK line, to the server."""
+    if analysis_id in _worker_cancelled[:]:
+        return  # cancelled while it waited in the call queue
+    search = _worker_search
+    search.stop_event = _AnalysisToken(analysis_id)
+
+    def on_info(info):
+        score = f"#{info['mate']}" if info["mate"] is not None else str(info["score"])
+        pv = " ".join(Notation.move_to_uci(move) for move in info["pv"])
+        _worker_lines.put((analysis_id, f"INFO {game_id} {info['depth']} {info['multipv']} {score} {pv}"))
+
+    best, _ = search.think(Notation.from_fen(fen).board, limits, info=on_info)
+    _worker_lines.put((analysis_id, f"OK ANALYZE {game_id} {Notation.move_to_uci(best) if best is not None else '-'}"))
+
+
+class Connection:
+    """One connected client: buffered line writer plus the games it takes part in."""
+
+    __slots__ = ("writer", "games", "peer", "analyses")
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.games: Set[int] = set()
+        self.peer = writer.get_extra_info("peername")
+        self.analyses: Dict[int, Future] = {}  # analysis id -> its future in the analysis pool
+
+    def send(self, line: str) -> None:
+        """Queue a line; flushing happens in the connection's read loop (drain)."""
+        if self.writer.is_closing():
+            return
+        self.writer.write(line.encode() + b"\n")
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+
+
+class HostedGame:
+    """A game hosted by the server: its GameState, seated players and watchers."""
+
+    __slots__ = ("game_id", "state", "seats", "watchers", "plies", "result")
+
+    def __init__(self, game_id: int):
+        self.game_id = game_id
+        self.state = GameState(Board())
+        self.seats: List[Optional[Connection]] = [None, None]  # indexed by color code
+        self.watchers: Set[Connection] = set()
+        self.plies = 0
+        self.result = None  # (result, reason) once the game is over
+
+    def subscribers(self) -> Set[Connection]:
+        return {conn for conn in self.seats if conn is not None} | self.watchers
+
+    def broadcast(self, line: str) -> None:
+        for conn in self.subscribers():
+            conn.send(line)
+
+
+class GameServer:
+    """
+    Line-protocol game server. All games live on one event loop: move
+    validation is synchronous and short, so no locking is needed.
+    """
+
+    def __init__(self, max_games: Optional[int] = None, journal: Optional[Journal] = None,
+                 compact_bytes: int = 64 << 20):
+        """
+        journal: optional write-ahead log; games found in it are restored now
+        compact_bytes: compact the journal once it grows beyond this size
+        """
+        self.games: Dict[int, HostedGame] = {}
+        self.connections: Set[Connection] = set()
+        self.max_games = max_games
+        self.moves_played = 0
+        self._ids = itertools.count(1)
+        self._commands = {
+            "NEW": self._cmd_new,
+            "JOIN": self._cmd_join,
+            "WATCH": self._cmd_watch,
+            "MOVE": self._cmd_move,
+            "LEAVE": self._cmd_leave,
+            "STATS": self._cmd_stats,
+            "PING": self._cmd_ping,
+            "ANALYZE": self._cmd_analyze,
+        }
+        self.journal = journal
+        self.compact_bytes = compact_bytes
+        # created on the first ANALYZE: one worker process, the queue its lines come back on
+        # and the thread that hands them to the event loop
+        self._analysis_executor: Optional[ProcessPoolExecutor] = None
+        self._analysis_lines = None
+        self._analysis_cancelled = None
+        self._analysis_reader: Optional[threading.Thread] = None
+        self._analysis_ids = itertools.count(1)
+        self._analyses: Dict[int, Tuple[Connection, int]] = {}  # analysis id -> (requester, game id)
+        self._cancel_slot = 0
+        if journal is not None:
+            self.restore(Journal.recover(journal.path))
+
+    def restore(self, game_states: Dict[int, GameState]) -> None:
+        """Host recovered games (without players) and continue numbering after them."""
+        for game_id, state in game_states.items():
+            game = HostedGame(game_id)
+            game.state = state
+            # history only reaches back to the last snapshot: count plies from the move number
+            game.plies = (state.fullmove_number - 1) * 2 + (state.current_color == "black")
+            self.games[game_id] = game
+        if game_states:
+            self._ids = itertools.count(max(game_states) + 1)
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Start listening; returns the asyncio server (use its sockets to find the port)."""
+        return await asyncio.start_server(self._handle_client, host, port, limit=1 << 16)
+
+    async def serve_forever(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        server = await self.start(host, port)
+        flusher = asyncio.ensure_future(self._journal_loop()) if self.journal is not None else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if flusher is not None:
+                flusher.cancel()
+                self.journal.close()
+            self.close_analysis()
+
+    async def _journal_loop(self) -> None:
+        """
+        Group commit: fsync the journal periodically, compacting it when it gets
+        large. Both run in a worker thread; the event loop only appends records.
+        """
+        loop = asyncio.get_running_loop()
+        journal = self.journal
+        while True:
+            await asyncio.sleep(journal.fsync_interval)
+            await loop.run_in_executor(None, journal.flush, True)
+            if journal.size() > self.compact_bytes:
+                # immutable snapshots and the records they cover, taken in one step of the loop
+                live = {game_id: Position.from_game_state(game.state)
+                        for game_id, game in self.games.items() if game.result is None}
+                await loop.run_in_executor(None, journal.compact, live, journal.cut())
+
+    # -------------------------
+    # Connection handling
+    # -------------------------
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = Connection(writer)
+        self.connections.add(conn)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.handle_line(conn, line.decode(errors="replace"))
+                # no-op unless the client is slow to read (transport paused)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self._disconnect(conn)
+            writer.close()
+
+    def _disconnect(self, conn: Connection) -> None:
+        self.connections.discard(conn)
+        for analysis_id in list(conn.analyses):
+            self._cancel_analysis(analysis_id)
+        for game_id in list(conn.games):
+            game = self.games.get(game_id)
+            if game is not None:
+                self._release(game, conn)
+
+    def _release(self, game: HostedGame, conn: Connection) -> None:
+        """Free conn's seats and watch slot; forget the game once nobody is left."""
+        for color in (WHITE, BLACK):
+            if game.seats[color] is conn:
+                game.seats[color] = None
+        game.watchers.discard(conn)
+        conn.games.discard(game.game_id)
+        # journaled games stay resumable until they are over
+        if not game.subscribers() and (self.journal is None or game.result is not None):
+            self.games.pop(game.game_id, None)
+
+    # -------------------------
+    # Protocol
+    # -------------------------
+    def handle_line(self, conn: Connection, line: str) -> None:
+        """Parse and execute one protocol line."""
+        parts = line.split()
+        if not parts:
+            return
+        command = self._commands.get(parts[0].upper())
+        if command is None:
+            conn.send(f"ERR - unknown command {parts[0]}")
+            return
+        command(conn, parts[1:])
+
+    def _get_game(self, conn: Connection, args: List[str]) -> Optional[HostedGame]:
+        try:
+            game = self.games.get(int(args[0]))
+        except (IndexError, ValueError):
+            conn.send("ERR - missing or invalid game id")
+            return None
+        if game is None:
+            conn.send(f"ERR {args[0]} no such game")
+        return game
+
+    def _cmd_new(self, conn: Connection, args: List[str]) -> None:
+        if self.max_games is not None and len(self.games) >= self.max_games:
+            conn.send("ERR - server full")
+            return
+        game = HostedGame(next(self._ids))
+        game.seats[WHITE] = conn
+        self.games[game.game_id] = game
+        conn.games.add(game.game_id)
+        if self.journal is not None:
+            self.journal.log_new_game(game.game_id)
+        conn.send(f"OK NEW {game.game_id}")
+
+    def _cmd_join(self, conn: Connection, args: List[str]) -> None:
+        game = self._get_game(conn, args)
+        if game is None:
+            return
+        for color in (BLACK, WHITE):
+            if game.seats[color] is None:
+                game.seats[color] = conn
+                conn.games.add(game.game_id)
+                conn.send(f"OK JOIN {game.game_id} {COLOR_NAMES[color]}")
+                return
+        conn.send(f"ERR {game.game_id} game is full")
+
+    def _cmd_watch(self, conn: Connection, args: List[str]) -> None:
+        game = self._get_game(conn, args)
+        if game is None:
+            return
+        game.watchers.add(conn)
+        conn.games.add(game.game_id)
+        conn.send(f"OK WATCH {game.game_id}")
+
+    def _cmd_leave(self, conn: Connection, args: List[str]) -> None:
+        game = self._get_game(conn, args)
+        if game is None:
+            return
+        self._release(game, conn)
+        conn.send(f"OK LEAVE {game.game_id}")
+
+    def _cmd_stats(self, conn: Connection, args: List[str]) -> None:
+        conn.send(f"OK STATS games={len(self.games)} connections={len(self.connections)} "
+                  f"moves={self.moves_played}")
+
+    def _cmd_ping(self, conn: Connection, args: List[str]) -> None:
+        conn.send("PONG")
+
+    def _cmd_move(self, conn: Connection, args: List[str]) -> None:
+        game = self._get_game(conn, args)
+        if game is None:
+            return
+        if len(args) < 2:
+            conn.send(f"ERR {game.game_id} missing move")
+            return
+        if game.result is not None:
+            conn.send(f"ERR {game.game_id} game over")
+            return
+
+        board = game.state.board
+        if game.seats[board.turn] is not conn:
+            conn.send(f"ERR {game.game_id} not your turn")
+            return
+
+        try:
+            start_sq, end_sq, promotion = Notation.parse_uci(args[1])
+        except ValueError:
+            conn.send(f"ERR {game.game_id} bad move {args[1]}")
+            return
+
+        if promotion:
+            # a promotion suffix is only valid for a pawn reaching the last rank
+            piece = board.squares[start_sq]
+            end_row = end_sq // BOARD_WIDTH
+            if piece is None or piece.kind.type_code != PAWN or end_row not in (0, BOARD_HEIGHT - 1):
+                conn.send(f"ERR {game.game_id} illegal move {args[1]}")
+                return
+
+        start_pos = divmod(start_sq, BOARD_WIDTH)
+        end_pos = divmod(end_sq, BOARD_WIDTH)
+        if not game.state.apply_move(start_pos, end_pos, PIECE_NAMES[promotion] if promotion else None):
+            conn.send(f"ERR {game.game_id} illegal move {args[1]}")
+            return
+
+        game.plies += 1
+        self.moves_played += 1
+        move = (start_sq, end_sq, promotion)
+        if self.journal is not None:
+            self.journal.log_move(game.game_id, move, game.state)
+        game.broadcast(f"MOVE {game.game_id} {game.plies} {Notation.move_to_uci(move)}")
+
+        outcome = game.state.get_outcome()
+        if outcome is not None:
+            game.result = outcome
+            if self.journal is not None:
+                self.journal.log_end(game.game_id)
+            result, reason = outcome
+            game.broadcast(f"END {game.game_id} {result} {reason.replace(' ', '-')}")
+
+    def _cmd_analyze(self, conn: Connection, args: List[str]) -> None:
+        game = self._get_game(conn, args)
+        if game is None:
+            return
+        try:
+            multipv = int(args[1]) if len(args) > 1 else ANALYSIS_MULTIPV
+            movetime = int(args[2]) if len(args) > 2 else ANALYSIS_MOVETIME
+        except ValueError:
+            conn.send(f"ERR {game.game_id} bad analysis arguments")
+            return
+        limits = SearchLimits(movetime=max(1, min(ANALYSIS_MAX_MOVETIME, movetime)),
+                              multipv=max(1, min(ANALYSIS_MAX_MULTIPV, multipv)))
+        if len(conn.analyses) >= ANALYSIS_MAX_PENDING:
+            conn.send(f"ERR {game.game_id} too many pending analyses")
+            return
+        if len(self._analyses) >= ANALYSIS_MAX_QUEUED:
+            conn.send(f"ERR {game.game_id} busy")
+            return
+        loop = asyncio.get_running_loop()
+        if self._analysis_executor is None:
+            self._start_analysis(loop)
+        analysis_id = next(self._analysis_ids)
+        # the game may go on while the search runs: it analyses the position as of now
+        future = self._analysis_executor.submit(_run_analysis, analysis_id, game.game_id,
+                                                Notation.to_fen(game.state), limits)
+        self._analyses[analysis_id] = (conn, game.game_id)
+        conn.analyses[analysis_id] = future
+        future.add_done_callback(
+            lambda settled: loop.call_soon_threadsafe(self._analysis_done, analysis_id, settled))
+
+    # -------------------------
+    # Analysis
+    # -------------------------
+    def _start_analysis(self, loop: asyncio.AbstractEventLoop) -> None:
+        # spawn: the worker starts clean instead of forking the server and its threads
+        context = multiprocessing.get_context("spawn")
+        if self._analysis_lines is None:
+            self._analysis_lines = context.Queue()
+            self._analysis_cancelled = context.RawArray("q", _CANCEL_SLOTS)
+            self._analysis_reader = threading.Thread(target=self._read_analysis_lines, args=(loop,),
+                                                     name="analysis-lines", daemon=True)
+            self._analysis_reader.start()
+        self._analysis_executor = ProcessPoolExecutor(
+            1, mp_context=context, initializer=_init_analysis_worker,
+            initargs=(ANALYSIS_HASH_MB, self._analysis_lines, self._analysis_cancelled))
+
+    def _read_analysis_lines(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Reader thread: pass the worker's lines to the event loop (Connection.send is not thread-safe)."""
+        while True:
+            item = self._analysis_lines.get()
+            if item is None:
+                return
+            try:
+                loop.call_soon_threadsafe(self._analysis_line, *item)
+            except RuntimeError:
+                return  # the event loop is closed
+
+    def _analysis_line(self, analysis_id: int, line: str) -> None:
+        entry = self._analyses.get(analysis_id)
+        if entry is None:
+            return  # cancelled, or the requester left
+        if line.startswith("OK "):
+            self._forget_analysis(analysis_id)
+        entry[0].send(line)
+
+    def _analysis_done(self, analysis_id: int, future: Future) -> None:
+        """The worker's future settled: success was already reported by its OK line."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool) and self._analysis_executor is not None:
+            self._analysis_executor.shutdown(wait=False)
+            self._analysis_executor = None  # the worker died: start a new one on the next ANALYZE
+        entry = self._analyses.get(analysis_id)
+        if entry is None:
+            return  # cancelled, or the requester left
+        self._forget_analysis(analysis_id)
+        conn, game_id = entry
+        conn.send(f"ERR {game_id} analysis failed: {type(error).__name__}")
+
+    def _forget_analysis(self, analysis_id: int) -> Optional[Tuple[Connection, Future]]:
+        """Stop routing an analysis' lines; returns its requester and future (None if already gone)."""
+        entry = self._analyses.pop(analysis_id, None)
+        if entry is None:
+            return None
+        conn = entry[0]
+        return conn, conn.analyses.pop(analysis_id)
+
+    def _cancel_analysis(self, analysis_id: int) -> None:
+        """Drop an analysis: a queued one never runs, a started one stops at its next stop-flag poll."""
+        entry = self._forget_analysis(analysis_id)
+        if entry is None:
+            return
+        future = entry[1]
+        if not future.cancel():
+            # already handed to the worker (at most the running one and the next): list the id
+            # where its stop token looks
+            self._analysis_cancelled[self._cancel_slot] = analysis_id
+            self._cancel_slot = (self._cancel_slot + 1) % _CANCEL_SLOTS
+
+    def close_analysis(self) -> None:
+        """Cancel every analysis and stop the worker process and the reader thread."""
+        for analysis_id in list(self._analyses):
+            self._cancel_analysis(analysis_id)
+        if self._analysis_executor is not None:
+            self._analysis_executor.shutdown(wait=True)
+            self._analysis_executor = None
+        if self._analysis_lines is not None:
+            self._analysis_lines.put(None)
+            self._analysis_reader.join(timeout=1.0)
+            self._analysis_lines = None
@@ -0,0 +1,29 @@
+"""
+Storage package - persistence of games (journal, archives, indexes).
+Actually: Journal, Archive, ArchiveWriter, PositionIndex, Explorer
+
+The names are imported on first use, so running one of the modules
+(python -m src.storage.journal) does not import it a second time.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'Journal': '.journal',
+    'Archive': '.archive',
+    'ArchiveWriter': '.archive',
+    'PositionIndex': '.position_index',
+    'Explorer': '.explorer',
+    'build_explorer': '.explorer',
+}
+
+__all__ = ['Journal', 'Archive', 'ArchiveWriter', 'PositionIndex', 'Explorer', 'build_explorer']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
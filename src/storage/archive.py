@@ -0,0 +1,335 @@
+"""
+Compact binary archive of finished games, memory-mapped for reading.
+
+Two files make up an archive:
+
+  <path>        data: 8-byte file header (b"CGA1", u32 reserved) followed by
+                one record per game:
+                  fixed header  <BBHHHII  result, fen_len, ply_count, white_elo,
+                                          black_elo, date (yyyymmdd), tags_len
+                  fen_len bytes  start FEN (empty = standard start position)
+                  tags_len bytes tags as utf-8 "Key\\tValue\\n" lines
+                  ply_count u16  moves (see codec.encode_move), little-endian
+  <path>.idx    index: 8-byte header (b"CGI1", u32 reserved) followed by one
+                u64 record offset per game; the game id is the position in it.
+
+Games are fetched by id through the index and their moves are exposed as a
+zero-copy memoryview, so nothing is parsed until a move is decoded.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from src.game.board import Board
+from src.game.notation import Notation, START_FEN
+from src.storage.codec import Move, encode_move, decode_move
+
+DATA_MAGIC = b"CGA1"
+INDEX_MAGIC = b"CGI1"
+_FILE_HEADER = struct.Struct("<4sI")
+_GAME_HEADER = struct.Struct("<BBHHHII")
+_OFFSET = struct.Struct("<Q")
+
+RESULT_CODES = {"*": 0, "1-0": 1, "0-1": 2, "1/2-1/2": 3}
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2")
+
+# headers stored in the fixed-width part of a record rather than in the tags
+_FIXED_TAGS = ("Result", "WhiteElo", "BlackElo", "Date", "FEN", "SetUp")
+
+
+def _parse_int(text: Optional[str]) -> int:
+    try:
+        return max(0, min(0xFFFF, int(text)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _parse_date(text: Optional[str]) -> int:
+    """'2024.01.15' -> 20240115; unknown parts ('??') become 0."""
+    if not text:
+        return 0
+    parts = (text.split(".") + ["0", "0", "0"])[:3]
+    year, month, day = (int(p) if p.isdigit() else 0 for p in parts)
+    return year * 10000 + month * 100 + day
+
+
+def _format_date(value: int) -> str:
+    year, month, day = value // 10000, value // 100 % 100, value % 100
+    return (f"{year:04d}" if year else "????") + "." + (f"{month:02d}" if month else "??") \
+        + "." + (f"{day:02d}" if day else "??")
+
+
+class ArchivedGame:
+    """One game read from the archive; moves are a memoryview of u16 move codes."""
+
+    __slots__ = ("game_id", "result", "ply_count", "white_elo", "black_elo", "date",
+                 "start_fen", "_tags", "moves")
+
+    def __init__(self, game_id, result, ply_count, white_elo, black_elo, date, start_fen, tags, moves):
+        self.game_id = game_id
+        self.result = result
+        self.ply_count = ply_count
+        self.white_elo = white_elo
+        self.black_elo = black_elo
+        self.date = date
+        self.start_fen = start_fen
+        self._tags = tags  # raw bytes until tags are asked for
+        self.moves = moves
+
+    def move_list(self) -> List[Move]:
+        """Decode all moves into (start_sq, end_sq, promotion_code) tuples."""
+        codes = self.moves
+        if sys.byteorder != "little":
+            codes = array("H", codes)
+            codes.byteswap()
+        return [decode_move(code) for code in codes]
+
+    @property
+    def tags(self) -> Dict[str, str]:
+        if isinstance(self._tags, (bytes, memoryview)):
+            text = bytes(self._tags).decode("utf-8")
+            self._tags = dict(line.split("\t", 1) for line in text.splitlines() if "\t" in line)
+        return self._tags
+
+    def headers(self) -> Dict[str, str]:
+        """PGN headers rebuilt from the fixed fields and the stored tags."""
+        headers = dict(self.tags)
+        headers["Date"] = _format_date(self.date)
+        if self.white_elo:
+            headers["WhiteElo"] = str(self.white_elo)
+        if self.black_elo:
+            headers["BlackElo"] = str(self.black_elo)
+        return headers
+
+    def to_pgn(self) -> str:
+        return Notation.to_pgn(self.move_list(), self.headers(), RESULTS[self.result], self.start_fen)
+
+
+class ArchiveWriter:
+    """Appends games to an archive (creating it if needed)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        if self._data.tell() == 0:
+            self._data.write(_FILE_HEADER.pack(DATA_MAGIC, 0))
+        if self._index.tell() == 0:
+            self._index.write(_FILE_HEADER.pack(INDEX_MAGIC, 0))
+        self.next_id = (self._index.tell() - _FILE_HEADER.size) // _OFFSET.size
+
+    def add_game(self, moves: List[Move], result: str = "*", headers: Optional[Dict[str, str]] = None,
+                 start_fen: Optional[str] = None) -> int:
+        """Append one game; returns its id."""
+        headers = headers or {}
+        fen = b"" if not start_fen or start_fen == START_FEN else start_fen.encode("ascii")
+        tags = "".join(f"{key}\t{value}\n" for key, value in headers.items()
+                       if key not in _FIXED_TAGS).encode("utf-8")
+        codes = array("H", (encode_move(move) for move in moves))
+        if sys.byteorder != "little":
+            codes.byteswap()
+
+        offset = self._data.tell()
+        self._data.write(_GAME_HEADER.pack(
+            RESULT_CODES.get(result, 0), len(fen), len(codes),
+            _parse_int(headers.get("WhiteElo")), _parse_int(headers.get("BlackElo")),
+            _parse_date(headers.get("Date")), len(tags)
+        ))
+        self._data.write(fen)
+        self._data.write(tags)
+        self._data.write(codes.tobytes())
+        self._index.write(_OFFSET.pack(offset))
+        game_id = self.next_id
+        self.next_id += 1
+        return game_id
+
+    def close(self) -> None:
+        # data first; readers also skip index entries that point past the data
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Archive:
+    """Read-only, memory-mapped view of an archive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = None
+        self._index = None
+        self._offsets = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-map the files to see games appended since opening."""
+        self.close()
+        self._data = self._map(self.path, DATA_MAGIC)
+        self._index = self._map(self.path + ".idx", INDEX_MAGIC)
+        index_view = memoryview(self._index)[_FILE_HEADER.size:]
+        index_view = index_view[:len(index_view) - len(index_view) % _OFFSET.size]
+        offsets = index_view.cast("Q")
+        if sys.byteorder != "little":
+            offsets = array("Q", offsets)
+            offsets.byteswap()
+        # ignore index entries written ahead of their data (interrupted writer)
+        count = len(offsets)
+        while count and offsets[count - 1] + _GAME_HEADER.size > len(self._data):
+            count -= 1
+        self._offsets = offsets[:count]
+
+    @staticmethod
+    def _map(path: str, magic: bytes):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _FILE_HEADER.size:
+                raise ValueError(f"Not a game archive: {path}")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if _FILE_HEADER.unpack_from(mapped, 0)[0] != magic:
+            mapped.close()
+            raise ValueError(f"Not a game archive: {path}")
+        return mapped
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _read(self, game_id: int, offset: int):
+        """Decode the record at offset; returns (game, offset of the next record)."""
+        result, fen_len, ply_count, white_elo, black_elo, date, tags_len = \
+            _GAME_HEADER.unpack_from(self._data, offset)
+        pos = offset + _GAME_HEADER.size
+        start_fen = self._data[pos:pos + fen_len].decode("ascii") if fen_len else None
+        pos += fen_len
+        view = memoryview(self._data)
+        tags = view[pos:pos + tags_len]
+        pos += tags_len
+        moves = view[pos:pos + 2 * ply_count].cast("H")
+        game = ArchivedGame(game_id, result, ply_count, white_elo, black_elo, date, start_fen, tags, moves)
+        return game, pos + 2 * ply_count
+
+    def get(self, game_id: int) -> ArchivedGame:
+        """Fetch a game by id (IndexError if there is none)."""
+        if not 0 <= game_id < len(self._offsets):
+            raise IndexError(f"No game {game_id} in {self.path}")
+        return self._read(game_id, self._offsets[game_id])[0]
+
+    def __getitem__(self, game_id: int) -> ArchivedGame:
+        return self.get(game_id)
+
+    def scan(self, start: int = 0) -> Iterator[ArchivedGame]:
+        """Walk the data file sequentially from game id ``start`` (no index lookups)."""
+        count = len(self._offsets)
+        if start >= count:
+            return
+        offset = self._offsets[start]
+        for game_id in range(start, count):
+            game, offset = self._read(game_id, offset)
+            yield game
+
+    def __iter__(self) -> Iterator[ArchivedGame]:
+        return self.scan()
+
+    def close(self) -> None:
+        # views into the maps must be released before the maps can close
+        self._offsets = None
+        for mapped in (self._data, self._index):
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # an ArchivedGame still holds a view; the map closes with it
+        self._data = self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -------------------------
+# PGN converters
+# -------------------------
+def pgn_to_archive(pgn_path: str, archive_path: str) -> Dict[str, int]:
+    """Import every game of a PGN file (SAN resolved with Notation). Returns counts."""
+    imported = skipped = 0
+    with open(pgn_path, encoding="utf-8", errors="replace") as pgn, ArchiveWriter(archive_path) as writer:
+        for game in Notation.read_pgn(pgn):
+            headers = game["headers"]
+            start_fen = headers.get("FEN")
+            board = Notation.from_fen(start_fen).board if start_fen else Board()
+            moves = []
+            try:
+                for san in game["moves"]:
+                    move = Notation.san_to_move(board, san)
+                    board.make_move(*move)
+                    moves.append(move)
+            except ValueError as exc:
+                print(f"[archive] Warning: skipping game {imported + skipped + 1}: {exc}")
+                skipped += 1
+                continue
+            writer.add_game(moves, game["result"], headers, start_fen)
+            imported += 1
+    return {"imported": imported, "skipped": skipped}
+
+
+def archive_to_pgn(archive_path: str, pgn_path: str) -> int:
+    """Export every archived game as PGN. Returns the number of games written."""
+    count = 0
+    with Archive(archive_path) as archive, open(pgn_path, "w", encoding="utf-8") as out:
+        for game in archive.scan():
+            out.write(game.to_pgn())
+            out.write("\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary game archive tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="append the games of a PGN file to an archive")
+    p_import.add_argument("pgn")
+    p_import.add_argument("archive")
+    p_export = sub.add_parser("export", help="write an archive as PGN")
+    p_export.add_argument("archive")
+    p_export.add_argument("pgn")
+    p_get = sub.add_parser("get", help="print one game as PGN")
+    p_get.add_argument("archive")
+    p_get.add_argument("game_id", type=int)
+    p_scan = sub.add_parser("scan", help="scan every game and report throughput")
+    p_scan.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        counts = pgn_to_archive(args.pgn, args.archive)
+        print(f"[archive] imported {counts['imported']} games, skipped {counts['skipped']}")
+    elif args.command == "export":
+        print(f"[archive] exported {archive_to_pgn(args.archive, args.pgn)} games")
+    elif args.command == "get":
+        with Archive(args.archive) as archive:
+            print(archive.get(args.game_id).to_pgn())
+    elif args.command == "scan":
+        started = time.perf_counter()
+        games = plies = 0
+        with Archive(args.archive) as archive:
+            for game in archive.scan():
+                games += 1
+                plies += len(game.moves)
+            size = os.path.getsize(args.archive)
+        elapsed = time.perf_counter() - started
+        print(f"[archive] {games} games, {plies} plies, {size / 1e6:.1f} MB in {elapsed:.2f}s "
+              f"({size / 1e6 / elapsed if elapsed else 0:.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compact binary encodings shared by the storage formats.
+
+A move fits in 16 bits: from square (6 bits) | to square (6 bits) << 6 |
+promotion piece type code (3 bits, 0 = none) << 12. Square indices follow
+Board.squares (0 = a8, 63 = h1).
+"""
+
+from typing import Tuple
+
+Move = Tuple[int, int, int]  # (start_sq, end_sq, promotion_code)
+
+
+def encode_move(move: Move) -> int:
+    start_sq, end_sq, promotion = move
+    return start_sq | (end_sq << 6) | (promotion << 12)
+
+
+def decode_move(code: int) -> Move:
+    return code & 63, (code >> 6) & 63, code >> 12
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Append an unsigned LEB128 varint."""
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset: int) -> Tuple[int, int]:
+    """Read an unsigned LEB128 varint; returns (value, new offset)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
@@ -0,0 +1,376 @@
+"""
+Opening explorer: how often each move is played from a position and how it scores.
+
+Games are streamed from a PGN file or a binary archive and replayed with
+Board.make_move up to a ply depth. For every (position hash, move) played the
+builder counts white wins, draws and black wins (unfinished games are
+skipped). Workers aggregate in bounded in-memory chunks that are spilled as
+sorted run files; the runs are then merged externally into one store, at
+most MERGE_FAN_IN of them at a time (in several passes for large builds).
+
+Store layout (memory-mapped for queries):
+
+  header   <4sIQ   b"CEX2", max ply, record count
+  records  <QHIII  position hash, move (codec.encode_move), white, draws, black
+           sorted by (hash, move)
+
+    python -m src.storage.explorer build --pgn games.pgn openings.cex --depth 20 --workers 4
+    python -m src.storage.explorer query openings.cex --moves "e2e4 c7c5"
+"""
+
+import argparse
+import bisect
+import collections
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.game.board import Board
+from src.game.notation import Notation
+from src.storage.archive import Archive
+from src.storage.codec import encode_move, decode_move
+
+STORE_MAGIC = b"CEX2"  # 2: en passant only hashed when a capture is possible (rebuild CEX1 stores)
+_STORE_HEADER = struct.Struct("<4sIQ")
+_RECORD = struct.Struct("<QHIII")
+MERGE_FAN_IN = 64  # run files open at once during the external merge (well under the usual 1024 fd limit)
+
+# PGN result -> index into the (white, draws, black) counters
+_RESULT_SLOTS = {"1-0": 0, "1/2-1/2": 1, "0-1": 2}
+_ARCHIVE_RESULT_SLOTS = {1: 0, 3: 1, 2: 2}  # archive.RESULT_CODES values
+
+# a game to replay: (start FEN or None, moves as (start_sq, end_sq, promo) or SAN strings, result slot)
+GameRecord = Tuple[Optional[str], list, int]
+
+
+# -------------------------
+# Worker side: replay and aggregate
+# -------------------------
+class _Aggregator:
+    """Counts (hash, move) results in memory and spills sorted runs to disk."""
+
+    def __init__(self, run_dir: str, max_ply: int, chunk_entries: int):
+        self.run_dir = run_dir
+        self.max_ply = max_ply
+        self.chunk_entries = chunk_entries
+        self.counts: Dict[int, List[int]] = {}  # hash << 16 | move -> [white, draws, black]
+        self.runs: List[str] = []
+        self.board = Board()  # reused for every game of the worker
+
+    def add_game(self, start_fen: Optional[str], moves: list, slot: int) -> None:
+        if start_fen:
+            board = Notation.from_fen(start_fen).board
+        else:
+            board = self.board
+            board.load_board()
+        counts = self.counts
+        for move in moves[:self.max_ply]:
+            if isinstance(move, str):
+                move = Notation.san_to_move(board, move)
+            key = board.hash << 16 | encode_move(move)
+            entry = counts.get(key)
+            if entry is None:
+                entry = counts[key] = [0, 0, 0]
+            entry[slot] += 1
+            board.make_move(*move)
+        if len(counts) >= self.chunk_entries:
+            self.spill()
+
+    def spill(self) -> None:
+        """Write the current chunk as a sorted run file and start a new chunk."""
+        if not self.counts:
+            return
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self.run_dir)
+        pack = _RECORD.pack
+        with os.fdopen(fd, "wb") as out:
+            out.write(b"".join(pack(key >> 16, key & 0xFFFF, *self.counts[key]) for key in sorted(self.counts)))
+        self.runs.append(path)
+        self.counts = {}
+
+
+def _aggregate_archive(path: str, start: int, stop: int, run_dir: str, max_ply: int,
+                       chunk_entries: int) -> List[str]:
+    """Pool task: aggregate archive games [start, stop). Returns the run files written."""
+    aggregator = _Aggregator(run_dir, max_ply, chunk_entries)
+    with Archive(path) as archive:
+        for game in archive.scan(start):
+            if game.game_id >= stop:
+                break
+            slot = _ARCHIVE_RESULT_SLOTS.get(game.result)
+            if slot is not None:
+                aggregator.add_game(game.start_fen, game.move_list(), slot)
+    aggregator.spill()
+    return aggregator.runs
+
+
+def _aggregate_records(records: List[GameRecord], run_dir: str, max_ply: int,
+                       chunk_entries: int) -> List[str]:
+    """Pool task: aggregate a batch of parsed PGN games. Returns the run files written."""
+    aggregator = _Aggregator(run_dir, max_ply, chunk_entries)
+    for start_fen, moves, slot in records:
+        try:
+            aggregator.add_game(start_fen, moves, slot)
+        except ValueError:
+            pass  # unresolvable SAN: the moves before it are already counted
+    aggregator.spill()
+    return aggregator.runs
+
+
+# -------------------------
+# Game sources
+# -------------------------
+def _pgn_batches(pgn_path: str, max_ply: int, batch_size: int) -> Iterator[List[GameRecord]]:
+    batch: List[GameRecord] = []
+    with open(pgn_path, encoding="utf-8", errors="replace") as pgn:
+        for game in Notation.read_pgn(pgn):
+            slot = _RESULT_SLOTS.get(game["result"])
+            if slot is None:
+                continue
+            batch.append((game["headers"].get("FEN"), game["moves"][:max_ply], slot))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _run_bounded(executor: Optional[ProcessPoolExecutor], fn, task_args: Iterable[tuple],
+                 max_pending: int) -> List[str]:
+    """Run fn over task_args (inline without an executor) keeping at most max_pending tasks queued."""
+    runs: List[str] = []
+    if executor is None:
+        for args in task_args:
+            runs.extend(fn(*args))
+        return runs
+    pending = collections.deque()
+    for args in task_args:
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= max_pending:
+            runs.extend(pending.popleft().result())
+    while pending:
+        runs.extend(pending.popleft().result())
+    return runs
+
+
+# -------------------------
+# External merge
+# -------------------------
+def _read_run(path: str, chunk_records: int = 4096) -> Iterator[tuple]:
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(_RECORD.size * chunk_records)
+            if not data:
+                return
+            yield from _RECORD.iter_unpack(data)
+
+
+def _merged_records(runs: List[str]) -> Iterator[tuple]:
+    """Records of sorted runs in (hash, move) order, equal (hash, move) records summed."""
+    current = None
+    for position_hash, move, white, draws, black in heapq.merge(*(_read_run(path) for path in runs)):
+        if current is not None and current[0] == position_hash and current[1] == move:
+            current[2] += white
+            current[3] += draws
+            current[4] += black
+            continue
+        if current is not None:
+            yield current
+        current = [position_hash, move, white, draws, black]
+    if current is not None:
+        yield current
+
+
+def _write_records(out, records: Iterable[list]) -> int:
+    """Write records in 4096-record blocks. Returns the record count."""
+    count = 0
+    pack = _RECORD.pack
+    buffer = []
+    for record in records:
+        buffer.append(pack(*record))
+        count += 1
+        if len(buffer) >= 4096:
+            out.write(b"".join(buffer))
+            buffer = []
+    out.write(b"".join(buffer))
+    return count
+
+
+def _merge_runs(runs: List[str], out_path: str, max_ply: int, fan_in: int = MERGE_FAN_IN) -> int:
+    """
+    Merge sorted runs into the store, summing equal (hash, move) records. At most
+    fan_in runs are open at once: larger sets are first merged group by group
+    into intermediate runs, as many passes as needed. Returns the record count.
+    """
+    fan_in = max(2, fan_in)
+    while len(runs) > fan_in:
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = runs[start:start + fan_in]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            fd, path = tempfile.mkstemp(suffix=".run", dir=os.path.dirname(group[0]))
+            with os.fdopen(fd, "wb") as out:
+                _write_records(out, _merged_records(group))
+            for done in group:
+                os.remove(done)
+            merged.append(path)
+        runs = merged
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(_STORE_HEADER.pack(STORE_MAGIC, max_ply, 0))
+        count = _write_records(out, _merged_records(runs))
+        out.seek(0)
+        out.write(_STORE_HEADER.pack(STORE_MAGIC, max_ply, count))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def build_explorer(out_path: str, pgn_path: Optional[str] = None, archive_path: Optional[str] = None,
+                   max_ply: int = 20, workers: int = 1, chunk_entries: int = 500_000,
+                   batch_size: int = 2000) -> int:
+    """
+    Build an explorer store from a PGN file or an archive (exactly one of them).
+    workers > 1 aggregates in a process pool; chunk_entries bounds each
+    worker's in-memory table. Returns the number of (position, move) records.
+    """
+    if (pgn_path is None) == (archive_path is None):
+        raise ValueError("Give exactly one of pgn_path and archive_path")
+    run_dir = tempfile.mkdtemp(prefix="explorer-", dir=os.path.dirname(os.path.abspath(out_path)))
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        if archive_path is not None:
+            with Archive(archive_path) as archive:
+                total = len(archive)
+            step = max(1, batch_size)
+            tasks = ((archive_path, start, min(start + step, total), run_dir, max_ply, chunk_entries)
+                     for start in range(0, total, step))
+            runs = _run_bounded(executor, _aggregate_archive, tasks, 2 * workers)
+        else:
+            tasks = ((batch, run_dir, max_ply, chunk_entries)
+                     for batch in _pgn_batches(pgn_path, max_ply, batch_size))
+            runs = _run_bounded(executor, _aggregate_records, tasks, 2 * workers)
+        return _merge_runs(runs, out_path, max_ply)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+# -------------------------
+# Queries
+# -------------------------
+class _HashColumn:
+    """Sequence view of the records' hash field, for bisect."""
+
+    __slots__ = ("_map", "_count")
+
+    def __init__(self, mapped, count: int):
+        self._map = mapped
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return _RECORD.unpack_from(self._map, _STORE_HEADER.size + index * _RECORD.size)[0]
+
+
+class Explorer:
+    """Read-only, memory-mapped explorer store."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.max_ply, self.count = _STORE_HEADER.unpack_from(self._map, 0)
+        if magic != STORE_MAGIC or len(self._map) != _STORE_HEADER.size + self.count * _RECORD.size:
+            self._map.close()
+            raise ValueError(f"Not an explorer store: {path}")
+        self._hashes = _HashColumn(self._map, self.count)
+
+    def moves(self, position) -> List[Dict[str, object]]:
+        """
+        Moves played from a position (a GameState or a Board), most played first:
+        dicts with move, games, white, draws, black and score (white's points per game).
+        """
+        board = getattr(position, "board", position)
+        position_hash = board.hash
+        index = bisect.bisect_left(self._hashes, position_hash)
+        stats = []
+        while index < self.count:
+            record_hash, move, white, draws, black = _RECORD.unpack_from(
+                self._map, _STORE_HEADER.size + index * _RECORD.size)
+            if record_hash != position_hash:
+                break
+            games = white + draws + black
+            stats.append({
+                "move": decode_move(move), "games": games, "white": white, "draws": draws,
+                "black": black, "score": (white + 0.5 * draws) / games,
+            })
+            index += 1
+        stats.sort(key=lambda entry: entry["games"], reverse=True)
+        return stats
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._hashes = None
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opening explorer builder and query tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="aggregate games into an explorer store")
+    source = p_build.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pgn")
+    source.add_argument("--archive")
+    p_build.add_argument("store")
+    p_build.add_argument("--depth", type=int, default=20, help="plies replayed per game")
+    p_build.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p_build.add_argument("--chunk", type=int, default=500_000, help="entries per in-memory chunk")
+    p_query = sub.add_parser("query", help="show the moves played from a position")
+    p_query.add_argument("store")
+    group = p_query.add_mutually_exclusive_group()
+    group.add_argument("--fen")
+    group.add_argument("--moves", default="", help="UCI moves from the start position")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        records = build_explorer(args.store, args.pgn, args.archive, args.depth, args.workers, args.chunk)
+        print(f"[explorer] {records} position/move records in {time.perf_counter() - started:.2f}s")
+    else:
+        board = Notation.from_fen(args.fen).board if args.fen else Board()
+        for uci in (args.moves or "").split():
+            board.make_move(*Notation.parse_uci(uci))
+        with Explorer(args.store) as explorer:
+            started = time.perf_counter()
+            stats = explorer.moves(board)
+            elapsed = time.perf_counter() - started
+            print(f"[explorer] {len(stats)} moves in {elapsed * 1000:.2f}ms")
+            for entry in stats:
+                san = Notation.move_to_san(board, entry["move"])
+                print(f"  {san:8} {entry['games']:8d}  +{entry['white']} ={entry['draws']} -{entry['black']}  "
+                      f"{entry['score'] * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Append-only game journal (write-ahead log) with crash recovery.
+
+Every applied move is appended as a few bytes to an in-memory buffer;
+``flush`` writes the buffer as one frame and fsyncs it, and whoever owns the
+journal calls it every ``fsync_interval`` seconds (the server from a worker
+thread), so a crash loses at most that much. Logging itself never touches
+the file. Periodic FEN snapshots bound how many moves recovery has to
+replay, and ``compact`` rewrites the log as one snapshot per live game.
+
+File layout: a sequence of frames, one per flush
+
+    [u32 payload length][u32 crc32(payload)][payload]
+
+The payload is a run of records, each starting with a tag byte:
+
+    NEW       0x01  varint game_id, varint n, n bytes FEN ("" = start position)
+    MOVE      0x02  varint game_id, u16 move (see codec.encode_move)
+    SNAPSHOT  0x03  varint game_id, varint n, n bytes FEN
+    END       0x04  varint game_id
+
+A frame that is incomplete or fails its checksum (torn write) ends the
+log and is truncated on recovery.
+"""
+
+import argparse
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from src.game.board import Board
+from src.game.constants import BOARD_WIDTH, PIECE_NAMES
+from src.game.game_state import GameState
+from src.game.notation import Notation, START_FEN
+from src.game.position import Position
+from src.game.rules import Rules
+from src.storage.codec import Move, encode_move, decode_move, write_varint, read_varint
+
+TAG_NEW = 0x01
+TAG_MOVE = 0x02
+TAG_SNAPSHOT = 0x03
+TAG_END = 0x04
+
+_FRAME_HEADER = struct.Struct("<II")
+_U16 = struct.Struct("<H")
+
+
+class Journal:
+    """
+    Write-ahead log of game starts, moves, snapshots and results. Logging may
+    run on one thread while flush / compact run on another.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.05, snapshot_every: int = 100):
+        """
+        path: journal file (created if missing, appended to otherwise)
+        fsync_interval: how often the owner should flush; flush() without sync fsyncs this often
+        snapshot_every: log a FEN snapshot of a game every N of its moves
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self._buffer = bytearray()
+        self._lock = threading.Lock()  # guards _buffer: records are appended whole
+        self._io_lock = threading.Lock()  # serialises flush, compact and close
+        self._since_snapshot: Dict[int, int] = {}
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._last_sync = time.monotonic()
+        self._dirty = False  # frames written since the last fsync
+
+    # -------------------------
+    # Logging
+    # -------------------------
+    def log_new_game(self, game_id: int, game_state: Optional[GameState] = None) -> None:
+        """Record a new game (from the start position unless game_state says otherwise)."""
+        fen = "" if game_state is None else Notation.to_fen(game_state)
+        with self._lock:
+            self._add_fen_record(TAG_NEW, game_id, "" if fen == START_FEN else fen)
+        self._since_snapshot[game_id] = 0
+
+    def log_move(self, game_id: int, move: Move, game_state: Optional[GameState] = None) -> None:
+        """
+        Record a move already applied to the game. When game_state is given a
+        snapshot of it is logged every ``snapshot_every`` moves.
+        """
+        count = self._since_snapshot.get(game_id, 0) + 1
+        snapshot = None
+        if game_state is not None and count >= self.snapshot_every:
+            snapshot = Notation.to_fen(game_state)
+            count = 0
+        self._since_snapshot[game_id] = count
+        with self._lock:
+            buffer = self._buffer
+            buffer.append(TAG_MOVE)
+            write_varint(buffer, game_id)
+            buffer += _U16.pack(encode_move(move))
+            if snapshot is not None:
+                self._add_fen_record(TAG_SNAPSHOT, game_id, snapshot)
+
+    def log_end(self, game_id: int) -> None:
+        """Record that a game is over: recovery will not rebuild it."""
+        with self._lock:
+            self._buffer.append(TAG_END)
+            write_varint(self._buffer, game_id)
+        self._since_snapshot.pop(game_id, None)
+
+    def _add_fen_record(self, tag: int, game_id: int, fen: str) -> None:
+        data = fen.encode("ascii")
+        buffer = self._buffer
+        buffer.append(tag)
+        write_varint(buffer, game_id)
+        write_varint(buffer, len(data))
+        buffer += data
+
+    # -------------------------
+    # Flushing
+    # -------------------------
+    def cut(self) -> bytes:
+        """Take the buffered records out of the buffer (see compact)."""
+        with self._lock:
+            payload = bytes(self._buffer)
+            self._buffer.clear()
+        return payload
+
+    def _write_frame(self, fd: int, payload: bytes) -> None:
+        os.write(fd, _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+
+    def flush(self, sync: Optional[bool] = None) -> None:
+        """
+        Write buffered records as one frame. fsync when ``sync`` is True, or
+        (default) when the fsync interval has elapsed.
+        """
+        with self._io_lock:
+            self._flush(self.cut(), sync)
+
+    def _flush(self, payload: bytes, sync: Optional[bool]) -> None:
+        if payload:
+            self._write_frame(self._fd, payload)
+            self._dirty = True
+        now = time.monotonic()
+        if sync is None:
+            sync = now - self._last_sync >= self.fsync_interval
+        if sync and self._dirty:
+            os.fsync(self._fd)
+            self._dirty = False
+        if sync:
+            self._last_sync = now
+
+    def size(self) -> int:
+        """Bytes on disk (excluding the unflushed buffer)."""
+        return os.fstat(self._fd).st_size
+
+    def close(self) -> None:
+        with self._io_lock:
+            if self._fd is None:
+                return
+            self._flush(self.cut(), True)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------
+    # Compaction
+    # -------------------------
+    def compact(self, game_states: Dict[int, object], logged: Optional[bytes] = None) -> None:
+        """
+        Replace the log with one snapshot per live game. Written to a temporary
+        file and renamed over the journal.
+
+        game_states are GameStates or game.Position objects. To compact on
+        another thread than the one logging moves, take immutable Positions and
+        ``cut()`` in one step on the logging thread and pass both: the cut
+        records (covered by the snapshots) still reach the old file, and moves
+        logged meanwhile stay buffered and follow the snapshots.
+        """
+        with self._io_lock:
+            self._flush(self.cut() if logged is None else logged, True)
+            tmp_path = self.path + ".tmp"
+            buffer = bytearray()
+            for game_id, game_state in game_states.items():
+                fen = game_state.fen() if isinstance(game_state, Position) else Notation.to_fen(game_state)
+                buffer.append(TAG_NEW)
+                write_varint(buffer, game_id)
+                data = fen.encode("ascii")
+                write_varint(buffer, len(data))
+                buffer += data
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                if buffer:
+                    self._write_frame(fd, bytes(buffer))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, self.path)
+
+            os.close(self._fd)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            self._since_snapshot = dict.fromkeys(game_states, 0)
+            self._last_sync = time.monotonic()
+
+    # -------------------------
+    # Recovery
+    # -------------------------
+    @staticmethod
+    def read_log(path: str) -> Tuple[Dict[int, Tuple[str, List[Move]]], int]:
+        """
+        Scan the log. Returns ({game_id: (fen, moves since that fen)}, valid_length)
+        for games that have not ended; valid_length is where the last good frame ends.
+        """
+        games: Dict[int, Tuple[str, List[Move]]] = {}
+        if not os.path.exists(path):
+            return games, 0
+        with open(path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        header_size = _FRAME_HEADER.size
+        while offset + header_size <= len(data):
+            length, crc = _FRAME_HEADER.unpack_from(data, offset)
+            start = offset + header_size
+            payload = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break  # torn or corrupt tail
+            Journal._read_records(payload, games)
+            offset = start + length
+        return games, offset
+
+    @staticmethod
+    def _read_records(payload: bytes, games: Dict[int, Tuple[str, List[Move]]]) -> None:
+        pos = 0
+        end = len(payload)
+        unpack_move = _U16.unpack_from
+        while pos < end:
+            tag = payload[pos]
+            game_id, pos = read_varint(payload, pos + 1)
+            if tag == TAG_MOVE:
+                entry = games.get(game_id)
+                if entry is not None:
+                    entry[1].append(decode_move(unpack_move(payload, pos)[0]))
+                pos += 2
+            elif tag == TAG_NEW or tag == TAG_SNAPSHOT:
+                length, pos = read_varint(payload, pos)
+                fen = payload[pos:pos + length].decode("ascii") or START_FEN
+                pos += length
+                games[game_id] = (fen, [])
+            elif tag == TAG_END:
+                games.pop(game_id, None)
+            else:
+                raise ValueError(f"Corrupt journal record tag {tag:#x}")
+
+    @staticmethod
+    def recover(path: str, truncate: bool = True) -> Dict[int, GameState]:
+        """
+        Rebuild every unfinished game from the journal. A torn tail is cut
+        off (unless truncate=False) so new frames append after good data.
+        """
+        games, valid_length = Journal.read_log(path)
+        if truncate and os.path.exists(path) and os.path.getsize(path) > valid_length:
+            with open(path, "r+b") as f:
+                f.truncate(valid_length)
+
+        states: Dict[int, GameState] = {}
+        for game_id, (fen, moves) in games.items():
+            game_state = Notation.from_fen(fen)
+            for start_sq, end_sq, promotion in moves:
+                if not game_state.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                                             PIECE_NAMES[promotion] if promotion else None):
+                    print(f"[journal] Warning: game {game_id} has an illegal move, replay stopped.")
+                    break
+            states[game_id] = game_state
+        return states
+
+
+# -------------------------
+# Benchmark
+# -------------------------
+def _random_games(count: int, plies: int, seed: int) -> List[List[Move]]:
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = Board()
+        moves = []
+        for _ in range(plies):
+            legal = Rules.get_legal_moves(board)
+            if not legal:
+                break
+            move = rng.choice(legal)
+            board.make_move(*move)
+            moves.append(move)
+        games.append(moves)
+    return games
+
+
+def benchmark(path: str, total_moves: int, plies: int = 250, snapshot_every: int = 100,
+              fsync_interval: float = 0.05) -> Dict[str, float]:
+    """
+    Append total_moves moves (a pool of random games replayed under fresh
+    game ids, interleaved like a live server) then time full recovery.
+    Games should be longer than snapshot_every so that recovery starts from
+    snapshots and only replays the moves after them.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    pool = _random_games(64, plies, seed=1)
+    states = {}
+    sequences = {}
+
+    journal = Journal(path, fsync_interval=fsync_interval, snapshot_every=snapshot_every)
+    clock = time.perf_counter
+    append_seconds = 0.0  # journal calls only, not the games' own move application
+    written = 0
+    next_id = 1
+    active: List[int] = []
+    while written < total_moves:
+        # keep ~1000 games in flight, like a busy server
+        while len(active) < 1000:
+            sequences[next_id] = iter(pool[next_id % len(pool)])
+            states[next_id] = GameState(Board())
+            started = clock()
+            journal.log_new_game(next_id)
+            append_seconds += clock() - started
+            active.append(next_id)
+            next_id += 1
+        for game_id in list(active):
+            move = next(sequences[game_id], None)
+            if move is None:
+                started = clock()
+                journal.log_end(game_id)
+                append_seconds += clock() - started
+                active.remove(game_id)
+                del states[game_id]
+                continue
+            # applied like the server does, so snapshots carry the right move counters
+            start_sq, end_sq, promotion = move
+            states[game_id].apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                                       PIECE_NAMES[promotion] if promotion else None)
+            started = clock()
+            journal.log_move(game_id, move, states[game_id])
+            append_seconds += clock() - started
+            written += 1
+        started = clock()
+        journal.flush()  # once per round of moves; fsyncs every fsync_interval
+        append_seconds += clock() - started
+    started = clock()
+    journal.close()
+    append_seconds += clock() - started
+
+    started = clock()
+    recovered = Journal.recover(path)
+    recover_seconds = clock() - started
+    return {
+        "moves": written,
+        "bytes": os.path.getsize(path),
+        "append_moves_per_sec": written / append_seconds,
+        "recover_seconds": recover_seconds,
+        "recovered_games": len(recovered),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game journal benchmark")
+    parser.add_argument("--path", default="journal_bench.wal")
+    parser.add_argument("--moves", type=int, default=1_000_000)
+    parser.add_argument("--snapshot-every", type=int, default=100)
+    parser.add_argument("--plies", type=int, default=250, help="length of the replayed games")
+    parser.add_argument("--fsync-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    result = benchmark(args.path, args.moves, plies=args.plies, snapshot_every=args.snapshot_every,
+                       fsync_interval=args.fsync_interval)
+    print(f"[journal] {result['moves']} moves, {result['bytes'] / result['moves']:.2f} bytes/move, "
+          f"append {result['append_moves_per_sec']:.0f} moves/s")
+    print(f"[journal] recovery of {result['recovered_games']} live games: {result['recover_seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
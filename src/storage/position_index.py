@@ -0,0 +1,315 @@
+"""
+Position index: Zobrist hash -> (game id, ply) postings over a game archive.
+
+Every archived game is replayed through Board.make_move and the hash of each
+position it reaches is recorded. Postings are written as sorted, immutable
+segment files and memory-mapped for lookup, so a query is a binary search per
+segment. Building is incremental: each run indexes only the games appended to
+the archive since the last one and adds a new segment; segments are merged
+(streaming) once there are too many of them.
+
+An index is a directory:
+
+  MANIFEST          JSON: {"indexed_games": n, "segments": [names]}
+  seg-<n>.pix       8-byte header (b"CPX2", u32 reserved), u64 count, then
+                    count u64 hashes (sorted) followed by count u64 postings
+                    (game_id << 16 | ply), little-endian
+
+Ply 0 is the start position of a game, ply n the position after its n-th move.
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from src.game.board import Board
+from src.game.notation import Notation
+from src.storage.archive import Archive
+
+SEGMENT_MAGIC = b"CPX2"  # 2: en passant only hashed when a capture is possible (rebuild CPX1 indexes)
+_SEGMENT_HEADER = struct.Struct("<4sIQ")
+MANIFEST = "MANIFEST"
+
+_PLY_BITS = 16
+_POSTING_BITS = 48  # u32 game id + u16 ply
+_POSTING_MASK = (1 << _POSTING_BITS) - 1
+_PLY_MASK = (1 << _PLY_BITS) - 1
+
+Posting = Tuple[int, int]  # (game_id, ply)
+
+
+def _column(view: memoryview) -> memoryview:
+    """u64 column of a segment map (copied only on big-endian hosts)."""
+    column = view.cast("Q")
+    if sys.byteorder != "little":
+        column = array("Q", column)
+        column.byteswap()
+    return column
+
+
+class _Segment:
+    """One memory-mapped, sorted segment file."""
+
+    __slots__ = ("path", "count", "_map", "hashes", "postings")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, count = _SEGMENT_HEADER.unpack_from(self._map, 0)
+        if magic != SEGMENT_MAGIC or len(self._map) != _SEGMENT_HEADER.size + 16 * count:
+            self._map.close()
+            raise ValueError(f"Not a position index segment: {path}")
+        self.count = count
+        view = memoryview(self._map)
+        start = _SEGMENT_HEADER.size
+        self.hashes = _column(view[start:start + 8 * count])
+        self.postings = _column(view[start + 8 * count:])
+
+    def lookup(self, position_hash: int) -> List[int]:
+        hashes = self.hashes
+        lo = bisect.bisect_left(hashes, position_hash)
+        hi = bisect.bisect_right(hashes, position_hash, lo)
+        return list(self.postings[lo:hi])
+
+    def keys(self) -> Iterator[int]:
+        """All entries as merged sort keys (hash << 48 | posting), in order."""
+        for position_hash, posting in zip(self.hashes, self.postings):
+            yield position_hash << _POSTING_BITS | posting
+
+    def close(self) -> None:
+        self.hashes = self.postings = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # a caller still holds a view; the map closes with it
+
+
+def _write_segment(path: str, keys, count: int, chunk: int = 1 << 16) -> None:
+    """
+    Write count sorted keys (hash << 48 | posting) as a segment. keys may be
+    any iterator, so merges stream without holding the postings in memory.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as hashes_out, open(tmp_path, "r+b") as postings_out:
+        hashes_out.write(_SEGMENT_HEADER.pack(SEGMENT_MAGIC, 0, count))
+        postings_out.seek(_SEGMENT_HEADER.size + 8 * count)
+        hashes, postings = array("Q"), array("Q")
+        written = 0
+        for key in keys:
+            hashes.append(key >> _POSTING_BITS)
+            postings.append(key & _POSTING_MASK)
+            if len(hashes) >= chunk:
+                written += _flush_columns(hashes_out, postings_out, hashes, postings)
+        written += _flush_columns(hashes_out, postings_out, hashes, postings)
+        if written != count:
+            raise ValueError(f"Segment {path}: expected {count} postings, got {written}")
+        hashes_out.flush()
+        postings_out.flush()
+        os.fsync(postings_out.fileno())
+    os.replace(tmp_path, path)
+
+
+def _flush_columns(hashes_out, postings_out, hashes: array, postings: array) -> int:
+    count = len(hashes)
+    if sys.byteorder != "little":
+        hashes.byteswap()
+        postings.byteswap()
+    hashes_out.write(hashes.tobytes())
+    postings_out.write(postings.tobytes())
+    del hashes[:]
+    del postings[:]
+    return count
+
+
+class PositionIndex:
+    """Sorted, memory-mapped Zobrist position index stored in a directory."""
+
+    def __init__(self, path: str, max_segments: int = 8):
+        """
+        path: index directory (created if missing)
+        max_segments: merge all segments into one once there are more than this
+        """
+        self.path = path
+        self.max_segments = max_segments
+        os.makedirs(path, exist_ok=True)
+        self.indexed_games = 0
+        self.segments: List[_Segment] = []
+        self._load()
+
+    # -------------------------
+    # Manifest
+    # -------------------------
+    def _load(self) -> None:
+        self._close_segments()
+        manifest_path = os.path.join(self.path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.indexed_games = manifest["indexed_games"]
+        self.segments = [_Segment(os.path.join(self.path, name)) for name in manifest["segments"]]
+
+    def _save(self, names: List[str], indexed_games: int) -> None:
+        """Atomically replace the manifest, then re-map the segments it lists."""
+        manifest_path = os.path.join(self.path, MANIFEST)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"indexed_games": indexed_games, "segments": names}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_path + ".tmp", manifest_path)
+        self._load()
+
+    def _segment_names(self) -> List[str]:
+        return [os.path.basename(segment.path) for segment in self.segments]
+
+    def _new_segment_name(self) -> str:
+        numbers = [int(name[4:-4]) for name in self._segment_names()]
+        return f"seg-{max(numbers, default=0) + 1:06d}.pix"
+
+    # -------------------------
+    # Building
+    # -------------------------
+    def build(self, archive: Archive, batch_postings: int = 4_000_000,
+              max_ply: Optional[int] = None) -> int:
+        """
+        Index the archive's games that are not indexed yet. Postings are
+        sorted in batches of batch_postings, each written as a segment (the
+        manifest is updated after every segment, so an interrupted build
+        resumes where it stopped). max_ply limits how deep games are indexed.
+        Returns the number of games indexed.
+        """
+        board = Board()
+        keys: List[int] = []
+        start = self.indexed_games
+        indexed = 0
+        for game in archive.scan(start):
+            if game.start_fen:
+                board = Notation.from_fen(game.start_fen).board
+            else:
+                board.load_board()
+            game_key = game.game_id << _PLY_BITS
+            keys.append(board.hash << _POSTING_BITS | game_key)
+            for ply, move in enumerate(game.move_list(), 1):
+                if max_ply is not None and ply > max_ply:
+                    break
+                board.make_move(*move)
+                keys.append(board.hash << _POSTING_BITS | game_key | ply)
+            indexed += 1
+            if len(keys) >= batch_postings:
+                self._add_segment(keys, game.game_id + 1)
+                keys = []
+        if keys or indexed:
+            self._add_segment(keys, start + indexed)
+        if len(self.segments) > self.max_segments:
+            self.merge()
+        return indexed
+
+    def _add_segment(self, keys: List[int], indexed_games: int) -> None:
+        names = self._segment_names()
+        if keys:
+            keys.sort()
+            name = self._new_segment_name()
+            _write_segment(os.path.join(self.path, name), keys, len(keys))
+            names.append(name)
+        self._save(names, indexed_games)
+
+    def merge(self) -> None:
+        """Merge every segment into one (k-way streaming merge)."""
+        if len(self.segments) < 2:
+            return
+        old_paths = [segment.path for segment in self.segments]
+        name = self._new_segment_name()
+        count = sum(segment.count for segment in self.segments)
+        _write_segment(os.path.join(self.path, name),
+                       heapq.merge(*(segment.keys() for segment in self.segments)), count)
+        self._save([name], self.indexed_games)
+        for path in old_paths:
+            os.remove(path)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def lookup_hash(self, position_hash: int) -> List[Posting]:
+        """All (game_id, ply) postings of a position hash, sorted."""
+        postings = []
+        for segment in self.segments:
+            postings.extend(segment.lookup(position_hash))
+        postings.sort()
+        return [(posting >> _PLY_BITS, posting & _PLY_MASK) for posting in postings]
+
+    def lookup(self, board: Board) -> List[Posting]:
+        """All (game_id, ply) where an indexed game reached the board's position."""
+        return self.lookup_hash(board.hash)
+
+    def games(self, board: Board) -> List[int]:
+        """Ids of the indexed games that reached the board's position."""
+        return sorted({game_id for game_id, _ in self.lookup(board)})
+
+    def __len__(self) -> int:
+        return sum(segment.count for segment in self.segments)
+
+    def _close_segments(self) -> None:
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def close(self) -> None:
+        self._close_segments()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zobrist position index over a game archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="index the archive's games not indexed yet")
+    p_build.add_argument("archive")
+    p_build.add_argument("index")
+    p_build.add_argument("--max-ply", type=int, default=None, help="only index the first N plies of each game")
+    p_query = sub.add_parser("query", help="list the games that reached a position")
+    p_query.add_argument("index")
+    group = p_query.add_mutually_exclusive_group(required=True)
+    group.add_argument("--fen")
+    group.add_argument("--moves", help="UCI moves from the start position, e.g. 'e2e4 c7c5'")
+    p_query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        with Archive(args.archive) as archive, PositionIndex(args.index) as index:
+            indexed = index.build(archive, max_ply=args.max_ply)
+            elapsed = time.perf_counter() - started
+            print(f"[index] indexed {indexed} games in {elapsed:.2f}s; {index.indexed_games} games, "
+                  f"{len(index)} postings in {len(index.segments)} segment(s)")
+    elif args.command == "query":
+        if args.fen:
+            board = Notation.from_fen(args.fen).board
+        else:
+            board = Board()
+            for uci in args.moves.split():
+                board.make_move(*Notation.parse_uci(uci))
+        with PositionIndex(args.index) as index:
+            started = time.perf_counter()
+            postings = index.lookup(board)
+            elapsed = time.perf_counter() - started
+            games = sorted({game_id for game_id, _ in postings})
+            print(f"[index] {len(games)} games ({len(postings)} postings) in {elapsed * 1000:.2f}ms")
+            for game_id, ply in postings[:args.limit]:
+                print(f"  game {game_id} ply {ply}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Tools package - command line utilities for batch work on games.
+Actually: validate, tournament, export_training, epd, analyze_game
+"""
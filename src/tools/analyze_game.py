@@ -0,0 +1,233 @@
+"""
+Post-game analysis: search every position of a game across worker processes
+and annotate each move with its centipawn loss and the best alternative.
+
+The game's positions are cut into blocks of neighbouring plies; each block
+is one pool task. A worker plays the moves up to the end of its block and
+searches the positions from last to first, taking the moves back with
+Board.unmake_move and keeping its transposition table between them, so the
+deeper analysis of later positions seeds the earlier ones.
+
+Every position gets one search. The loss of a move is the best score of
+the position before it minus the score of the position after it (seen from
+the mover), which is the negamax of the next position's best score; moves
+equal to the engine's choice lose nothing. The annotated game is written
+with Notation.to_pgn comments, e.g. {-1.20 blunder (310 cp), best Nf3 +1.90}.
+
+    python -m src.tools.analyze_game game.pgn --movetime 100 --workers 8 --out annotated.pgn
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.engine.evaluation import evaluate
+from src.engine.search import Search, SearchLimits, MATE_BOUND, MATE_SCORE
+from src.game.constants import WHITE, BLACK
+from src.game.notation import Notation, START_FEN
+from src.game.rules import Rules
+
+Move = Tuple[int, int, int]  # (start_sq, end_sq, promotion_code)
+
+LOSS_CAP = 1000  # scores are clipped to +-LOSS_CAP before computing losses, so lost-anyway mates do not dominate
+# (centipawn loss threshold, label), largest first
+LABELS = ((300, "blunder"), (100, "mistake"), (50, "inaccuracy"))
+
+_worker_search: Optional[Search] = None
+
+
+def _init_worker(hash_mb: int = 16) -> None:
+    global _worker_search
+    _worker_search = Search(hash_mb)
+
+
+# -------------------------
+# Searching
+# -------------------------
+def _search_position(board, limits: SearchLimits, history: List[int]) -> Tuple[int, Optional[Move]]:
+    """(score for the side to move, best move) of one position."""
+    if not Rules.has_legal_move(board, board.turn):
+        return (-MATE_SCORE if Rules.is_in_check(board, board.turn) else 0), None
+    scores = []
+    _worker_search.stop_event.clear()
+    move, _ = _worker_search.think(board, limits, history, info=lambda info: scores.append(info["score"]))
+    return (scores[-1] if scores else evaluate(board)), move
+
+
+def analyze_block(start_fen: str, moves: List[Move], first: int, last: int,
+                  limits: SearchLimits) -> List[Tuple[int, int, Optional[Move]]]:
+    """
+    Pool task: (ply, score for the side to move, best move) of the positions
+    before moves first..last (last may be len(moves), the final position).
+    """
+    if _worker_search is None:
+        _init_worker()
+    _worker_search.clear()  # blocks do not depend on what the worker searched before
+    board = Notation.from_fen(start_fen).board
+    history = []
+    undos = []
+    for move in moves[:last]:
+        history.append(board.hash)
+        undos.append(board.make_move(*move))
+    results = []
+    for ply in range(last, first - 1, -1):
+        score, best = _search_position(board, limits, history[:ply])
+        results.append((ply, score, best))
+        if ply > first:
+            board.unmake_move(undos.pop())
+    results.reverse()
+    return results
+
+
+def analyze_moves(moves: List[Move], start_fen: str = START_FEN, limits: Optional[SearchLimits] = None,
+                  workers: int = 1, block: int = 8, hash_mb: int = 16) -> List[Dict[str, object]]:
+    """
+    Analyse a game given as moves from start_fen. Returns one dict per move:
+    ply, san, score (white's point of view after the move, centipawns), best,
+    best_san, best_score (white's point of view), loss (centipawns) and label.
+    """
+    limits = limits or SearchLimits(movetime=100)
+    positions = len(moves) + 1
+    blocks = [(start, min(start + block, positions) - 1) for start in range(0, positions, block)]
+    searched: Dict[int, Tuple[int, Optional[Move]]] = {}
+    if workers <= 1:
+        _init_worker(hash_mb)
+        for first, last in blocks:
+            for ply, score, best in analyze_block(start_fen, moves, first, last, limits):
+                searched[ply] = (score, best)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(hash_mb,)) as executor:
+            futures = [executor.submit(analyze_block, start_fen, moves, first, last, limits) for first, last in blocks]
+            for future in futures:
+                for ply, score, best in future.result():
+                    searched[ply] = (score, best)
+
+    board = Notation.from_fen(start_fen).board
+    analysis = []
+    for ply, move in enumerate(moves):
+        sign = 1 if board.turn == WHITE else -1
+        best_score, best = searched[ply]
+        played_score = -searched[ply + 1][0]
+        if best is None or move == best:
+            loss = 0
+        else:
+            loss = max(0, _capped(best_score) - _capped(played_score))
+        entry = {
+            "ply": ply,
+            "san": Notation.move_to_san(board, move),
+            "score": sign * played_score,
+            "best": best,
+            "best_san": Notation.move_to_san(board, best) if best is not None else None,
+            "best_score": sign * best_score,
+            "loss": loss,
+            "label": next((label for threshold, label in LABELS if loss >= threshold), None),
+        }
+        analysis.append(entry)
+        board.make_move(*move)
+    return analysis
+
+
+def analyze_game_state(game_state, start_fen: str = START_FEN, **options) -> List[Dict[str, object]]:
+    """analyze_moves for a GameState's move_history."""
+    return analyze_moves(Notation.history_to_moves(game_state), start_fen, **options)
+
+
+def _capped(score: int) -> int:
+    return max(-LOSS_CAP, min(LOSS_CAP, score))
+
+
+# -------------------------
+# Annotation
+# -------------------------
+def format_score(score: int) -> str:
+    """White's-point-of-view score as PGN comment text: +0.35, -1.20, #3, #-2 (mate once it is on the board)."""
+    if abs(score) > MATE_BOUND:
+        plies = MATE_SCORE - abs(score)
+        if not plies:
+            return "mate"
+        return f"#{(plies + 1) // 2}" if score > 0 else f"#-{(plies + 1) // 2}"
+    return f"{score / 100:+.2f}"
+
+
+def comments(analysis: List[Dict[str, object]]) -> Dict[int, str]:
+    """{ply: comment} for Notation.to_pgn."""
+    texts = {}
+    for entry in analysis:
+        text = format_score(entry["score"])
+        if entry["loss"]:
+            if entry["label"]:
+                text += f" {entry['label']}"
+            text += f" ({entry['loss']} cp), best {entry['best_san']} {format_score(entry['best_score'])}"
+        texts[entry["ply"]] = text
+    return texts
+
+
+def summary(analysis: List[Dict[str, object]], start_turn: int = WHITE) -> Dict[str, Dict[str, object]]:
+    """Per side: moves, average centipawn loss and label counts."""
+    sides = {}
+    for color, name in ((WHITE, "white"), (BLACK, "black")):
+        entries = [entry for entry in analysis if (start_turn + entry["ply"]) % 2 == color]
+        side = {"moves": len(entries),
+                "acpl": sum(entry["loss"] for entry in entries) / len(entries) if entries else 0.0}
+        for _, label in LABELS:
+            side[label] = sum(entry["label"] == label for entry in entries)
+        sides[name] = side
+    return sides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate a game with centipawn losses and best moves")
+    parser.add_argument("pgn")
+    parser.add_argument("--game", type=int, default=1, help="which game of the file (1 = first)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--movetime", type=int, default=None, help="milliseconds per position (default 100)")
+    parser.add_argument("--nodes", type=int, default=None, help="node limit per position")
+    parser.add_argument("--depth", type=int, default=None, help="depth limit per position")
+    parser.add_argument("--block", type=int, default=8, help="neighbouring plies searched by one task")
+    parser.add_argument("--hash", type=int, default=16, help="transposition table megabytes per worker")
+    parser.add_argument("--out", default=None, help="write the annotated PGN here (default stdout)")
+    args = parser.parse_args()
+
+    with open(args.pgn, encoding="utf-8", errors="replace") as f:
+        games = Notation.read_pgn(f)
+        game = next((game for index, game in enumerate(games, 1) if index == args.game), None)
+    if game is None:
+        parser.error(f"{args.pgn} has no game {args.game}")
+    start_fen = game["headers"].get("FEN") or START_FEN
+    board = Notation.from_fen(start_fen).board
+    start_turn = board.turn
+    moves = []
+    for san in game["moves"]:
+        move = Notation.san_to_move(board, san)
+        board.make_move(*move)
+        moves.append(move)
+
+    movetime = args.movetime
+    if movetime is None and args.nodes is None and args.depth is None:
+        movetime = 100
+    limits = SearchLimits(depth=args.depth, movetime=movetime, nodes=args.nodes)
+    started = time.perf_counter()
+    analysis = analyze_moves(moves, start_fen, limits, args.workers, args.block, args.hash)
+    elapsed = time.perf_counter() - started
+
+    headers = dict(game["headers"])
+    headers.setdefault("Annotator", "ChessGame-py")
+    pgn = Notation.to_pgn(moves, headers, game["result"], None if start_fen == START_FEN else start_fen,
+                          comments(analysis))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(pgn + "\n")
+    else:
+        print(pgn)
+    for name, side in summary(analysis, start_turn).items():
+        print(f"[analyze_game] {name}: {side['moves']} moves, average loss {side['acpl']:.0f} cp, "
+              f"{side['inaccuracy']} inaccuracies, {side['mistake']} mistakes, {side['blunder']} blunders",
+              file=sys.stderr)
+    print(f"[analyze_game] {len(moves) + 1} positions in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
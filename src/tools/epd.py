@@ -0,0 +1,240 @@
+"""
+EPD test-suite runner: search every position of a suite (WAC, STS, ...) in a
+process pool and check the engine's move against the bm / am operations.
+
+Positions are set up through Notation.from_fen and searched with one
+engine.Search per worker (its table cleared for every position, so results
+do not depend on which worker got which position) under a per-position
+movetime, node or depth limit. Results are printed as workers finish; the
+summary gives the solve rate, the mean time to solution (the first iteration
+after which the best move was a solution and stayed one) and the overall
+nodes per second, which makes the suite the throughput benchmark for engine
+changes.
+
+Each result is one JSON line with --out:
+
+  {"index": n, "id": "WAC.001", "fen": ..., "move": "Qg6", "solved": true,
+   "solution_ms": 35, "solution_depth": 3, "depth": 7, "nodes": 51234, "ms": 1000,
+   "error": null}
+
+    python -m src.tools.epd wac.epd --movetime 1000 --workers 8
+    python -m src.tools.epd sts.epd --nodes 200000 --out results.jsonl
+"""
+
+import argparse
+import json
+import os
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from src.engine.search import Search, SearchLimits
+from src.game.notation import Notation
+
+_worker_search: Optional[Search] = None
+
+
+def _init_worker(hash_mb: int = 16) -> None:
+    global _worker_search
+    _worker_search = Search(hash_mb)
+
+
+# -------------------------
+# Parsing
+# -------------------------
+def parse_epd(line: str) -> Optional[Dict[str, object]]:
+    """
+    One EPD record: {"fen": ..., "id": ..., "bm": [san...], "am": [san...],
+    "ops": {opcode: operands}}, or None for blank and comment lines. The
+    four EPD fields get the move counters "0 1" (or hmvc / fmvn if present).
+    """
+    text = line.strip()
+    if not text or text.startswith("#"):
+        return None
+    fields = text.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"Invalid EPD record: {text!r}")
+    ops: Dict[str, List[str]] = {}
+    if len(fields) == 5:
+        lexer = shlex.shlex(fields[4], posix=True)
+        lexer.whitespace = " \t"
+        lexer.whitespace_split = True
+        lexer.commenters = ""
+        # ';' ends an operation; it may be glued to the last operand
+        operation: List[str] = []
+        for token in lexer:
+            ends = token.endswith(";")
+            token = token.rstrip(";")
+            if token:
+                operation.append(token)
+            if ends and operation:
+                ops[operation[0]] = operation[1:]
+                operation = []
+        if operation:
+            ops[operation[0]] = operation[1:]
+    counters = [ops.get("hmvc", ["0"])[0], ops.get("fmvn", ["1"])[0]]
+    return {
+        "fen": " ".join(fields[:4] + counters),
+        "id": " ".join(ops.get("id", [])) or None,
+        "bm": ops.get("bm", []),
+        "am": ops.get("am", []),
+        "ops": ops,
+    }
+
+
+def load_epd(path: str) -> List[Dict[str, object]]:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        records = [record for record in map(parse_epd, f) if record is not None]
+    if not records:
+        raise ValueError(f"No positions found in {path}")
+    return records
+
+
+def _resolve(board, text: str):
+    """A bm/am operand as a legal move tuple (SAN, or UCI as some suites use)."""
+    try:
+        return Notation.san_to_move(board, text)
+    except ValueError:
+        try:
+            return Notation.parse_uci(text)
+        except ValueError:
+            pass
+        raise
+
+
+# -------------------------
+# Solving
+# -------------------------
+def solve_position(index: int, record: Dict[str, object], limits: SearchLimits) -> Dict[str, object]:
+    """Pool task: search one suite position and judge the move."""
+    if _worker_search is None:
+        _init_worker()
+    result = {"index": index, "id": record["id"], "fen": record["fen"], "move": None, "solved": None,
+              "solution_ms": None, "solution_depth": None, "depth": 0, "nodes": 0, "ms": 0, "error": None}
+    try:
+        board = Notation.from_fen(record["fen"]).board
+        best = {_resolve(board, text) for text in record["bm"]}
+        avoid = {_resolve(board, text) for text in record["am"]}
+    except ValueError as exc:
+        result["error"] = str(exc)
+        return result
+
+    def is_solution(move) -> bool:
+        return move is not None and (move in best if best else move not in avoid)
+
+    def on_info(info):
+        result["depth"] = info["depth"]
+        if not is_solution(info["pv"][0]):
+            result["solution_ms"] = result["solution_depth"] = None
+        elif result["solution_ms"] is None:
+            result["solution_ms"] = info["time"]
+            result["solution_depth"] = info["depth"]
+
+    search = _worker_search
+    search.clear()
+    search.stop_event.clear()
+    started = time.perf_counter()
+    move, _ = search.think(board, limits, info=on_info)
+    result["ms"] = int((time.perf_counter() - started) * 1000)
+    result["nodes"] = search.nodes
+    if move is not None:
+        result["move"] = Notation.move_to_san(board, move)
+    if best or avoid:
+        result["solved"] = is_solution(move)
+    if not result["solved"]:
+        result["solution_ms"] = result["solution_depth"] = None
+    return result
+
+
+def run_suite(records: List[Dict[str, object]], limits: SearchLimits, workers: int = 1, hash_mb: int = 16,
+              on_result=None) -> Dict[str, object]:
+    """
+    Solve every record; on_result is called with each result as it finishes
+    (not in suite order). Returns a summary: positions, scored, solved,
+    solve_rate, mean_solution_ms, nodes, nps (all workers, by wall clock),
+    worker_nps (while searching), seconds.
+    """
+    results = []
+
+    def collect(result):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    started = time.perf_counter()
+    if workers <= 1:
+        _init_worker(hash_mb)
+        for index, record in enumerate(records):
+            collect(solve_position(index, record, limits))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(hash_mb,)) as executor:
+            futures = [executor.submit(solve_position, index, record, limits) for index, record in enumerate(records)]
+            for future in as_completed(futures):
+                collect(future.result())
+    elapsed = time.perf_counter() - started
+
+    scored = [result for result in results if result["solved"] is not None]
+    solved = [result for result in scored if result["solved"]]
+    nodes = sum(result["nodes"] for result in results)
+    search_seconds = sum(result["ms"] for result in results) / 1000.0
+    return {
+        "positions": len(results),
+        "scored": len(scored),
+        "solved": len(solved),
+        "solve_rate": len(solved) / len(scored) if scored else 0.0,
+        "mean_solution_ms": sum(result["solution_ms"] for result in solved) / len(solved) if solved else None,
+        "nodes": nodes,
+        "nps": int(nodes / elapsed) if elapsed else 0,
+        "worker_nps": int(nodes / search_seconds) if search_seconds else 0,
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an EPD test suite (bm/am) through the engine")
+    parser.add_argument("epd")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--movetime", type=int, default=None, help="milliseconds per position (default 1000)")
+    parser.add_argument("--nodes", type=int, default=None, help="node limit per position")
+    parser.add_argument("--depth", type=int, default=None, help="depth limit per position")
+    parser.add_argument("--hash", type=int, default=16, help="transposition table megabytes per worker")
+    parser.add_argument("--out", default=None, help="write JSON-lines results here")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    movetime = args.movetime
+    if movetime is None and args.nodes is None and args.depth is None:
+        movetime = 1000
+    limits = SearchLimits(depth=args.depth, movetime=movetime, nodes=args.nodes)
+    records = load_epd(args.epd)
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+
+    def emit(result):
+        if out is not None:
+            out.write(json.dumps(result) + "\n")
+        if not args.quiet:
+            if result["error"]:
+                verdict = f"error: {result['error']}"
+            else:
+                verdict = {True: "ok", False: "FAIL", None: "-"}[result["solved"]]
+                verdict += f" {result['move']} (depth {result['depth']}, {result['nodes']} nodes"
+                if result["solution_ms"] is not None:
+                    verdict += f", found at {result['solution_ms']}ms"
+                verdict += ")"
+            print(f"[epd] {result['id'] or result['index'] + 1}: {verdict}", flush=True)
+
+    try:
+        summary = run_suite(records, limits, args.workers, args.hash, emit)
+    finally:
+        if out is not None:
+            out.close()
+    mean = summary["mean_solution_ms"]
+    print(f"[epd] solved {summary['solved']}/{summary['scored']} ({summary['solve_rate']:.1%}), "
+          f"mean time to solution {'-' if mean is None else f'{mean:.0f}ms'}, "
+          f"{summary['nodes']} nodes, {summary['nps']} nps ({summary['worker_nps']} per worker), "
+          f"{summary['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
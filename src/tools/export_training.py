@@ -0,0 +1,302 @@
+"""
+Training data export: stream PGN games into fixed-size shards of positions.
+
+Games are read with the byte-range sharding of tools.validate and replayed
+in a process pool. Positions are sampled by ply range, optionally skipping
+positions in check or whose game move is a capture, and by a sampling rate
+whose random draw is seeded per game (seed, file, byte offset), so the
+output does not depend on the number of workers or the input chunk size.
+Chunks are written in input order, so repeated runs produce identical files.
+
+Every output shard is one .npy file of RECORD_DTYPE records (np.load(path,
+mmap_mode="r") maps it without reading it):
+
+    planes   uint8[12, 8]   one 64-bit plane per piece (white pawn..king,
+                            black pawn..king), bit i = square i (a8 = 0),
+                            see unpack_planes
+    turn     uint8          side to move (0 white, 1 black)
+    result   int8           game result for white: 1, 0 or -1
+    score    int16          engine score for the side to move in centipawns,
+                            SCORE_NONE without --depth
+
+All shards hold --shard-size positions except the last one. index.json lists
+the shards and the export options. Memory is bounded by the chunks in
+flight (two per worker) plus one shard being filled, whatever the input size.
+
+    python -m src.tools.export_training games.pgn --out data/ --min-ply 10 --skip-captures
+    python -m src.tools.export_training games.pgn --out data/ --sample-rate 0.2 --depth 3 --workers 8
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from src.engine.batch_eval import to_planes
+from src.engine.search import Search, SearchLimits
+from src.game.board import Board
+from src.game.constants import PAWN
+from src.game.game_state import GameState
+from src.game.notation import Notation, START_FEN
+from src.game.rules import Rules
+from src.tools.validate import plan_shards, _read_shard
+
+RECORD_DTYPE = np.dtype([
+    ("planes", np.uint8, (12, 8)),
+    ("turn", np.uint8),
+    ("result", np.int8),
+    ("score", np.int16),
+])
+SCORE_NONE = -32768
+SCORE_LIMIT = 32000  # engine scores (mates included) are clipped to +-SCORE_LIMIT
+
+_RESULTS = {"1-0": 1, "1/2-1/2": 0, "0-1": -1}
+
+_worker_state: Optional[GameState] = None
+_worker_search: Optional[Search] = None
+
+
+def _init_worker() -> None:
+    global _worker_state, _worker_search
+    _worker_state = GameState(Board())
+    _worker_search = Search(4)
+
+
+class SampleOptions:
+    """Which positions of a game are exported."""
+
+    __slots__ = ("min_ply", "max_ply", "skip_checks", "skip_captures", "sample_rate", "seed", "depth")
+
+    def __init__(self, min_ply: int = 0, max_ply: Optional[int] = None, skip_checks: bool = False,
+                 skip_captures: bool = False, sample_rate: float = 1.0, seed: int = 0, depth: int = 0):
+        self.min_ply = min_ply
+        self.max_ply = max_ply
+        self.skip_checks = skip_checks
+        self.skip_captures = skip_captures
+        self.sample_rate = sample_rate
+        self.seed = seed
+        self.depth = depth  # 0: no engine score
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+# -------------------------
+# Sampling
+# -------------------------
+def _engine_score(board: Board, depth: int) -> int:
+    if _worker_search is None:
+        _init_worker()
+    scores = []
+    _worker_search.clear()  # no table carried over: the score depends on the position only
+    _worker_search.stop_event.clear()
+    _worker_search.think(board, SearchLimits(depth=depth), info=lambda info: scores.append(info["score"]))
+    if not scores:
+        return SCORE_NONE
+    return max(-SCORE_LIMIT, min(SCORE_LIMIT, scores[-1]))
+
+
+def sample_game(game_state: GameState, game: Dict[str, object], options: SampleOptions,
+                rng: random.Random) -> Optional[List[tuple]]:
+    """
+    Replay one parsed PGN game and return (codes, turn, result, score) for each
+    sampled position; codes is the 64-byte piece code string. Games without a
+    decisive or drawn result, with a bad FEN or with an illegal move are
+    rejected (None).
+    """
+    result = _RESULTS.get(game["result"])
+    if result is None:
+        return None
+    try:
+        Notation.from_fen(game["headers"].get("FEN") or START_FEN, game_state)
+    except ValueError:
+        return None
+    board = game_state.board
+    squares = board.squares
+    samples = []
+    for ply, san in enumerate(game["moves"]):
+        if options.max_ply is not None and ply > options.max_ply:
+            break
+        try:
+            move = Notation.san_to_move(board, san)
+        except ValueError:
+            return None
+        start_sq, end_sq, _ = move
+        if ply >= options.min_ply and rng.random() < options.sample_rate:
+            capture = squares[end_sq] is not None or (
+                end_sq == board.ep_square and squares[start_sq].kind.type_code == PAWN)
+            if not (options.skip_captures and capture) and not (
+                    options.skip_checks and Rules.is_in_check(board, board.turn)):
+                codes = bytes(0 if piece is None else piece.kind.code for piece in squares)
+                score = _engine_score(board, options.depth) if options.depth else SCORE_NONE
+                samples.append((codes, board.turn, result, score))
+        board.make_move(*move)
+    return samples
+
+
+def to_records(samples: List[tuple]) -> np.ndarray:
+    """Sampled positions -> RECORD_DTYPE array."""
+    records = np.zeros(len(samples), dtype=RECORD_DTYPE)
+    if samples:
+        codes = np.frombuffer(b"".join(sample[0] for sample in samples), dtype=np.uint8).reshape(-1, 64)
+        records["planes"] = np.packbits(to_planes(codes), axis=2, bitorder="little")
+        records["turn"] = [sample[1] for sample in samples]
+        records["result"] = [sample[2] for sample in samples]
+        records["score"] = [sample[3] for sample in samples]
+    return records
+
+
+def unpack_planes(planes: np.ndarray) -> np.ndarray:
+    """(N, 12, 8) packed planes -> (N, 12, 64) uint8 one-hot planes."""
+    return np.unpackbits(planes, axis=2, bitorder="little")
+
+
+def export_chunk(path: str, start: int, stop: int, file_index: int, options: SampleOptions) -> tuple:
+    """Pool task: (records, games, rejected games) for the games of one byte range."""
+    if _worker_state is None:
+        _init_worker()
+    samples = []
+    games = rejected = 0
+    for offset, data in _read_shard(path, start, stop):
+        text = data.decode("utf-8", errors="replace")
+        for game in Notation.read_pgn(text.splitlines()):
+            rng = random.Random(f"{options.seed}:{file_index}:{offset}")
+            game_samples = sample_game(_worker_state, game, options, rng)
+            games += 1
+            if game_samples is None:
+                rejected += 1
+            else:
+                samples.extend(game_samples)
+    return to_records(samples), games, rejected
+
+
+# -------------------------
+# Output
+# -------------------------
+class ShardWriter:
+    """Collects records and writes them out as numbered shards of shard_size positions."""
+
+    def __init__(self, out_dir: str, shard_size: int):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.shards: List[Dict[str, object]] = []
+        self.positions = 0
+        self._pending: List[np.ndarray] = []
+        self._pending_count = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def add(self, records: np.ndarray) -> None:
+        self._pending.append(records)
+        self._pending_count += len(records)
+        while self._pending_count >= self.shard_size:
+            self._flush(self.shard_size)
+
+    def close(self, options: Dict[str, object]) -> None:
+        if self._pending_count:
+            self._flush(self._pending_count)
+        index = {"format": "export_training/1", "positions": self.positions, "shards": self.shards,
+                 "fields": {name: str(RECORD_DTYPE[name]) for name in RECORD_DTYPE.names},
+                 "options": options}
+        with open(os.path.join(self.out_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+
+    def _flush(self, count: int) -> None:
+        records = np.concatenate(self._pending)
+        name = f"shard-{len(self.shards):05d}.npy"
+        path = os.path.join(self.out_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, records[:count])
+        os.replace(tmp_path, path)
+        self.shards.append({"file": name, "positions": count})
+        self.positions += count
+        self._pending = [records[count:]]
+        self._pending_count = len(records) - count
+
+
+def load_shards(out_dir: str) -> Iterator[np.ndarray]:
+    """Memory-map the shards of an export directory in order."""
+    with open(os.path.join(out_dir, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    for shard in index["shards"]:
+        yield np.load(os.path.join(out_dir, shard["file"]), mmap_mode="r")
+
+
+def export_files(paths: List[str], out_dir: str, options: SampleOptions, workers: int = 1,
+                 shard_size: int = 1 << 16, chunk_bytes: int = 1 << 20) -> Dict[str, object]:
+    """
+    Export the sampled positions of every game of the given PGN files to
+    out_dir. Returns a summary: games, rejected_games, positions, shards, seconds.
+    """
+    chunks = [(path, start, stop, file_index, options)
+              for file_index, path in enumerate(paths) for path, start, stop in plan_shards([path], chunk_bytes)]
+    writer = ShardWriter(out_dir, shard_size)
+    totals = collections.Counter()
+
+    def collect(outcome):
+        records, games, rejected = outcome
+        totals["games"] += games
+        totals["rejected_games"] += rejected
+        writer.add(records)
+
+    started = time.perf_counter()
+    if workers <= 1:
+        for chunk in chunks:
+            collect(export_chunk(*chunk))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+            queued = iter(chunks)
+            running = collections.deque()
+            while True:
+                # a couple of chunks per worker in flight, collected in input order
+                for chunk in queued:
+                    running.append(executor.submit(export_chunk, *chunk))
+                    if len(running) >= 2 * workers:
+                        break
+                if not running:
+                    break
+                collect(running.popleft().result())
+    writer.close(options.as_dict())
+    return {
+        "games": totals["games"],
+        "rejected_games": totals["rejected_games"],
+        "positions": writer.positions,
+        "shards": len(writer.shards),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export sampled positions of PGN games as training shards")
+    parser.add_argument("pgn", nargs="+")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=1 << 16, help="positions per output shard")
+    parser.add_argument("--chunk-mb", type=float, default=1.0, help="PGN bytes per worker task, in megabytes")
+    parser.add_argument("--min-ply", type=int, default=0, help="skip positions before this ply")
+    parser.add_argument("--max-ply", type=int, default=None, help="skip positions after this ply")
+    parser.add_argument("--skip-checks", action="store_true", help="skip positions with the side to move in check")
+    parser.add_argument("--skip-captures", action="store_true", help="skip positions where the game move captures")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="fraction of the eligible positions to keep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--depth", type=int, default=0, help="score positions with an engine search of this depth")
+    args = parser.parse_args()
+
+    options = SampleOptions(args.min_ply, args.max_ply, args.skip_checks, args.skip_captures,
+                            args.sample_rate, args.seed, args.depth)
+    summary = export_files(args.pgn, args.out, options, args.workers, args.shard_size,
+                           int(args.chunk_mb * (1 << 20)))
+    print(f"[export_training] {summary['games']} games ({summary['rejected_games']} rejected), "
+          f"{summary['positions']} positions in {summary['shards']} shards, {summary['seconds']:.2f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+"""
+Engine-vs-engine tournament runner with Elo estimate and SPRT.
+
+Two UCI engines (any commands; by default this repo's ``python -m src.uci``)
+play game pairs from an opening suite: each opening is played twice with the
+colors swapped. Pairs run in a process pool, one pair per worker, with the
+engines started as subprocesses of the worker. Moves are applied to a
+GameState, which adjudicates the games (checkmate, stalemate, fifty moves,
+repetition, insufficient material); an illegal move or a flag fall loses.
+
+Results are reported from engine A's point of view: Elo difference with a
+95% error bar, and optionally a sequential probability ratio test that
+stops the run as soon as H0 (elo0) or H1 (elo1) is accepted.
+
+Every game is appended to a PGN file and a JSON-lines log with the engines'
+nodes per second, so speed regressions show up next to strength.
+
+With --ponder-a / --ponder-b an engine thinks on its expected reply (the
+bestmove's ponder move) during the opponent's turn: ``go ponder``, then
+``ponderhit`` if the opponent plays that move, ``stop`` and a normal ``go``
+otherwise. The summary reports the ponder hit rate and the nodes searched
+per move, so the search a side gets for free shows up as more nodes per
+move (on a single core it is taken from the opponent).
+
+    python -m src.tools.tournament --engine-b "python -m src.uci" --dir-b ../baseline \\
+        --games 200 --tc 10+0.1 --sprt 0 5 --pgn match.pgn --log match.jsonl
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from src.game.constants import BOARD_WIDTH, PIECE_NAMES
+from src.game.notation import Notation, START_FEN
+
+# opening lines (UCI moves from the start position) used without --openings
+DEFAULT_OPENINGS = (
+    "e2e4 e7e5 g1f3 b8c6",
+    "e2e4 c7c5 g1f3 d7d6",
+    "e2e4 e7e6 d2d4 d7d5",
+    "e2e4 c7c6 d2d4 d7d5",
+    "d2d4 d7d5 c2c4 e7e6",
+    "d2d4 g8f6 c2c4 g7g6",
+    "c2c4 e7e5 b1c3 g8f6",
+    "g1f3 d7d5 g2g3 g8f6",
+)
+
+MAX_PLIES = 400  # adjudicate longer games as draws
+
+Opening = Tuple[str, List[str]]  # (start FEN, UCI moves)
+
+_stop = None  # in pool workers: event set when the run is over (SPRT verdict), see _init_worker
+
+
+# -------------------------
+# Statistics
+# -------------------------
+def elo_from_score(score: float) -> float:
+    """Elo difference for an expected score in (0, 1)."""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def elo_with_error(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """(Elo difference, 95% error margin) from the trinomial results."""
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    low, high = elo_from_score(score - margin), elo_from_score(score + margin)
+    return elo_from_score(score), (high - low) / 2
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """Log-likelihood ratio of H1 (elo1) against H0 (elo0), normal approximation."""
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    if variance <= 0:
+        return 0.0
+    s0 = 1.0 / (1.0 + 10 ** (-elo0 / 400.0))
+    s1 = 1.0 / (1.0 + 10 ** (-elo1 / 400.0))
+    return (s1 - s0) * (2 * score - s0 - s1) * games / (2 * variance)
+
+
+def sprt_bounds(alpha: float, beta: float) -> Tuple[float, float]:
+    """(lower, upper) LLR bounds: accept H0 below lower, H1 above upper."""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+# -------------------------
+# Engines
+# -------------------------
+class UCIPlayer:
+    """A UCI engine subprocess."""
+
+    def __init__(self, command: str, cwd: Optional[str] = None, options: Optional[Dict[str, str]] = None,
+                 ponder: bool = False):
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+        self.process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1, cwd=cwd, env=env)
+        self.name = command
+        self.ponder_enabled = ponder
+        self.pondering = False
+        self.expected: Optional[str] = None  # ponder move of the last bestmove
+        self._send("uci")
+        for line in self._lines():
+            if line.startswith("id name "):
+                self.name = line[8:].strip()
+            elif line == "uciok":
+                break
+        if ponder:
+            self._send("setoption name Ponder value true")
+        for name, value in (options or {}).items():
+            self._send(f"setoption name {name} value {value}")
+        self.ready()
+
+    def _send(self, line: str) -> None:
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+
+    def _lines(self):
+        for line in self.process.stdout:
+            yield line.strip()
+        raise RuntimeError(f"Engine {self.name!r} exited")
+
+    def ready(self) -> None:
+        self._send("isready")
+        for line in self._lines():
+            if line == "readyok":
+                return
+
+    def new_game(self) -> None:
+        self._send("ucinewgame")
+        self.ready()
+
+    @staticmethod
+    def _position(fen: str, moves: List[str]) -> str:
+        position = "position startpos" if fen == START_FEN else f"position fen {fen}"
+        if moves:
+            position += " moves " + " ".join(moves)
+        return position
+
+    def go(self, fen: str, moves: List[str], go_args: str) -> Tuple[str, int, int]:
+        """Search the position; returns (bestmove, nodes, search time in ms) from its last info."""
+        self._send(self._position(fen, moves))
+        self._send("go " + go_args)
+        return self._bestmove()
+
+    def ponder(self, fen: str, moves: List[str], go_args: str) -> None:
+        """Start pondering on moves (ending with the expected reply); end it with ponderhit() or stop()."""
+        self._send(self._position(fen, moves))
+        self._send("go ponder " + go_args)
+        self.pondering = True
+
+    def ponderhit(self) -> Tuple[str, int, int]:
+        """The expected reply was played: let the ponder search finish as the move search (like go)."""
+        self.pondering = False
+        self._send("ponderhit")
+        return self._bestmove()
+
+    def stop(self) -> None:
+        """Abandon the ponder search (its bestmove is read and dropped)."""
+        self.pondering = False
+        self._send("stop")
+        self._bestmove()
+
+    def _bestmove(self) -> Tuple[str, int, int]:
+        nodes = elapsed = 0
+        for line in self._lines():
+            if line.startswith("info "):
+                fields = line.split()
+                for key in ("nodes", "time"):
+                    if key in fields:
+                        try:
+                            value = int(fields[fields.index(key) + 1])
+                        except (IndexError, ValueError):
+                            continue
+                        if key == "nodes":
+                            nodes = value
+                        else:
+                            elapsed = value
+            elif line.startswith("bestmove"):
+                parts = line.split()
+                self.expected = parts[3] if len(parts) > 3 and parts[2] == "ponder" else None
+                return (parts[1] if len(parts) > 1 else "0000"), nodes, elapsed
+
+    def quit(self) -> None:
+        try:
+            self._send("quit")
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+# -------------------------
+# Games
+# -------------------------
+def _go_args(limits: Dict[str, object], clocks: List[float]) -> str:
+    if limits.get("tc"):
+        increment = limits["tc"][1]
+        return (f"wtime {int(clocks[0])} btime {int(clocks[1])} "
+                f"winc {int(increment)} binc {int(increment)}")
+    if limits.get("movetime"):
+        return f"movetime {limits['movetime']}"
+    if limits.get("nodes"):
+        return f"nodes {limits['nodes']}"
+    return f"depth {limits.get('depth') or 4}"
+
+
+def play_game(white: UCIPlayer, black: UCIPlayer, opening: Opening, limits: Dict[str, object]) -> Dict[str, object]:
+    """Play one game; returns its record (result, termination, moves, nps per side...)."""
+    start_fen, opening_moves = opening
+    game_state = Notation.from_fen(start_fen)
+    moves: List[str] = []
+    for uci in opening_moves:
+        start_sq, end_sq, promotion = Notation.parse_uci(uci)
+        if not game_state.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                                     PIECE_NAMES[promotion] if promotion else None):
+            raise ValueError(f"Illegal opening move {uci} in {opening}")
+        moves.append(uci)
+
+    players = (white, black)
+    for player in players:
+        player.new_game()
+    nodes = [0, 0]
+    search_ms = [0, 0]
+    searches = [0, 0]
+    ponderhits = [0, 0]
+    expected: List[Optional[str]] = [None, None]  # reply each side is pondering on
+    base, increment = limits.get("tc") or (0, 0)
+    clocks = [float(base), float(base)]
+    started = time.perf_counter()
+    result = termination = None
+
+    while result is None:
+        if _stop is not None and _stop.is_set():
+            result, termination = "*", "run stopped"
+            break
+        outcome = game_state.get_outcome()
+        if outcome is not None:
+            result, termination = outcome
+            break
+        if len(moves) >= MAX_PLIES:
+            result, termination = "1/2-1/2", "max plies"
+            break
+
+        side = game_state.board.turn
+        player = players[side]
+        move_started = time.perf_counter()
+        if player.pondering and moves[-1] == expected[side]:
+            uci, move_nodes, move_ms = player.ponderhit()  # the clock only ran from the hit
+            ponderhits[side] += 1
+        else:
+            if player.pondering:
+                player.stop()
+            uci, move_nodes, move_ms = player.go(start_fen, moves, _go_args(limits, clocks))
+        spent = (time.perf_counter() - move_started) * 1000
+        nodes[side] += move_nodes
+        search_ms[side] += move_ms or spent
+        searches[side] += 1
+
+        winner = "0-1" if side == 0 else "1-0"
+        if limits.get("tc"):
+            clocks[side] -= spent
+            if clocks[side] < 0:
+                result, termination = winner, "time forfeit"
+                break
+            clocks[side] += increment
+        try:
+            start_sq, end_sq, promotion = Notation.parse_uci(uci)
+        except ValueError:
+            result, termination = winner, f"illegal move {uci}"
+            break
+        if not game_state.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                                     PIECE_NAMES[promotion] if promotion else None):
+            result, termination = winner, f"illegal move {uci}"
+            break
+        moves.append(uci)
+        if player.ponder_enabled and player.expected is not None:
+            expected[side] = player.expected
+            player.ponder(start_fen, moves + [player.expected], _go_args(limits, clocks))
+
+    for player in players:
+        if player.pondering:
+            player.stop()
+    return {
+        "white": white.name, "black": black.name, "result": result, "termination": termination,
+        "start_fen": start_fen, "moves": moves, "plies": len(moves),
+        "seconds": time.perf_counter() - started,
+        "white_nodes": nodes[0], "black_nodes": nodes[1],
+        "white_nps": int(nodes[0] * 1000 / search_ms[0]) if search_ms[0] else 0,
+        "black_nps": int(nodes[1] * 1000 / search_ms[1]) if search_ms[1] else 0,
+        "white_moves": searches[0], "black_moves": searches[1],
+        "white_ponderhits": ponderhits[0], "black_ponderhits": ponderhits[1],
+    }
+
+
+def _init_worker(stop) -> None:
+    global _stop
+    _stop = stop
+
+
+def play_pair(pair_index: int, opening: Opening, engine_a: Dict[str, object], engine_b: Dict[str, object],
+              limits: Dict[str, object]) -> List[Dict[str, object]]:
+    """Pool task: play an opening with both color assignments. Records carry a_white."""
+    if _stop is not None and _stop.is_set():
+        return []  # handed to a worker before the run stopped
+    player_a = UCIPlayer(engine_a["command"], engine_a.get("dir"), engine_a.get("options"),
+                         engine_a.get("ponder", False))
+    player_b = UCIPlayer(engine_b["command"], engine_b.get("dir"), engine_b.get("options"),
+                         engine_b.get("ponder", False))
+    player_a.name = engine_a.get("name") or player_a.name
+    player_b.name = engine_b.get("name") or player_b.name
+    try:
+        records = []
+        for round_index, (white, black) in enumerate(((player_a, player_b), (player_b, player_a))):
+            record = play_game(white, black, opening, limits)
+            record["round"] = f"{pair_index + 1}.{round_index + 1}"
+            record["a_white"] = white is player_a
+            records.append(record)
+            if _stop is not None and _stop.is_set():
+                break
+        return records
+    finally:
+        player_a.quit()
+        player_b.quit()
+
+
+# -------------------------
+# Openings
+# -------------------------
+def load_openings(path: Optional[str], plies: int = 8) -> List[Opening]:
+    """
+    Openings from a PGN file (first ``plies`` moves of each game), an EPD/FEN
+    file (one position per line) or the built-in suite when path is None.
+    """
+    if path is None:
+        return [(START_FEN, line.split()) for line in DEFAULT_OPENINGS]
+    openings = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        if path.lower().endswith(".pgn"):
+            for game in Notation.read_pgn(f):
+                fen = game["headers"].get("FEN") or START_FEN
+                board = Notation.from_fen(fen).board
+                line = []
+                for san in game["moves"][:plies]:
+                    move = Notation.san_to_move(board, san)
+                    board.make_move(*move)
+                    line.append(Notation.move_to_uci(move))
+                openings.append((fen, line))
+        else:
+            for text in f:
+                fields = text.split(";")[0].split()
+                if len(fields) >= 4:
+                    # EPD lines carry operations instead of the move counters
+                    counters = fields[4:6] if len(fields) >= 6 and all(x.isdigit() for x in fields[4:6]) else ["0", "1"]
+                    openings.append((" ".join(fields[:4] + counters), []))
+    if not openings:
+        raise ValueError(f"No openings found in {path}")
+    return openings
+
+
+def _pgn_record(record: Dict[str, object], event: str, time_control: str) -> str:
+    moves = [Notation.parse_uci(uci) for uci in record["moves"]]
+    headers = {
+        "Event": event,
+        "Site": "?",
+        "Date": time.strftime("%Y.%m.%d"),
+        "Round": record["round"],
+        "White": record["white"],
+        "Black": record["black"],
+        "Termination": record["termination"],
+        "TimeControl": time_control,
+        "WhiteNPS": str(record["white_nps"]),
+        "BlackNPS": str(record["black_nps"]),
+    }
+    start_fen = record["start_fen"] if record["start_fen"] != START_FEN else None
+    return Notation.to_pgn(moves, headers, record["result"], start_fen)
+
+
+# -------------------------
+# Driver
+# -------------------------
+def run_tournament(engine_a: Dict[str, object], engine_b: Dict[str, object], games: int,
+                   limits: Dict[str, object], openings: List[Opening], workers: int = 1,
+                   sprt: Optional[Tuple[float, float]] = None, alpha: float = 0.05, beta: float = 0.05,
+                   pgn_path: Optional[str] = None, log_path: Optional[str] = None,
+                   event: str = "ChessGame-py tournament") -> Dict[str, object]:
+    """
+    Play up to ``games`` games (rounded up to pairs) and return the summary:
+    wins/draws/losses of engine A, elo, elo_error, llr, sprt verdict, nps,
+    nodes per move and ponder hit rate.
+    """
+    pairs = (games + 1) // 2
+    wins = draws = losses = 0
+    nps = {"a": [], "b": []}
+    totals = {side: {"nodes": 0, "moves": 0, "ponderhits": 0} for side in ("a", "b")}
+    llr = 0.0
+    verdict = None
+    bounds = sprt_bounds(alpha, beta) if sprt else None
+    time_control = (f"{limits['tc'][0] / 1000:g}+{limits['tc'][1] / 1000:g}" if limits.get("tc") else "-")
+    pgn_out = open(pgn_path, "a", encoding="utf-8") if pgn_path else None
+    log_out = open(log_path, "a", encoding="utf-8") if log_path else None
+    started = time.perf_counter()
+    try:
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(stop,)) as executor:
+            futures = [executor.submit(play_pair, index, openings[index % len(openings)], engine_a, engine_b, limits)
+                       for index in range(pairs)]
+            for future in as_completed(futures):
+                for record in future.result():
+                    a_white = record["a_white"]
+                    score_a = {"1-0": 1.0, "0-1": 0.0}.get(record["result"], 0.5)
+                    if not a_white:
+                        score_a = 1.0 - score_a
+                    if score_a == 1.0:
+                        wins += 1
+                    elif score_a == 0.0:
+                        losses += 1
+                    else:
+                        draws += 1
+                    nps["a"].append(record["white_nps"] if a_white else record["black_nps"])
+                    nps["b"].append(record["black_nps"] if a_white else record["white_nps"])
+                    for side, color in (("a", "white" if a_white else "black"), ("b", "black" if a_white else "white")):
+                        for key in totals[side]:
+                            totals[side][key] += record[f"{color}_{key}"]
+                    if pgn_out is not None:
+                        pgn_out.write(_pgn_record(record, event, time_control) + "\n")
+                        pgn_out.flush()
+                    if log_out is not None:
+                        log_out.write(json.dumps({key: value for key, value in record.items() if key != "moves"}) + "\n")
+                        log_out.flush()
+
+                elo, error = elo_with_error(wins, draws, losses)
+                line = f"[tournament] {wins + draws + losses} games  +{wins} ={draws} -{losses}  elo {elo:+.1f} +/- {error:.1f}"
+                if sprt:
+                    llr = sprt_llr(wins, draws, losses, *sprt)
+                    line += f"  llr {llr:.2f} [{bounds[0]:.2f}, {bounds[1]:.2f}]"
+                    if llr >= bounds[1]:
+                        verdict = "H1"
+                    elif llr <= bounds[0]:
+                        verdict = "H0"
+                print(line, flush=True)
+                if verdict is not None:
+                    # drop the queued pairs and end the running ones after their current move
+                    stop.set()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+    finally:
+        for out in (pgn_out, log_out):
+            if out is not None:
+                out.close()
+
+    elo, error = elo_with_error(wins, draws, losses)
+    return {
+        "games": wins + draws + losses, "wins": wins, "draws": draws, "losses": losses,
+        "elo": elo, "elo_error": error, "llr": llr, "sprt": verdict,
+        "nps_a": sum(nps["a"]) / len(nps["a"]) if nps["a"] else 0,
+        "nps_b": sum(nps["b"]) / len(nps["b"]) if nps["b"] else 0,
+        "nodes_per_move_a": totals["a"]["nodes"] / totals["a"]["moves"] if totals["a"]["moves"] else 0,
+        "nodes_per_move_b": totals["b"]["nodes"] / totals["b"]["moves"] if totals["b"]["moves"] else 0,
+        "ponderhit_rate_a": totals["a"]["ponderhits"] / totals["a"]["moves"] if totals["a"]["moves"] else 0.0,
+        "ponderhit_rate_b": totals["b"]["ponderhits"] / totals["b"]["moves"] if totals["b"]["moves"] else 0.0,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _parse_tc(text: str) -> Tuple[float, float]:
+    """'10+0.1' (seconds + increment) -> (base ms, increment ms)."""
+    base, _, increment = text.partition("+")
+    return float(base) * 1000, float(increment or 0) * 1000
+
+
+def _parse_options(values: List[str]) -> Dict[str, str]:
+    options = {}
+    for value in values or []:
+        name, _, setting = value.partition("=")
+        options[name] = setting
+    return options
+
+
+def main():
+    default_engine = f"{shlex.quote(sys.executable)} -m src.uci"
+    parser = argparse.ArgumentParser(description="Engine-vs-engine tournament with Elo and SPRT")
+    for side in ("a", "b"):
+        parser.add_argument(f"--engine-{side}", default=default_engine, help="UCI engine command")
+        parser.add_argument(f"--dir-{side}", default=None, help="working directory of the engine")
+        parser.add_argument(f"--name-{side}", default=None)
+        parser.add_argument(f"--option-{side}", action="append", metavar="NAME=VALUE", help="UCI option (repeatable)")
+        parser.add_argument(f"--ponder-{side}", action="store_true", help="think during the opponent's turn")
+    parser.add_argument("--games", type=int, default=100)
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("--tc", default=None, help="time control, seconds+increment (e.g. 10+0.1)")
+    limit.add_argument("--movetime", type=int, default=None, help="ms per move")
+    limit.add_argument("--depth", type=int, default=None)
+    limit.add_argument("--nodes", type=int, default=None)
+    parser.add_argument("--openings", default=None, help="PGN or EPD/FEN file (default: built-in suite)")
+    parser.add_argument("--opening-plies", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), default=None)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--pgn", default=None, help="append games to this PGN file")
+    parser.add_argument("--log", default=None, help="append per-game JSON lines (result, nps) here")
+    args = parser.parse_args()
+
+    engine_a = {"command": args.engine_a, "dir": args.dir_a, "name": args.name_a or "A",
+                "options": _parse_options(args.option_a), "ponder": args.ponder_a}
+    engine_b = {"command": args.engine_b, "dir": args.dir_b, "name": args.name_b or "B",
+                "options": _parse_options(args.option_b), "ponder": args.ponder_b}
+    limits = {"tc": _parse_tc(args.tc) if args.tc else None, "movetime": args.movetime,
+              "depth": args.depth, "nodes": args.nodes}
+    openings = load_openings(args.openings, args.opening_plies)
+
+    summary = run_tournament(engine_a, engine_b, args.games, limits, openings, args.workers,
+                             tuple(args.sprt) if args.sprt else None, args.alpha, args.beta,
+                             args.pgn, args.log)
+    print(f"[tournament] {engine_a['name']} vs {engine_b['name']}: {summary['games']} games "
+          f"+{summary['wins']} ={summary['draws']} -{summary['losses']}, "
+          f"elo {summary['elo']:+.1f} +/- {summary['elo_error']:.1f}"
+          + (f", SPRT accepts {summary['sprt']}" if summary["sprt"] else ""))
+    print(f"[tournament] nps: {engine_a['name']} {summary['nps_a']:.0f}, {engine_b['name']} {summary['nps_b']:.0f} "
+          f"({summary['seconds']:.1f}s)")
+    print(f"[tournament] nodes per move: {engine_a['name']} {summary['nodes_per_move_a']:.0f}, "
+          f"{engine_b['name']} {summary['nodes_per_move_b']:.0f}"
+          + (f"; ponder hits {summary['ponderhit_rate_a']:.0%} / {summary['ponderhit_rate_b']:.0%}"
+             if args.ponder_a or args.ponder_b else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Bulk PGN validation: replay every game and report illegal moves.
+
+Input files are split into byte-range shards; a shard owns the games whose
+tag section starts inside it (a game starts at a '[' line that follows a
+blank line), so shards are cut without scanning the files first. Shards are
+replayed in a process pool, each worker reusing a single GameState/Board, and
+verdicts are streamed back as shards finish.
+
+Each verdict is one JSON line:
+
+  {"file": ..., "offset": <byte offset of the game>, "status": "ok" | "illegal" |
+   "bad_fen" | "result_mismatch", "plies": n, "result": "1-0", "fen": <final FEN>,
+   "error": <reason or null>}
+
+    python -m src.tools.validate games.pgn more.pgn --workers 8 --out verdicts.jsonl
+    python -m src.tools.validate games.pgn --errors-only
+"""
+
+import argparse
+import collections
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.game.board import Board
+from src.game.constants import PAWN, WHITE
+from src.game.game_state import GameState
+from src.game.notation import Notation, START_FEN
+from src.game.rules import Rules
+
+STATUS_OK = "ok"
+STATUS_ILLEGAL = "illegal"
+STATUS_BAD_FEN = "bad_fen"
+STATUS_RESULT_MISMATCH = "result_mismatch"
+
+# a tag line following a blank line ('[' is the last byte of the match)
+_GAME_START_RE = re.compile(rb"\n\r?\n\[")
+
+Shard = Tuple[str, int, int]  # (path, start offset, stop offset)
+
+_worker_state: Optional[GameState] = None  # one per worker process, reused for every game
+
+
+def _init_worker() -> None:
+    global _worker_state
+    _worker_state = GameState(Board())
+
+
+# -------------------------
+# Sharding
+# -------------------------
+def plan_shards(paths: List[str], shard_bytes: int) -> List[Shard]:
+    """Cut every file into byte ranges of about shard_bytes."""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, shard_bytes):
+            shards.append((path, start, min(start + shard_bytes, size)))
+    return shards
+
+
+def _game_starts(data: bytes, pos: int = 0, at_file_start: bool = False) -> List[int]:
+    """Positions of the '[' opening each game in data (searching from pos)."""
+    starts = [0] if at_file_start and pos == 0 and data[:1] == b"[" else []
+    starts.extend(match.end() - 1 for match in _GAME_START_RE.finditer(data, pos))
+    return starts
+
+
+def _read_shard(path: str, start: int, stop: int, read_ahead: int = 1 << 16) -> List[Tuple[int, bytes]]:
+    """The (offset, text) of every game that starts in [start, stop)."""
+    base = max(0, start - 4)  # room to see the blank line before a game starting exactly at start
+    with open(path, "rb") as f:
+        f.seek(base)
+        data = f.read(stop - base)
+        # keep reading until the last owned game is closed by the next game start (or EOF)
+        while True:
+            if any(base + s >= stop for s in _game_starts(data, max(0, stop - base - 4))):
+                break
+            more = f.read(read_ahead)
+            if not more:
+                break
+            data += more
+    starts = _game_starts(data, at_file_start=base == 0)
+    games = []
+    for index, game_start in enumerate(starts):
+        offset = base + game_start
+        if offset < start:
+            continue
+        if offset >= stop:
+            break
+        game_end = starts[index + 1] if index + 1 < len(starts) else len(data)
+        games.append((offset, data[game_start:game_end]))
+    return games
+
+
+# -------------------------
+# Replay
+# -------------------------
+def _final_outcome(board: Board) -> Optional[str]:
+    """The result forced by the final position (mate or stalemate), if any."""
+    if Rules.has_legal_move(board, board.turn):
+        return None
+    if Rules.is_in_check(board, board.turn):
+        return "0-1" if board.turn == WHITE else "1-0"
+    return "1/2-1/2"
+
+
+def validate_game(game_state: GameState, game: Dict[str, object]) -> Dict[str, object]:
+    """
+    Replay one parsed PGN game (see Notation.read_pgn) on game_state, which is
+    reset first. Returns the verdict without the file/offset fields.
+    """
+    result = game["result"]
+    verdict = {"status": STATUS_OK, "plies": 0, "result": result, "fen": None, "error": None}
+    fen = game["headers"].get("FEN") or START_FEN
+    try:
+        Notation.from_fen(fen, game_state)
+    except ValueError as exc:
+        verdict.update(status=STATUS_BAD_FEN, error=str(exc))
+        return verdict
+
+    board = game_state.board
+    squares = board.squares
+    plies = 0
+    for san in game["moves"]:
+        try:
+            move = Notation.san_to_move(board, san)
+        except ValueError as exc:
+            verdict.update(status=STATUS_ILLEGAL, error=f"ply {plies + 1}: {exc}")
+            break
+        start_sq, end_sq, _ = move
+        if squares[start_sq].kind.type_code == PAWN or squares[end_sq] is not None:
+            game_state.halfmove_clock = 0
+        else:
+            game_state.halfmove_clock += 1
+        if board.turn != WHITE:
+            game_state.fullmove_number += 1
+        board.make_move(*move)
+        plies += 1
+    verdict["plies"] = plies
+    verdict["fen"] = Notation.to_fen(game_state)
+
+    if verdict["status"] == STATUS_OK and result != "*":
+        forced = _final_outcome(board)
+        if forced is not None and forced != result:
+            verdict.update(status=STATUS_RESULT_MISMATCH, error=f"final position is {forced}")
+    return verdict
+
+
+def validate_shard(path: str, start: int, stop: int) -> List[Dict[str, object]]:
+    """Pool task: verdicts for every game of one shard."""
+    if _worker_state is None:
+        _init_worker()
+    verdicts = []
+    for offset, data in _read_shard(path, start, stop):
+        text = data.decode("utf-8", errors="replace")
+        for game in Notation.read_pgn(text.splitlines()):
+            verdict = validate_game(_worker_state, game)
+            verdict["file"] = path
+            verdict["offset"] = offset
+            verdicts.append(verdict)
+    return verdicts
+
+
+def validate_files(paths: List[str], workers: int = 1, shard_bytes: int = 4 << 20,
+                   on_verdict: Optional[Callable[[Dict[str, object]], None]] = None) -> Dict[str, object]:
+    """
+    Validate every game of the given PGN files. on_verdict is called with each
+    verdict as its shard finishes (shard order is not preserved). Returns a
+    summary: games, plies, seconds, games_per_sec, plies_per_sec, statuses.
+    """
+    shards = plan_shards(paths, shard_bytes)
+    statuses = collections.Counter()
+    totals = {"games": 0, "plies": 0}
+
+    def collect(verdicts):
+        for verdict in verdicts:
+            totals["games"] += 1
+            totals["plies"] += verdict["plies"]
+            statuses[verdict["status"]] += 1
+            if on_verdict is not None:
+                on_verdict(verdict)
+
+    started = time.perf_counter()
+    if workers <= 1:
+        for shard in shards:
+            collect(validate_shard(*shard))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+            queued = iter(shards)
+            running = set()
+            while True:
+                # keep a couple of shards per worker in flight
+                for shard in queued:
+                    running.add(executor.submit(validate_shard, *shard))
+                    if len(running) >= 2 * workers:
+                        break
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+    elapsed = time.perf_counter() - started
+    return {
+        "games": totals["games"],
+        "plies": totals["plies"],
+        "seconds": elapsed,
+        "games_per_sec": totals["games"] / elapsed if elapsed else 0.0,
+        "plies_per_sec": totals["plies"] / elapsed if elapsed else 0.0,
+        "statuses": dict(statuses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay PGN files and report illegal games")
+    parser.add_argument("pgn", nargs="+")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-mb", type=float, default=4.0, help="shard size in megabytes")
+    parser.add_argument("--out", default=None, help="write JSON-lines verdicts here (default stdout)")
+    parser.add_argument("--errors-only", action="store_true", help="only emit verdicts that are not ok")
+    args = parser.parse_args()
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+
+    def emit(verdict):
+        if not args.errors_only or verdict["status"] != STATUS_OK:
+            out.write(json.dumps(verdict) + "\n")
+
+    try:
+        summary = validate_files(args.pgn, args.workers, int(args.shard_mb * (1 << 20)), emit)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    statuses = " ".join(f"{status}={count}" for status, count in sorted(summary["statuses"].items()))
+    print(f"[validate] {summary['games']} games, {summary['plies']} plies in {summary['seconds']:.2f}s "
+          f"({summary['games_per_sec']:.0f} games/s, {summary['plies_per_sec']:.0f} plies/s) {statuses}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
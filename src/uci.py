@@ -0,0 +1,247 @@
+"""
+UCI protocol front end: lets chess GUIs and match runners drive the engine.
+
+    python -m src.uci
+
+Commands are read from stdin and answered on stdout. Positions are set up
+on a GameState (Notation.from_fen + apply_move) and searched with
+engine.Search on a worker thread, so ``stop``, ``ponderhit`` and ``isready``
+are handled while the engine thinks.
+"""
+
+import os
+import sys
+import threading
+from typing import List, Optional
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # stdout belongs to the protocol
+
+from src.game.constants import BOARD_WIDTH, PIECE_NAMES
+from src.game.notation import Notation, START_FEN
+from src.engine.evaluation import evaluate
+from src.engine.search import Search, SearchLimits
+
+ENGINE_NAME = "ChessGame-py"
+ENGINE_AUTHOR = "ChessGame-py contributors"
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+MAX_MULTIPV = 32
+
+# "go" arguments that take an integer value
+_GO_VALUES = ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo", "nodes")
+
+
+class UCIEngine:
+    """Protocol state machine; one instance per stdin/stdout session."""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.search = Search(DEFAULT_HASH_MB)
+        self.threads = 1  # accepted for GUI compatibility; the search runs on one thread
+        self.multipv = 1
+        self.game_state = Notation.from_fen(START_FEN)
+        self.history: List[int] = []  # hashes of the positions before the current one
+        self._worker: Optional[threading.Thread] = None
+        self._limits: Optional[SearchLimits] = None
+        self._out_lock = threading.Lock()
+        self._commands = {
+            "uci": self._cmd_uci,
+            "isready": self._cmd_isready,
+            "setoption": self._cmd_setoption,
+            "ucinewgame": self._cmd_ucinewgame,
+            "position": self._cmd_position,
+            "go": self._cmd_go,
+            "stop": self._cmd_stop,
+            "ponderhit": self._cmd_ponderhit,
+            "d": self._cmd_display,
+        }
+
+    def send(self, line: str) -> None:
+        with self._out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def handle_line(self, line: str) -> bool:
+        """Execute one command line; returns False on ``quit``."""
+        parts = line.split()
+        if not parts:
+            return True
+        if parts[0] == "quit":
+            self._stop_search()
+            return False
+        command = self._commands.get(parts[0])
+        if command is not None:
+            command(parts[1:])
+        return True  # unknown commands are ignored, as the protocol asks
+
+    # -------------------------
+    # Commands
+    # -------------------------
+    def _cmd_uci(self, args: List[str]) -> None:
+        self.send(f"id name {ENGINE_NAME}")
+        self.send(f"id author {ENGINE_AUTHOR}")
+        self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+        self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+        self.send("option name Ponder type check default false")
+        self.send(f"option name MultiPV type spin default 1 min 1 max {MAX_MULTIPV}")
+        self.send("option name EvalFile type string default <empty>")
+        self.send("uciok")
+
+    def _cmd_isready(self, args: List[str]) -> None:
+        self.send("readyok")
+
+    def _cmd_setoption(self, args: List[str]) -> None:
+        # setoption name <name...> [value <value...>]
+        text = " ".join(args)
+        if not text.startswith("name "):
+            return
+        name, _, value = text[5:].partition(" value ")
+        name = name.strip().lower()
+        try:
+            if name == "hash":
+                self._stop_search()
+                self.search.set_hash_size(max(1, min(MAX_HASH_MB, int(value))))
+            elif name == "threads":
+                self.threads = max(1, min(MAX_THREADS, int(value)))
+            elif name == "multipv":
+                self.multipv = max(1, min(MAX_MULTIPV, int(value)))
+            elif name == "evalfile":
+                self._stop_search()
+                self._set_eval_file(value.strip())
+        except ValueError:
+            self.send(f"info string invalid value for {name}: {value}")
+
+    def _set_eval_file(self, path: str) -> None:
+        """Evaluate with NNUE weights from path; empty or <empty> restores the built-in evaluation."""
+        if path in ("", "<empty>"):
+            self.search.evaluate = evaluate
+            return
+        from src.engine.nnue import Network, NNUEEvaluator  # deferred: pulls in NumPy
+        try:
+            network = Network.load(path)
+        except (OSError, ValueError) as exc:
+            self.send(f"info string cannot load {path}: {exc}")
+            return
+        self.search.evaluate = NNUEEvaluator(network)
+        self.send(f"info string NNUE {path}: hidden {network.hidden}, l2 {network.l2}")
+
+    def _cmd_ucinewgame(self, args: List[str]) -> None:
+        self._stop_search()
+        self.search.clear()
+        self.game_state = Notation.from_fen(START_FEN)
+        self.history = []
+
+    def _cmd_position(self, args: List[str]) -> None:
+        # position startpos|fen <fen> [moves <m1> <m2> ...]
+        self._stop_search()
+        if "moves" in args:
+            split = args.index("moves")
+            setup, moves = args[:split], args[split + 1:]
+        else:
+            setup, moves = args, []
+        try:
+            if setup and setup[0] == "fen":
+                game_state = Notation.from_fen(" ".join(setup[1:]))
+            else:
+                game_state = Notation.from_fen(START_FEN)
+        except ValueError as exc:
+            self.send(f"info string {exc}")
+            return
+
+        history = []
+        for uci in moves:
+            try:
+                start_sq, end_sq, promotion = Notation.parse_uci(uci)
+            except ValueError:
+                self.send(f"info string invalid move {uci}")
+                break
+            position_hash = game_state.board.hash
+            if not game_state.apply_move(divmod(start_sq, BOARD_WIDTH), divmod(end_sq, BOARD_WIDTH),
+                                         PIECE_NAMES[promotion] if promotion else None):
+                self.send(f"info string illegal move {uci}")
+                break
+            # an irreversible move makes earlier positions unreachable
+            history = [] if game_state.halfmove_clock == 0 else history + [position_hash]
+        self.game_state = game_state
+        self.history = history
+
+    def _cmd_go(self, args: List[str]) -> None:
+        self._stop_search()
+        limits = SearchLimits(multipv=self.multipv)
+        index = 0
+        while index < len(args):
+            token = args[index]
+            if token in _GO_VALUES and index + 1 < len(args):
+                try:
+                    setattr(limits, token, int(args[index + 1]))
+                except ValueError:
+                    pass
+                index += 2
+                continue
+            if token == "infinite":
+                limits.infinite = True
+            elif token == "ponder":
+                limits.ponder = True
+            index += 1
+
+        self.search.stop_event.clear()
+        self._limits = limits
+        self._worker = threading.Thread(target=self._run_search, args=(limits,), daemon=True)
+        self._worker.start()
+
+    def _cmd_stop(self, args: List[str]) -> None:
+        self._stop_search()
+
+    def _cmd_ponderhit(self, args: List[str]) -> None:
+        self.search.ponderhit()
+
+    def _cmd_display(self, args: List[str]) -> None:
+        self.send(f"info string {Notation.to_fen(self.game_state)}")
+
+    # -------------------------
+    # Search worker
+    # -------------------------
+    def _run_search(self, limits: SearchLimits) -> None:
+        best, ponder = self.search.think(self.game_state.board, limits, self.history, self._send_info)
+        if best is None:
+            self.send("bestmove 0000")
+        elif ponder is not None:
+            self.send(f"bestmove {Notation.move_to_uci(best)} ponder {Notation.move_to_uci(ponder)}")
+        else:
+            self.send(f"bestmove {Notation.move_to_uci(best)}")
+
+    def _send_info(self, info) -> None:
+        score = f"mate {info['mate']}" if info["mate"] is not None else f"cp {info['score']}"
+        pv = " ".join(Notation.move_to_uci(move) for move in info["pv"])
+        self.send(f"info depth {info['depth']} multipv {info['multipv']} score {score} nodes {info['nodes']} nps {info['nps']} "
+                  f"time {info['time']} pv {pv}")
+
+    def _stop_search(self) -> None:
+        """Stop a running search and wait for its bestmove to be sent."""
+        if self._worker is not None:
+            self.search.stop()
+            self._worker.join()
+            self._worker = None
+
+
+    def finish(self) -> None:
+        """End of input: let a bounded search complete, stop an unbounded one."""
+        limits = self._limits
+        if self._worker is not None and limits is not None and not (limits.infinite or limits.ponder):
+            self._worker.join()
+        self._stop_search()
+
+
+def main():
+    engine = UCIEngine()
+    for line in sys.stdin:
+        if not engine.handle_line(line):
+            break
+    else:
+        engine.finish()
+
+
+if __name__ == "__main__":
+    main()
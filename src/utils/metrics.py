@@ -0,0 +1,287 @@
+"""
+Lightweight instrumentation: named counters and timing histograms.
+
+Nothing is measured until ``enable()``: it wraps the hot-path functions
+listed in DEFAULT_TARGETS (move validation, make/unmake, move generation,
+rendering, asset loading, ...) with timing wrappers and ``disable()`` puts
+the originals back, so the code runs untouched while metrics are off. The
+wrappers of the targets in RESULT_COUNTERS also count what the calls
+returned (moves generated, moves rejected, captures, ...). Explicit
+``count(name)`` calls cost one global lookup and a branch when off.
+
+Timings go into log2 histograms (nanosecond buckets) from which snapshots
+derive mean and approximate percentiles. ``frame()`` marks the end of a UI
+frame so per-frame rates can be shown by MetricsOverlay. ``snapshot()`` /
+``dump(path)`` export everything as JSON.
+
+    CHESS_METRICS=metrics.json python -m src     # 'm' toggles the overlay
+"""
+
+import functools
+import importlib
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+enabled = False
+
+# (module, "Class.attribute" or "function", metric name)
+DEFAULT_TARGETS = (
+    ("src.game.rules", "Rules.is_valid_move", "rules.is_valid_move"),
+    ("src.game.rules", "Rules.generate_moves", "rules.generate_moves"),
+    ("src.game.rules", "Rules.get_legal_moves", "rules.get_legal_moves"),
+    ("src.game.rules", "Rules.is_in_check", "rules.is_in_check"),
+    ("src.game.board", "Board.make_move", "board.make_move"),
+    ("src.game.board", "Board.unmake_move", "board.unmake_move"),
+    ("src.game.board", "Board.move_piece", "board.move_piece"),
+    ("src.game.game_state", "GameState.apply_move", "game_state.apply_move"),
+    ("src.game.game_state", "GameState.undo_last_move", "game_state.undo_last_move"),
+    ("src.UI.renderer", "Renderer.draw_board", "render.draw_board"),
+    ("src.UI.hud", "HUD.draw", "render.hud"),
+    ("src.utils.assets", "init_assets", "assets.init_assets"),
+    ("src.utils.assets", "get_piece_image", "assets.get_piece_image"),
+)
+
+# metric name -> function of a call's result giving (counter name, amount), or None to count nothing
+RESULT_COUNTERS = {
+    "rules.is_valid_move": lambda valid: None if valid else ("rules.rejected_moves", 1),
+    "rules.generate_moves": lambda moves: ("rules.generated_moves", len(moves)),
+    "rules.get_legal_moves": lambda moves: ("rules.legal_moves", len(moves)),
+    "rules.is_in_check": lambda check: ("rules.checks", 1) if check else None,
+    "board.make_move": lambda undo: ("board.captures", 1) if undo[5] is not None else None,
+    "board.move_piece": lambda moved: ("board.moves_played", 1) if moved else ("board.rejected_moves", 1),
+}
+
+
+class Histogram:
+    """Durations in log2 buckets of nanoseconds (bucket i holds [2**(i-1), 2**i))."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * 64
+
+    def add(self, nanoseconds: int) -> None:
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+        self.buckets[nanoseconds.bit_length()] += 1
+
+    def percentile(self, q: float) -> int:
+        """Upper bound (ns) of the bucket holding the q-th percentile."""
+        if not self.count:
+            return 0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min(1 << index, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": self.total / 1e6,
+            "mean_us": self.total / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1e3,
+            "p90_us": self.percentile(90) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "max_us": self.max / 1e3,
+        }
+
+
+counters: Dict[str, int] = {}
+timers: Dict[str, Histogram] = {}
+frames = 0
+last_frame: Dict[str, Tuple[int, float]] = {}  # name -> (calls, ms) during the last frame
+
+_installed: List[Tuple[object, str, object]] = []  # (owner, attribute, original) to restore
+_frame_marks: Dict[str, Tuple[int, int]] = {}
+
+
+# -------------------------
+# Recording
+# -------------------------
+def count(name: str, amount: int = 1) -> None:
+    """Add to a named counter (no-op while disabled)."""
+    if enabled:
+        counters[name] = counters.get(name, 0) + amount
+
+
+def record(name: str, nanoseconds: int) -> None:
+    """Add one duration to a named timer."""
+    histogram = timers.get(name)
+    if histogram is None:
+        histogram = timers[name] = Histogram()
+    histogram.add(nanoseconds)
+
+
+class timer:
+    """Context manager timing a block: ``with metrics.timer("search"): ...``."""
+
+    __slots__ = ("name", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._started = 0
+
+    def __enter__(self):
+        if enabled:
+            self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if enabled and self._started:
+            record(self.name, time.perf_counter_ns() - self._started)
+
+
+def timed(name: str, function, counter=None):
+    """
+    Wrap function so every call is recorded under name; counter (see
+    RESULT_COUNTERS) maps each result to a counter to add to.
+    """
+    clock = time.perf_counter_ns
+
+    if counter is None:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, clock() - started)
+    else:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                record(name, clock() - started)
+            counted = counter(result)
+            if counted is not None:
+                counters[counted[0]] = counters.get(counted[0], 0) + counted[1]
+            return result
+    wrapper.__wrapped_metric__ = name
+    return wrapper
+
+
+def frame() -> None:
+    """Mark the end of a UI frame: updates last_frame with per-frame calls and time."""
+    global frames
+    if not enabled:
+        return
+    frames += 1
+    for name, histogram in timers.items():
+        calls, total = _frame_marks.get(name, (0, 0))
+        last_frame[name] = (histogram.count - calls, (histogram.total - total) / 1e6)
+        _frame_marks[name] = (histogram.count, histogram.total)
+
+
+# -------------------------
+# Switching on and off
+# -------------------------
+def enable(targets=DEFAULT_TARGETS) -> None:
+    """Start measuring: install timing wrappers on the targets."""
+    global enabled
+    if enabled:
+        return
+    for module_name, attribute, name in targets:
+        module = importlib.import_module(module_name)
+        owner_name, _, member = attribute.rpartition(".")
+        owner = getattr(module, owner_name) if owner_name else module
+        raw = owner.__dict__[member] if isinstance(owner, type) else getattr(owner, member)
+        counter = RESULT_COUNTERS.get(name)
+        if isinstance(raw, staticmethod):
+            wrapped = staticmethod(timed(name, raw.__func__, counter))
+        else:
+            wrapped = timed(name, raw, counter)
+        setattr(owner, member, wrapped)
+        _installed.append((owner, member, raw))
+        if owner is module:
+            # modules that did "from module import function" hold their own reference
+            for other in list(sys.modules.values()):
+                if other is not module and getattr(other, "__name__", "").startswith("src.") \
+                        and other.__dict__.get(member) is raw:
+                    setattr(other, member, wrapped)
+                    _installed.append((other, member, raw))
+    enabled = True
+
+
+def disable() -> None:
+    """Stop measuring and restore the original functions (data is kept)."""
+    global enabled
+    for owner, member, original in reversed(_installed):
+        setattr(owner, member, original)
+    _installed.clear()
+    enabled = False
+
+
+def reset() -> None:
+    """Forget all recorded data."""
+    global frames
+    counters.clear()
+    timers.clear()
+    last_frame.clear()
+    _frame_marks.clear()
+    frames = 0
+
+
+# -------------------------
+# Export
+# -------------------------
+def snapshot() -> Dict[str, object]:
+    """All counters and timer summaries as a JSON-serialisable dict."""
+    return {
+        "time": time.time(),
+        "frames": frames,
+        "counters": dict(counters),
+        "timers": {name: histogram.summary() for name, histogram in sorted(timers.items())},
+        "per_frame": {name: {"calls": calls, "ms": ms} for name, (calls, ms) in sorted(last_frame.items())},
+    }
+
+
+def dump(path: str) -> None:
+    """Write a snapshot to path (atomically replaced)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class MetricsOverlay:
+    """In-window table of the most expensive timers during the last frame."""
+
+    def __init__(self, font=None, rows: int = 8):
+        import pygame as pg  # only the UI needs pygame
+        self._pg = pg
+        self.font = font or pg.font.SysFont(None, 18)
+        self.rows = rows
+        self.visible = False
+
+    def toggle(self) -> None:
+        self.visible = not self.visible
+
+    def draw(self, screen) -> None:
+        if not self.visible or not enabled:
+            return
+        pg = self._pg
+        lines = [f"frame {frames}"]
+        for name, (calls, ms) in sorted(last_frame.items(), key=lambda item: item[1][1], reverse=True)[:self.rows]:
+            lines.append(f"{name:26} {calls:5d} calls {ms:7.3f} ms")
+        width = max(self.font.size(line)[0] for line in lines) + 12
+        height = len(lines) * (self.font.get_linesize() + 2) + 8
+        panel = pg.Surface((width, height), pg.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        screen.blit(panel, (screen.get_width() - width - 4, 4))
+        y = 8
+        for line in lines:
+            screen.blit(self.font.render(line, True, pg.Color("white")), (screen.get_width() - width + 2, y))
+            y += self.font.get_linesize() + 2